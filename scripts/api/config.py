@@ -23,10 +23,30 @@ class Settings:
     gradient_api_key: Optional[str] = None
     gradient_base_url: str = "https://api.gradient.ai/v1"
     ai_model: str = "llama-3.1-8b-instruct"  # Overridden by AI_MODEL or GRADIENT_GENERATION_MODEL env var
+    ai_chunk_threshold: int = 4000  # Longer notes are summarized section by section; 0 disables
+    summary_cache_dir: str = ""  # Section summary cache; defaults to scripts/summary-cache
+    ai_pack_size: int = 8  # Short notes described per request; 1 disables packing
+    ai_fast_model: str = ""  # Smaller model asked before ai_model; empty disables the cascade
+    ai_fast_timeout: float = 15.0  # Seconds before a fast model request is escalated
+    token_stats_path: str = ""  # Observed completion lengths for max_tokens; defaults to scripts/token-stats.json
 
     # Job settings
     max_concurrent_jobs: int = 2
 
+    # Health probing (background checks cached for /health endpoints)
+    health_check_interval: float = 15.0
+    health_check_timeout: float = 5.0
+
+    # Shared async HTTP client (AI calls from the API)
+    http_max_connections: int = 20
+    http_max_per_host: int = 8
+    http_timeout: float = 120.0
+    http_connect_timeout: float = 10.0
+    http_max_retries: int = 2  # Retries for timeouts, connection errors, 429 and 5xx
+    http_max_retry_wait: float = 10.0  # Longest Retry-After/backoff wait before giving up
+    http_breaker_threshold: int = 5  # Consecutive failures that open a host's circuit
+    http_breaker_reset: float = 30.0  # Seconds before an open circuit allows a trial request
+
     def __post_init__(self):
         if self.allowed_origins is None:
             self.allowed_origins = ["http://localhost:5173", "http://localhost:5033"]
@@ -49,7 +69,23 @@ def load_settings() -> Settings:
         gradient_base_url=os.environ.get("GRADIENT_BASE_URL", "https://api.gradient.ai/v1"),
         # Check both AI_MODEL (legacy) and GRADIENT_GENERATION_MODEL (matches .NET backend)
         ai_model=os.environ.get("AI_MODEL") or os.environ.get("GRADIENT_GENERATION_MODEL") or "llama-3.1-8b-instruct",
+        ai_chunk_threshold=int(os.environ.get("AI_CHUNK_THRESHOLD", "4000")),
+        summary_cache_dir=os.environ.get("SUMMARY_CACHE_DIR", ""),
+        ai_pack_size=int(os.environ.get("AI_PACK_SIZE", "8")),
+        ai_fast_model=os.environ.get("AI_FAST_MODEL", ""),
+        ai_fast_timeout=float(os.environ.get("AI_FAST_TIMEOUT", "15")),
+        token_stats_path=os.environ.get("TOKEN_STATS_PATH", ""),
         max_concurrent_jobs=int(os.environ.get("MAX_CONCURRENT_JOBS", "2")),
+        health_check_interval=float(os.environ.get("HEALTH_CHECK_INTERVAL", "15")),
+        health_check_timeout=float(os.environ.get("HEALTH_CHECK_TIMEOUT", "5")),
+        http_max_connections=int(os.environ.get("HTTP_MAX_CONNECTIONS", "20")),
+        http_max_per_host=int(os.environ.get("HTTP_MAX_PER_HOST", "8")),
+        http_timeout=float(os.environ.get("HTTP_TIMEOUT", "120")),
+        http_connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", "10")),
+        http_max_retries=int(os.environ.get("HTTP_MAX_RETRIES", "2")),
+        http_max_retry_wait=float(os.environ.get("HTTP_MAX_RETRY_WAIT", "10")),
+        http_breaker_threshold=int(os.environ.get("HTTP_BREAKER_THRESHOLD", "5")),
+        http_breaker_reset=float(os.environ.get("HTTP_BREAKER_RESET", "30")),
     )
 
 
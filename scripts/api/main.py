@@ -16,8 +16,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .routers import health, jobs, ai_test
+from .routers import health, jobs, ai_test, metrics
+from .services.health_prober import HealthProber
+from .services.http_client import AsyncHTTPClient
 from .services.job_manager import JobManager
+from .services.summaries import create_summary_cache, create_token_stats
 
 
 @asynccontextmanager
@@ -25,10 +28,17 @@ async def lifespan(app: FastAPI):
     """
     Application lifespan manager.
 
-    Sets up the job manager on startup and cleans up on shutdown.
+    Sets up the job manager, shared HTTP client, summary cache, token
+    stats and background health prober on startup and cleans up on
+    shutdown.
     """
     # Startup
     app.state.job_manager = JobManager()
+    app.state.http_client = AsyncHTTPClient()
+    app.state.summary_cache = create_summary_cache()
+    app.state.token_stats = create_token_stats()
+    app.state.health_prober = HealthProber(app.state.job_manager.logs_dir)
+    app.state.health_prober.start()
     print("Script Runner API started.")
     print(f"API key auth: {'enabled' if settings.api_key else 'disabled'}")
     print(f"Database URL: {'configured' if settings.database_url else 'not configured'}")
@@ -36,7 +46,11 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown
+    await app.state.health_prober.stop()
     await app.state.job_manager.shutdown()
+    await app.state.http_client.aclose()
+    app.state.summary_cache.close()
+    app.state.token_stats.close()
     print("Script Runner API shutdown complete.")
 
 
@@ -66,6 +80,7 @@ app.add_middleware(
 app.include_router(health.router, prefix="/health", tags=["Health"])
 app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
 app.include_router(ai_test.router, prefix="/ai-test", tags=["AI Testing"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
 
 @app.get("/")
@@ -75,7 +90,8 @@ async def root():
         "service": "ProjectLoopbreaker Script Runner",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "metrics": "/metrics"
     }
 
 
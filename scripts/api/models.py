@@ -20,6 +20,13 @@ class ScriptType(str, Enum):
     """Available script types."""
     NORMALIZE_NOTES = "normalize_notes"
     NORMALIZE_VAULT = "normalize_vault"
+    RELATED_NOTES = "related_notes"
+
+
+class JobView(str, Enum):
+    """Projection of job data returned by list/detail endpoints."""
+    FULL = "full"
+    SUMMARY = "summary"
 
 
 class JobProgress(BaseModel):
@@ -29,6 +36,11 @@ class JobProgress(BaseModel):
     succeeded: int = 0
     failed: int = 0
     current_item: Optional[str] = None
+    ai_calls: int = 0
+    elapsed_seconds: Optional[float] = Field(default=None, description="Seconds since the job started")
+    items_per_second: Optional[float] = Field(default=None, description="Smoothed (EWMA) processing rate")
+    ai_calls_per_second: Optional[float] = Field(default=None, description="Smoothed (EWMA) AI request rate")
+    eta_seconds: Optional[float] = Field(default=None, description="Estimated seconds until all items are processed")
 
 
 class JobRequest(BaseModel):
@@ -42,6 +54,28 @@ class JobRequest(BaseModel):
     use_ai: bool = Field(default=False, description="Use AI to generate descriptions")
     backup: bool = Field(default=False, description="Create backup before changes")
 
+    # Related notes specific options
+    neighbors_k: int = Field(default=10, ge=1, le=100, description="Neighbours to keep per note (for related_notes)")
+    use_ivf: bool = Field(
+        default=False,
+        description="Use the approximate IVF index instead of exact search (for related_notes)"
+    )
+    embeddings_path: Optional[str] = Field(
+        default=None,
+        description="JSON lines file of {id, embedding} to use instead of the Notes table (for related_notes)"
+    )
+
+    timeout_seconds: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Deadline for the whole job; in-flight AI requests and DB statements are aborted when it passes"
+    )
+
+    trace: bool = Field(
+        default=False,
+        description="Record per-phase tracing spans and write Chrome/OTLP trace files"
+    )
+
 
 class JobResponse(BaseModel):
     """Response containing job status and details."""
@@ -53,7 +87,8 @@ class JobResponse(BaseModel):
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
-    logs: List[str] = Field(default_factory=list)
+    logs: List[str] = Field(default_factory=list, description="Most recent log lines")
+    log_count: int = Field(default=0, description="Total log lines, available via GET /jobs/{job_id}/logs")
 
     class Config:
         json_encoders = {
@@ -61,6 +96,24 @@ class JobResponse(BaseModel):
         }
 
 
+class JobSummary(BaseModel):
+    """Lightweight job projection without logs or result, for list polling."""
+    job_id: str
+    script_type: ScriptType
+    status: JobStatus
+    progress: JobProgress = Field(default_factory=JobProgress)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class JobLogsResponse(BaseModel):
+    """A page of a job's complete log."""
+    job_id: str
+    offset: int
+    total: int
+    lines: List[str]
+
+
 class JobListResponse(BaseModel):
     """Response containing list of jobs."""
     jobs: List[JobResponse]
@@ -73,3 +126,20 @@ class HealthResponse(BaseModel):
     service: str = "script_runner"
     version: str = "1.0.0"
     database_connected: bool = False
+
+
+class HealthCheckResult(BaseModel):
+    """Result of a single background health probe."""
+    ok: bool
+    required: bool = True
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[datetime] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Cached readiness state from the background health prober."""
+    status: str
+    ready: bool
+    age_seconds: Optional[float] = Field(default=None, description="Seconds since the last probe completed")
+    checks: Dict[str, HealthCheckResult] = Field(default_factory=dict)
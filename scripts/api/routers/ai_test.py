@@ -5,19 +5,25 @@ Provides endpoints for testing and debugging AI-generated descriptions
 with configurable parameters.
 """
 
+import asyncio
+import json
 import re
+import time
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from ..config import settings
+from ..services.http_client import AsyncHTTPClient, CircuitOpenError, get_http_client
+from ..services.metrics import record_ai_request
+from ..services.summaries import SummaryCache, build_long_note_prompt, get_summary_cache, is_long_note
 
-try:
-    import requests
-except ImportError:
-    requests = None
+# Shared with the benchmark scripts; the services put the scripts directory on the path
+from report_stats import percentile
 
 
 router = APIRouter()
@@ -29,6 +35,7 @@ class SingleFileRequest(BaseModel):
     max_tokens: int = 3000
     temperature: float = 0.3
     show_reasoning: bool = True
+    stream: bool = Field(default=False, description="Stream tokens back as server-sent events")
 
 
 class SingleFileResponse(BaseModel):
@@ -42,6 +49,23 @@ class SingleFileResponse(BaseModel):
     raw_response: Optional[dict] = None
     error: Optional[str] = None
     tokens_used: Optional[dict] = None
+    latency_ms: Optional[float] = None
+    sections: Optional[dict] = Field(
+        default=None,
+        description="For notes summarized section by section: sections, cached and failed counts"
+    )
+
+
+class BatchFileRequest(BaseModel):
+    """Request to generate descriptions for many files concurrently."""
+    file_paths: List[str] = Field(default_factory=list, description="Explicit markdown file paths")
+    vault_path: Optional[str] = Field(default=None, description="Vault to select files from with `glob`")
+    glob: str = Field(default="**/*.md", description="Glob pattern relative to vault_path")
+    max_files: int = Field(default=200, ge=1, le=5000)
+    concurrency: int = Field(default=4, ge=1, le=32)
+    max_tokens: int = 3000
+    temperature: float = 0.3
+    show_reasoning: bool = False
 
 
 class DirectPromptRequest(BaseModel):
@@ -49,6 +73,7 @@ class DirectPromptRequest(BaseModel):
     prompt: str
     max_tokens: int = 3000
     temperature: float = 0.3
+    stream: bool = Field(default=False, description="Stream tokens back as server-sent events")
 
 
 class DirectPromptResponse(BaseModel):
@@ -77,74 +102,176 @@ def parse_frontmatter(content: str) -> tuple:
     return {}, content
 
 
-@router.post("/single-file", response_model=SingleFileResponse)
-async def generate_single_file_description(request: SingleFileRequest):
-    """
-    Generate an AI description for a single markdown file.
+def _read_note(filepath: Path) -> Tuple[str, str]:
+    """Read a markdown file and return (title, body)."""
+    content = filepath.read_text(encoding='utf-8')
+    frontmatter, body = parse_frontmatter(content)
+    title = frontmatter.get('title') or filepath.stem.replace('-', ' ').replace('_', ' ').title()
+    return title, body
 
-    Useful for testing and debugging AI generation on specific files,
-    especially long notes that might need more tokens.
-    """
-    if not settings.gradient_api_key:
-        raise HTTPException(
-            status_code=500,
-            detail="GRADIENT_API_KEY not configured"
-        )
 
-    if requests is None:
-        raise HTTPException(
-            status_code=500,
-            detail="requests library not installed"
-        )
+def _build_prompt(title: str, body: str) -> str:
+    """Build the description prompt for a note."""
+    return f"""Write a 1-2 sentence summary of this note. Be concise and direct. Output only the summary, nothing else.
 
-    # Read the file
-    filepath = Path(request.file_path)
-    if not filepath.exists():
-        raise HTTPException(
-            status_code=404,
-            detail=f"File not found: {request.file_path}"
-        )
+Title: {title}
 
-    if not filepath.suffix.lower() == '.md':
-        raise HTTPException(
-            status_code=400,
-            detail="File must be a markdown file (.md)"
-        )
+Content:
+{body[:4000]}"""  # Allow more content for single-file testing
 
-    try:
-        content = filepath.read_text(encoding='utf-8')
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Could not read file: {e}"
-        )
 
-    # Parse frontmatter and extract title
-    frontmatter, body = parse_frontmatter(content)
-    title = frontmatter.get('title') or filepath.stem.replace('-', ' ').replace('_', ' ').title()
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    if not body.strip():
-        return SingleFileResponse(
-            success=False,
-            file_path=str(filepath),
-            title=title,
-            content_length=0,
-            error="File has no content after frontmatter"
-        )
 
-    # Build prompt
-    prompt = f"""Write a 1-2 sentence summary of this note. Be concise and direct. Output only the summary, nothing else.
+async def _stream_completion(
+    http_client: AsyncHTTPClient,
+    prompt: str,
+    max_tokens: int,
+    temperature: float
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion from the provider as server-sent events.
 
-Title: {title}
+    Emits `content` and `reasoning` events with token deltas, then a `done`
+    event with the full texts, time-to-first-token, total latency and usage
+    (or an `error` event). Closing the client connection aborts the
+    upstream request.
+    """
+    base_url = settings.gradient_base_url.rstrip('/')
+    content_parts: List[str] = []
+    reasoning_parts: List[str] = []
+    usage: dict = {}
+    first_token_ms = None
+    started = time.perf_counter()
 
-Content:
-{body[:4000]}"""  # Allow more content for single-file testing
+    try:
+        async with http_client.stream(
+            "POST",
+            f"{base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {settings.gradient_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": settings.ai_model,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": True,
+                "stream_options": {"include_usage": True}
+            },
+            timeout=120,
+            retry_read_timeouts=False
+        ) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode("utf-8", errors="replace")
+                record_ai_request(settings.ai_model, time.perf_counter() - started, str(response.status_code))
+                yield _sse("error", {"error": f"API returned status {response.status_code}: {body[:500]}"})
+                return
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(payload)
+                except json.JSONDecodeError:
+                    continue
+
+                usage = chunk.get('usage') or usage
+                for choice in chunk.get('choices') or []:
+                    delta = choice.get('delta') or {}
+                    for key, parts, event in (
+                        ('content', content_parts, "content"),
+                        ('reasoning_content', reasoning_parts, "reasoning"),
+                    ):
+                        text = delta.get(key)
+                        if text:
+                            if first_token_ms is None:
+                                first_token_ms = _elapsed_ms(started)
+                            parts.append(text)
+                            yield _sse(event, {"delta": text})
+
+    except httpx.TimeoutException:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "timeout")
+        yield _sse("error", {"error": "Request timed out"})
+        return
+    except CircuitOpenError as e:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "circuit_open")
+        yield _sse("error", {"error": str(e)})
+        return
+    except httpx.HTTPError as e:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "error")
+        yield _sse("error", {"error": str(e)})
+        return
+
+    record_ai_request(settings.ai_model, time.perf_counter() - started, "200", usage)
+    yield _sse("done", {
+        "content": "".join(content_parts) or None,
+        "reasoning": "".join(reasoning_parts) or None,
+        "time_to_first_token_ms": first_token_ms,
+        "latency_ms": _elapsed_ms(started),
+        "tokens_used": {
+            "prompt": usage.get('prompt_tokens'),
+            "completion": usage.get('completion_tokens'),
+            "total": usage.get('total_tokens')
+        }
+    })
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milliseconds elapsed since a time.perf_counter() timestamp."""
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _describe_note(
+    http_client: AsyncHTTPClient,
+    filepath: Path,
+    title: str,
+    body: str,
+    options,
+    summary_cache: Optional[SummaryCache] = None
+) -> SingleFileResponse:
+    """
+    Ask the AI for a description of one note.
+
+    `options` supplies max_tokens, temperature and show_reasoning (a
+    SingleFileRequest or BatchFileRequest). Long notes are summarized
+    section by section first, and the description is generated from the
+    section summaries. tokens_used and reasoning then cover that final
+    request only.
+    """
+    started = time.perf_counter()
+    sections = None
+    if is_long_note(body):
+        prompt, sections = await build_long_note_prompt(
+            http_client, title, body, options.max_tokens, options.temperature, summary_cache
+        )
+        if prompt is None:
+            return SingleFileResponse(
+                success=False,
+                file_path=str(filepath),
+                title=title,
+                content_length=len(body),
+                latency_ms=_elapsed_ms(started),
+                sections=sections,
+                error="No section of the note could be summarized"
+            )
+    else:
+        prompt = _build_prompt(title, body)
 
     # Call AI API
     base_url = settings.gradient_base_url.rstrip('/')
 
+    request_started = time.perf_counter()
     try:
-        response = requests.post(
+        response = await http_client.post(
             f"{base_url}/chat/completions",
             headers={
                 "Authorization": f"Bearer {settings.gradient_api_key}",
@@ -155,18 +282,22 @@ Content:
                 "messages": [
                     {"role": "user", "content": prompt}
                 ],
-                "max_tokens": request.max_tokens,
-                "temperature": request.temperature
+                "max_tokens": options.max_tokens,
+                "temperature": options.temperature
             },
-            timeout=120  # Longer timeout for high token counts
+            timeout=120,  # Longer timeout for high token counts
+            retry_read_timeouts=False
         )
 
         if response.status_code != 200:
+            record_ai_request(settings.ai_model, time.perf_counter() - request_started, str(response.status_code))
             return SingleFileResponse(
                 success=False,
                 file_path=str(filepath),
                 title=title,
                 content_length=len(body),
+                latency_ms=_elapsed_ms(started),
+                sections=sections,
                 error=f"API returned status {response.status_code}: {response.text[:500]}"
             )
 
@@ -175,6 +306,7 @@ Content:
         description = message.get('content')
         reasoning = message.get('reasoning_content')
         usage = result.get('usage', {})
+        record_ai_request(settings.ai_model, time.perf_counter() - request_started, "200", usage)
 
         # If content is empty but we have reasoning, try to extract description
         if not description and reasoning:
@@ -188,8 +320,10 @@ Content:
             title=title,
             content_length=len(body),
             description=description,
-            reasoning=reasoning if request.show_reasoning else None,
-            raw_response=result if request.show_reasoning else None,
+            latency_ms=_elapsed_ms(started),
+            sections=sections,
+            reasoning=reasoning if options.show_reasoning else None,
+            raw_response=result if options.show_reasoning else None,
             tokens_used={
                 "prompt": usage.get('prompt_tokens'),
                 "completion": usage.get('completion_tokens'),
@@ -197,30 +331,256 @@ Content:
             }
         )
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
+        record_ai_request(settings.ai_model, time.perf_counter() - request_started, "timeout")
         return SingleFileResponse(
             success=False,
             file_path=str(filepath),
             title=title,
             content_length=len(body),
+            latency_ms=_elapsed_ms(started),
+            sections=sections,
             error="Request timed out"
         )
+    except CircuitOpenError as e:
+        record_ai_request(settings.ai_model, time.perf_counter() - request_started, "circuit_open")
+        return SingleFileResponse(
+            success=False,
+            file_path=str(filepath),
+            title=title,
+            content_length=len(body),
+            latency_ms=_elapsed_ms(started),
+            sections=sections,
+            error=str(e)
+        )
     except Exception as e:
         return SingleFileResponse(
             success=False,
             file_path=str(filepath),
             title=title,
             content_length=len(body),
+            latency_ms=_elapsed_ms(started),
+            sections=sections,
             error=str(e)
         )
 
 
+@router.post("/single-file", response_model=SingleFileResponse)
+async def generate_single_file_description(
+    request: SingleFileRequest,
+    http_client: AsyncHTTPClient = Depends(get_http_client),
+    summary_cache: SummaryCache = Depends(get_summary_cache)
+):
+    """
+    Generate an AI description for a single markdown file.
+
+    Useful for testing and debugging AI generation on specific files,
+    especially long notes that might need more tokens.
+
+    With `stream: true` the completion is returned as server-sent events
+    (see _stream_completion) instead of a SingleFileResponse. For long
+    notes the section summaries are generated first and only the final
+    description is streamed.
+    """
+    if not settings.gradient_api_key:
+        raise HTTPException(
+            status_code=500,
+            detail="GRADIENT_API_KEY not configured"
+        )
+
+    # Read the file
+    filepath = Path(request.file_path)
+    if not filepath.exists():
+        raise HTTPException(
+            status_code=404,
+            detail=f"File not found: {request.file_path}"
+        )
+
+    if not filepath.suffix.lower() == '.md':
+        raise HTTPException(
+            status_code=400,
+            detail="File must be a markdown file (.md)"
+        )
+
+    try:
+        title, body = _read_note(filepath)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Could not read file: {e}"
+        )
+
+    if not body.strip():
+        return SingleFileResponse(
+            success=False,
+            file_path=str(filepath),
+            title=title,
+            content_length=0,
+            error="File has no content after frontmatter"
+        )
+
+    if request.stream:
+        prompt = _build_prompt(title, body)
+        if is_long_note(body):
+            prompt, sections = await build_long_note_prompt(
+                http_client, title, body, request.max_tokens, request.temperature, summary_cache
+            )
+            if prompt is None:
+                return SingleFileResponse(
+                    success=False,
+                    file_path=str(filepath),
+                    title=title,
+                    content_length=len(body),
+                    sections=sections,
+                    error="No section of the note could be summarized"
+                )
+        return StreamingResponse(
+            _stream_completion(http_client, prompt, request.max_tokens, request.temperature),
+            media_type="text/event-stream"
+        )
+
+    return await _describe_note(http_client, filepath, title, body, request, summary_cache)
+
+
+async def _describe_file(
+    http_client: AsyncHTTPClient,
+    filepath: Path,
+    options: BatchFileRequest,
+    summary_cache: Optional[SummaryCache] = None
+) -> SingleFileResponse:
+    """Describe one file of a batch, reporting problems as a failed result."""
+    def failed(error: str, title: str = "", content_length: int = 0) -> SingleFileResponse:
+        return SingleFileResponse(
+            success=False,
+            file_path=str(filepath),
+            title=title,
+            content_length=content_length,
+            error=error
+        )
+
+    if not filepath.is_file():
+        return failed(f"File not found: {filepath}")
+    if filepath.suffix.lower() != '.md':
+        return failed("File must be a markdown file (.md)")
+
+    try:
+        title, body = _read_note(filepath)
+    except Exception as e:
+        return failed(f"Could not read file: {e}")
+
+    if not body.strip():
+        return failed("File has no content after frontmatter", title=title)
+
+    return await _describe_note(http_client, filepath, title, body, options, summary_cache)
+
+
+def _resolve_batch_paths(request: BatchFileRequest) -> List[Path]:
+    """Collect the files for a batch request from explicit paths and/or a vault glob."""
+    paths = [Path(file_path) for file_path in request.file_paths]
+
+    if request.vault_path:
+        vault_path = Path(request.vault_path).resolve()
+        if not vault_path.is_dir():
+            raise HTTPException(status_code=404, detail=f"Vault not found: {request.vault_path}")
+        if ".." in Path(request.glob).parts or Path(request.glob).is_absolute():
+            raise HTTPException(status_code=400, detail="glob must be relative to the vault")
+
+        from normalize_obsidian_vault import should_ignore
+        paths.extend(sorted(
+            path for path in vault_path.glob(request.glob)
+            if path.is_file() and not should_ignore(path.relative_to(vault_path))
+        ))
+
+    if not paths:
+        raise HTTPException(status_code=400, detail="No files selected. Provide file_paths or vault_path.")
+
+    return paths[:request.max_files]
+
+
+def _summarize_batch(results: List[SingleFileResponse], wall_time_ms: float) -> dict:
+    """Aggregate token usage and latency percentiles for a batch."""
+    latencies = sorted(r.latency_ms for r in results if r.latency_ms is not None)
+    tokens = {"prompt": 0, "completion": 0, "total": 0}
+    for result in results:
+        for key in tokens:
+            tokens[key] += (result.tokens_used or {}).get(key) or 0
+
+    return {
+        "files": len(results),
+        "succeeded": sum(1 for r in results if r.success),
+        "failed": sum(1 for r in results if not r.success),
+        "tokens_used": tokens,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else None,
+        },
+        "wall_time_ms": wall_time_ms,
+    }
+
+
+@router.post("/batch")
+async def generate_batch_descriptions(
+    request: BatchFileRequest,
+    http_client: AsyncHTTPClient = Depends(get_http_client),
+    summary_cache: SummaryCache = Depends(get_summary_cache)
+) -> StreamingResponse:
+    """
+    Generate AI descriptions for many files concurrently.
+
+    Files come from `file_paths` and/or a `glob` under `vault_path`, and run
+    with at most `concurrency` requests in flight. Results are streamed as
+    NDJSON in completion order (`{"type": "result", "index": ...}`), followed
+    by a final `{"type": "summary"}` line with token totals and latency
+    percentiles.
+    """
+    if not settings.gradient_api_key:
+        raise HTTPException(
+            status_code=500,
+            detail="GRADIENT_API_KEY not configured"
+        )
+
+    filepaths = _resolve_batch_paths(request)
+
+    async def stream():
+        semaphore = asyncio.Semaphore(request.concurrency)
+
+        async def run(index: int, filepath: Path):
+            async with semaphore:
+                return index, await _describe_file(http_client, filepath, request, summary_cache)
+
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(run(i, path)) for i, path in enumerate(filepaths)]
+        results = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                results.append(result)
+                yield json.dumps({"type": "result", "index": index, **result.model_dump()}) + "\n"
+        finally:
+            # Stop outstanding requests if the client disconnects
+            for task in tasks:
+                task.cancel()
+
+        summary = _summarize_batch(results, _elapsed_ms(started))
+        yield json.dumps({"type": "summary", **summary}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/direct-prompt", response_model=DirectPromptResponse)
-async def execute_direct_prompt(request: DirectPromptRequest):
+async def execute_direct_prompt(
+    request: DirectPromptRequest,
+    http_client: AsyncHTTPClient = Depends(get_http_client)
+):
     """
     Test the AI API with a direct prompt.
 
     Useful for debugging API connectivity and testing different prompts.
+    With `stream: true` the completion is returned as server-sent events.
     """
     if not settings.gradient_api_key:
         raise HTTPException(
@@ -228,16 +588,17 @@ async def execute_direct_prompt(request: DirectPromptRequest):
             detail="GRADIENT_API_KEY not configured"
         )
 
-    if requests is None:
-        raise HTTPException(
-            status_code=500,
-            detail="requests library not installed"
+    if request.stream:
+        return StreamingResponse(
+            _stream_completion(http_client, request.prompt, request.max_tokens, request.temperature),
+            media_type="text/event-stream"
         )
 
     base_url = settings.gradient_base_url.rstrip('/')
 
+    started = time.perf_counter()
     try:
-        response = requests.post(
+        response = await http_client.post(
             f"{base_url}/chat/completions",
             headers={
                 "Authorization": f"Bearer {settings.gradient_api_key}",
@@ -251,10 +612,12 @@ async def execute_direct_prompt(request: DirectPromptRequest):
                 "max_tokens": request.max_tokens,
                 "temperature": request.temperature
             },
-            timeout=120
+            timeout=120,
+            retry_read_timeouts=False
         )
 
         if response.status_code != 200:
+            record_ai_request(settings.ai_model, time.perf_counter() - started, str(response.status_code))
             return DirectPromptResponse(
                 success=False,
                 error=f"API returned status {response.status_code}: {response.text[:500]}"
@@ -263,6 +626,7 @@ async def execute_direct_prompt(request: DirectPromptRequest):
         result = response.json()
         message = result.get('choices', [{}])[0].get('message', {})
         usage = result.get('usage', {})
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "200", usage)
 
         return DirectPromptResponse(
             success=bool(message.get('content')),
@@ -276,11 +640,18 @@ async def execute_direct_prompt(request: DirectPromptRequest):
             }
         )
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "timeout")
         return DirectPromptResponse(
             success=False,
             error="Request timed out"
         )
+    except CircuitOpenError as e:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "circuit_open")
+        return DirectPromptResponse(
+            success=False,
+            error=str(e)
+        )
     except Exception as e:
         return DirectPromptResponse(
             success=False,
@@ -1,36 +1,60 @@
 """Health check endpoints."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
-from ..config import settings
-from ..models import HealthResponse
+from ..models import HealthResponse, ReadinessResponse
 
 router = APIRouter()
 
 
+def get_health_prober(request: Request):
+    """Get the background health prober from app state."""
+    return request.app.state.health_prober
+
+
 @router.get("", response_model=HealthResponse)
 @router.get("/", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
+async def health_check(request: Request) -> HealthResponse:
     """
     Check service health.
 
-    Returns basic health status and optionally checks database connectivity.
+    Returns basic health status and the cached database connectivity
+    from the background prober.
     """
-    db_connected = False
-
-    # Try to connect to database if URL is configured
-    if settings.database_url:
-        try:
-            import psycopg2
-            conn = psycopg2.connect(settings.database_url)
-            conn.close()
-            db_connected = True
-        except Exception:
-            db_connected = False
+    prober = get_health_prober(request)
 
     return HealthResponse(
         status="healthy",
         service="script_runner",
         version="1.0.0",
-        database_connected=db_connected
+        database_connected=prober.is_ok("database")
+    )
+
+
+@router.get("/live")
+async def liveness() -> dict:
+    """Liveness probe. Succeeds whenever the event loop is serving requests."""
+    return {"status": "alive"}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness(request: Request):
+    """
+    Readiness probe.
+
+    Returns the cached results of the background checks (database, AI
+    endpoint, job store) with their age. Responds 503 until all required
+    checks pass.
+    """
+    prober = get_health_prober(request)
+    ready = prober.ready
+    age = prober.age_seconds
+
+    response = ReadinessResponse(
+        status="ready" if ready else ("starting" if age is None else "not_ready"),
+        ready=ready,
+        age_seconds=age,
+        checks=prober.results
     )
+    return JSONResponse(response.model_dump(mode="json"), status_code=200 if ready else 503)
@@ -1,10 +1,22 @@
 """Job execution endpoints."""
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
 
 from ..middleware.auth import verify_api_key
-from ..models import JobListResponse, JobRequest, JobResponse, JobStatus
+from ..models import (
+    JobListResponse,
+    JobLogsResponse,
+    JobRequest,
+    JobResponse,
+    JobStatus,
+    JobSummary,
+    JobView,
+)
 from ..services.script_runner import run_script
+from ..services.summaries import get_summary_cache, get_token_stats
 
 router = APIRouter()
 
@@ -14,12 +26,54 @@ def get_job_manager(request: Request):
     return request.app.state.job_manager
 
 
+def _resolve_fields(view: JobView, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Resolve the `view`/`fields` query parameters to a field projection.
+
+    An explicit `fields` list wins over `view`. Returns None for all fields.
+    """
+    if fields:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in JobResponse.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown job field(s): {', '.join(unknown)}. "
+                       f"Valid fields: {', '.join(JobResponse.model_fields)}"
+            )
+        if "job_id" not in selected:
+            selected.insert(0, "job_id")
+        return tuple(selected)
+
+    if view == JobView.SUMMARY:
+        return tuple(JobSummary.model_fields)
+
+    return None
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return any(opaque(candidate) == opaque(etag) for candidate in header.split(","))
+
+
 @router.post("", response_model=JobResponse, dependencies=[Depends(verify_api_key)])
 @router.post("/", response_model=JobResponse, dependencies=[Depends(verify_api_key)])
 async def create_job(
     job_request: JobRequest,
     background_tasks: BackgroundTasks,
-    job_manager=Depends(get_job_manager)
+    job_manager=Depends(get_job_manager),
+    summary_cache=Depends(get_summary_cache),
+    token_stats=Depends(get_token_stats)
 ) -> JobResponse:
     """
     Start a new script execution job.
@@ -39,7 +93,7 @@ async def create_job(
     job_id = await job_manager.create_job(job_request.script_type)
 
     # Schedule background execution
-    background_tasks.add_task(run_script, job_manager, job_id, job_request)
+    background_tasks.add_task(run_script, job_manager, job_id, job_request, summary_cache, token_stats)
 
     # Return the job (will be in PENDING status)
     job = await job_manager.get_job(job_id)
@@ -49,28 +103,104 @@ async def create_job(
 @router.get("", response_model=JobListResponse)
 @router.get("/", response_model=JobListResponse)
 async def list_jobs(
+    request: Request,
     limit: int = 50,
+    view: JobView = JobView.FULL,
+    fields: Optional[str] = None,
     job_manager=Depends(get_job_manager)
-) -> JobListResponse:
+) -> Response:
     """
     List all jobs.
 
     Jobs are sorted by start time (most recent first).
+
+    Use `view=summary` to omit logs and results, or `fields=a,b,c` to pick
+    specific fields. Responses carry an ETag; send it back in If-None-Match
+    to get a 304 when no listed job has changed.
     """
+    selected = _resolve_fields(view, fields)
     jobs = await job_manager.get_all_jobs(limit)
-    return JobListResponse(jobs=jobs, total=len(jobs))
+
+    etag = job_manager.get_etag([job.job_id for job in jobs], selected)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    payload = {
+        "jobs": [job_manager.project_job(job, selected) for job in jobs],
+        "total": len(jobs)
+    }
+    return JSONResponse(payload, headers={"ETag": etag})
 
 
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: str,
+    request: Request,
+    view: JobView = JobView.FULL,
+    fields: Optional[str] = None,
     job_manager=Depends(get_job_manager)
-) -> JobResponse:
-    """Get status and details of a specific job."""
+) -> Response:
+    """
+    Get status and details of a specific job.
+
+    Supports the same `view`/`fields` projection and ETag handling as the
+    job list.
+    """
+    selected = _resolve_fields(view, fields)
     job = await job_manager.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+
+    etag = job_manager.get_etag([job_id], selected)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return JSONResponse(job_manager.project_job(job, selected), headers={"ETag": etag})
+
+
+@router.get("/{job_id}/logs", response_model=JobLogsResponse)
+async def get_job_logs(
+    job_id: str,
+    offset: int = Query(default=0, ge=0, description="Index of the first line to return"),
+    limit: int = Query(default=200, ge=1, le=5000, description="Maximum number of lines"),
+    tail: Optional[int] = Query(default=None, ge=1, le=5000, description="Return the last N lines instead"),
+    job_manager=Depends(get_job_manager)
+) -> JobLogsResponse:
+    """
+    Page through a job's complete log.
+
+    Lines are read from the on-disk log by range, so this works for long
+    verbose runs without loading the whole log into memory.
+    """
+    page = await job_manager.read_logs(job_id, offset=offset, limit=limit, tail=tail)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    lines, start, total = page
+    return JobLogsResponse(job_id=job_id, offset=start, total=total, lines=lines)
+
+
+@router.get("/{job_id}/trace")
+async def get_job_trace(
+    job_id: str,
+    format: str = Query(default="chrome", pattern="^(chrome|otlp)$", description="chrome or otlp"),
+    job_manager=Depends(get_job_manager)
+) -> FileResponse:
+    """
+    Download the trace file of a job that was run with `trace: true`.
+
+    The Chrome format opens in chrome://tracing, Perfetto or speedscope.
+    """
+    job = await job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    suffix = ".trace.json" if format == "chrome" else ".otlp.json"
+    trace_path = job_manager.traces_dir / f"{job_id}{suffix}"
+    if not trace_path.exists():
+        raise HTTPException(status_code=404, detail="No trace recorded for this job")
+
+    return FileResponse(trace_path, media_type="application/json", filename=trace_path.name)
 
 
 @router.post("/{job_id}/cancel", response_model=JobResponse, dependencies=[Depends(verify_api_key)])
@@ -81,8 +211,8 @@ async def cancel_job(
     """
     Cancel a running job.
 
-    Only running jobs can be cancelled. The cancellation is cooperative -
-    the script checks for cancellation at regular intervals.
+    Only running jobs can be cancelled. The job's in-flight AI request or
+    database statement is aborted, so the job stops within a second.
     """
     job = await job_manager.get_job(job_id)
     if not job:
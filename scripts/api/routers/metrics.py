@@ -0,0 +1,22 @@
+"""Metrics endpoint in Prometheus text exposition format."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.metrics import REGISTRY
+
+router = APIRouter()
+
+# Content type expected by Prometheus scrapers
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("", response_class=PlainTextResponse)
+@router.get("/", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Expose job, AI and database metrics for scraping.
+
+    Counters and histograms are kept in-process and reset on restart.
+    """
+    return PlainTextResponse(REGISTRY.expose(), media_type=PROMETHEUS_CONTENT_TYPE)
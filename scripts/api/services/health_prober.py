@@ -0,0 +1,141 @@
+"""Background health prober whose cached results back the /health endpoints."""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from ..config import settings
+from ..models import HealthCheckResult
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+
+def check_database(database_url: str, timeout: float) -> None:
+    """Open and close a database connection. Raises on failure."""
+    import psycopg2
+    conn = psycopg2.connect(database_url, connect_timeout=max(1, int(timeout)))
+    conn.close()
+
+
+def check_ai_endpoint(base_url: str, api_key: Optional[str], timeout: float) -> None:
+    """Check that the AI provider answers. Raises on failure."""
+    if requests is None:
+        raise RuntimeError("requests library not installed")
+    response = requests.get(
+        f"{base_url.rstrip('/')}/models",
+        headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+        timeout=timeout
+    )
+    # Any non-5xx answer means the endpoint is reachable
+    if response.status_code >= 500:
+        raise RuntimeError(f"AI endpoint returned status {response.status_code}")
+
+
+def check_job_store(logs_dir: Path) -> None:
+    """Write and remove a probe file in the job store. Raises on failure."""
+    probe_file = Path(logs_dir) / f".health-{uuid.uuid4().hex}"
+    probe_file.write_text("ok", encoding="utf-8")
+    probe_file.unlink()
+
+
+class HealthProber:
+    """
+    Runs health checks on an interval in the thread pool and caches the results.
+
+    Readers only ever see the cached snapshot, so health endpoints never
+    block on the database or network.
+    """
+
+    def __init__(self, logs_dir: Path, interval: Optional[float] = None, timeout: Optional[float] = None):
+        self._interval = interval if interval is not None else settings.health_check_interval
+        self._timeout = timeout if timeout is not None else settings.health_check_timeout
+        self._checks: Dict[str, Callable[[], None]] = {
+            "job_store": lambda: check_job_store(logs_dir),
+        }
+        # Required checks gate readiness; optional ones are informational
+        self._required = {"job_store"}
+        if settings.database_url:
+            self._checks["database"] = lambda: check_database(settings.database_url, self._timeout)
+            self._required.add("database")
+        if settings.gradient_api_key:
+            self._checks["ai_endpoint"] = lambda: check_ai_endpoint(
+                settings.gradient_base_url, settings.gradient_api_key, self._timeout
+            )
+
+        self._results: Dict[str, HealthCheckResult] = {}
+        self._last_probe: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start probing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background probe loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(self._interval)
+
+    async def _probe_one(self, name: str, check: Callable[[], None]) -> HealthCheckResult:
+        loop = asyncio.get_event_loop()
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(loop.run_in_executor(None, check), timeout=self._timeout + 1)
+        except asyncio.TimeoutError:
+            error = "Timed out"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        return HealthCheckResult(
+            ok=error is None,
+            required=name in self._required,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            error=error,
+            checked_at=datetime.utcnow()
+        )
+
+    async def probe(self) -> None:
+        """Run all checks concurrently and replace the cached results."""
+        names = list(self._checks)
+        results = await asyncio.gather(*(self._probe_one(name, self._checks[name]) for name in names))
+        self._results = dict(zip(names, results))
+        self._last_probe = time.monotonic()
+
+    @property
+    def results(self) -> Dict[str, HealthCheckResult]:
+        return self._results
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the last completed probe, or None before the first one."""
+        if self._last_probe is None:
+            return None
+        return round(time.monotonic() - self._last_probe, 3)
+
+    @property
+    def ready(self) -> bool:
+        """Whether all required checks passed in the last probe."""
+        if self._last_probe is None:
+            return False
+        return all(result.ok for result in self._results.values() if result.required)
+
+    def is_ok(self, name: str) -> bool:
+        """Whether a named check passed in the last probe."""
+        result = self._results.get(name)
+        return bool(result and result.ok)
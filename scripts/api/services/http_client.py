@@ -0,0 +1,231 @@
+"""
+Shared async HTTP client with keep-alive pooling and per-host limits.
+
+One instance is created in the application lifespan and stored on
+app.state.http_client. Routers get it via get_http_client(); other
+modules can create their own instance and must call aclose() when done.
+
+Retries, the circuit breaker and backoff follow the same rules as the
+scripts' sync client (resilient_http.py), and every attempt is recorded
+in the outbound HTTP metrics.
+"""
+
+import asyncio
+import sys
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import Request
+
+from ..config import settings
+from .metrics import record_http_call
+
+# Add the scripts directory to the path for the shared resilience helpers
+scripts_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(scripts_dir))
+
+from resilient_http import (
+    RETRY_STATUSES,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+    retry_after_seconds,
+)
+
+
+def _sent(error: httpx.TransportError) -> bool:
+    """Whether the request may have reached the server before `error`."""
+    return isinstance(error, (httpx.ReadTimeout, httpx.WriteTimeout))
+
+
+class AsyncHTTPClient:
+    """
+    Pooled httpx.AsyncClient that caps concurrent requests per host.
+
+    httpx limits connections per client; the per-host semaphores stop one
+    slow upstream from taking every pooled connection. Timeouts, connection
+    errors, 429 and 5xx responses are retried with jittered backoff (or the
+    server's Retry-After) while the wait stays under `max_retry_wait`, and
+    a per-host circuit breaker fails calls fast with CircuitOpenError after
+    repeated failures. Callers of long, non-idempotent requests can pass
+    retry_read_timeouts=False so an answer that is slow to arrive is not
+    waited for again on every retry.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_per_host: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        max_retry_wait: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        max_connections = max_connections or settings.http_max_connections
+        self._max_per_host = max_per_host or settings.http_max_per_host
+        timeout = timeout if timeout is not None else settings.http_timeout
+        connect_timeout = connect_timeout if connect_timeout is not None else settings.http_connect_timeout
+        self._max_retries = max_retries if max_retries is not None else settings.http_max_retries
+        self._max_retry_wait = max_retry_wait if max_retry_wait is not None else settings.http_max_retry_wait
+        self._failure_threshold = failure_threshold or settings.http_breaker_threshold
+        self._reset_timeout = reset_timeout if reset_timeout is not None else settings.http_breaker_reset
+
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=transport
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        """Hold one of the per-host request slots for `host`."""
+        semaphore = self._host_slots.get(host)
+        if semaphore is None:
+            semaphore = self._host_slots[host] = asyncio.Semaphore(self._max_per_host)
+        async with semaphore:
+            yield
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """The circuit breaker for `host`."""
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self._failure_threshold, self._reset_timeout)
+        return breaker
+
+    def _check_circuit(self, host: str, breaker: CircuitBreaker) -> None:
+        if not breaker.allow_request():
+            record_http_call(host, "circuit_open", 0.0)
+            raise CircuitOpenError(
+                f"Circuit open for {host} after repeated failures; retry in {breaker.retry_in():.0f}s"
+            )
+
+    def _record_response(self, host: str, breaker: CircuitBreaker, response: httpx.Response, started: float) -> None:
+        record_http_call(host, str(response.status_code), time.perf_counter() - started)
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _record_transport_error(self, host: str, breaker: CircuitBreaker, error: Exception, started: float) -> None:
+        status = "timeout" if isinstance(error, httpx.TimeoutException) else "error"
+        record_http_call(host, status, time.perf_counter() - started)
+        breaker.record_failure()
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the attempt should not be retried."""
+        if attempt >= self._max_retries:
+            return None
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return None
+        delay = retry_after_seconds(response.headers) if response is not None else None
+        if delay is None:
+            delay = backoff_delay(attempt)
+        # Don't keep the caller waiting on a long Retry-After
+        return delay if delay <= self._max_retry_wait else None
+
+    async def request(self, method: str, url: str, retry_read_timeouts: bool = True, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request. Accepts the same keyword arguments as httpx.
+
+        With retry_read_timeouts=False, a request that was sent but timed
+        out before the answer arrived is not retried.
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        attempt = 0
+        while True:
+            self._check_circuit(host, breaker)
+            started = time.perf_counter()
+            try:
+                async with self._host_slot(host):
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as error:
+                self._record_transport_error(host, breaker, error, started)
+                delay = self._retry_delay(attempt) if retry_read_timeouts or not _sent(error) else None
+                if delay is None:
+                    raise
+            except BaseException:
+                # Cancelled or a non-transport error: free a half-open trial slot
+                breaker.release()
+                raise
+            else:
+                self._record_response(host, breaker, response, started)
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        retry_read_timeouts: bool = True,
+        **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Send a request and stream the response body.
+
+        Attempts are retried until response headers arrive; once the body
+        is being streamed, errors go to the caller. The host slot and
+        connection are held until the block exits; leaving early closes
+        the upstream connection. retry_read_timeouts is as for request().
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        attempt = 0
+        while True:
+            self._check_circuit(host, breaker)
+            stack = AsyncExitStack()
+            started = time.perf_counter()
+            try:
+                await stack.enter_async_context(self._host_slot(host))
+                response = await stack.enter_async_context(self._client.stream(method, url, **kwargs))
+            except httpx.TransportError as error:
+                await stack.aclose()
+                self._record_transport_error(host, breaker, error, started)
+                delay = self._retry_delay(attempt) if retry_read_timeouts or not _sent(error) else None
+                if delay is None:
+                    raise
+            except BaseException:
+                await stack.aclose()
+                breaker.release()
+                raise
+            else:
+                self._record_response(host, breaker, response, started)
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    async with stack:
+                        yield response
+                    return
+                await stack.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self._client.aclose()
+
+
+def get_http_client(request: Request) -> AsyncHTTPClient:
+    """Get the shared HTTP client from app state."""
+    return request.app.state.http_client
@@ -0,0 +1,124 @@
+"""Append-only, disk-backed job log storage with random access by line."""
+
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Each index entry is the byte offset (unsigned 64-bit little-endian) of a line
+_OFFSET = struct.Struct("<Q")
+
+
+class JobLogStore:
+    """
+    Stores the complete log of every job on disk.
+
+    Each job gets a `<prefix>.log` file holding the log lines and a
+    `<prefix>.idx` file holding the byte offset of every line, so any
+    range of lines can be read with two seeks regardless of log size.
+    """
+
+    def __init__(self, logs_dir: Path):
+        self._logs_dir = Path(logs_dir)
+        # Open (log, index) handles and the next write offset for active jobs
+        self._handles: Dict[str, Tuple[BinaryIO, BinaryIO]] = {}
+        self._write_offsets: Dict[str, int] = {}
+        self._paths: Dict[str, Path] = {}
+
+    def _find_path(self, job_id: str) -> Optional[Path]:
+        """Find the base path (without suffix) of an existing job log."""
+        if job_id in self._paths:
+            return self._paths[job_id]
+        matches = sorted(self._logs_dir.glob(f"*_{job_id}.log"))
+        if matches:
+            self._paths[job_id] = matches[-1].with_suffix("")
+            return self._paths[job_id]
+        return None
+
+    def open(self, job_id: str, base_path: Path) -> None:
+        """Start (or resume) appending to a job's log at `base_path`.log/.idx."""
+        if job_id in self._handles:
+            return
+        base_path = self._find_path(job_id) or base_path
+        self._paths[job_id] = base_path
+        log_file = open(base_path.with_suffix(".log"), "ab")
+        index_file = open(base_path.with_suffix(".idx"), "ab")
+        self._handles[job_id] = (log_file, index_file)
+        self._write_offsets[job_id] = log_file.tell()
+
+    def append(self, job_id: str, message: str) -> None:
+        """Append a line to an open job log."""
+        handles = self._handles.get(job_id)
+        if handles is None:
+            return
+        log_file, index_file = handles
+        data = message.encode("utf-8") + b"\n"
+        index_file.write(_OFFSET.pack(self._write_offsets[job_id]))
+        log_file.write(data)
+        self._write_offsets[job_id] += len(data)
+
+    def close(self, job_id: str) -> None:
+        """Flush and close a job's log files."""
+        handles = self._handles.pop(job_id, None)
+        self._write_offsets.pop(job_id, None)
+        if handles:
+            for handle in handles:
+                handle.close()
+
+    def close_all(self) -> None:
+        """Close every open job log."""
+        for job_id in list(self._handles):
+            self.close(job_id)
+
+    def count(self, job_id: str) -> int:
+        """Get the number of lines in a job's log."""
+        handles = self._handles.get(job_id)
+        if handles:
+            handles[1].flush()
+        base_path = self._find_path(job_id)
+        if base_path is None:
+            return 0
+        index_path = base_path.with_suffix(".idx")
+        if not index_path.exists():
+            return 0
+        return index_path.stat().st_size // _OFFSET.size
+
+    def read(self, job_id: str, offset: int, limit: int) -> Tuple[List[str], int]:
+        """
+        Read up to `limit` lines starting at line `offset`.
+
+        Only the requested byte range is read from disk.
+
+        Returns:
+            (lines, total_line_count)
+        """
+        handles = self._handles.get(job_id)
+        if handles:
+            for handle in handles:
+                handle.flush()
+
+        total = self.count(job_id)
+        start = max(offset, 0)
+        end = min(start + max(limit, 0), total)
+        if start >= end:
+            return [], total
+
+        base_path = self._find_path(job_id)
+        with open(base_path.with_suffix(".idx"), "rb") as index_file:
+            index_file.seek(start * _OFFSET.size)
+            # Read one extra offset (the start of the line after the range) if present
+            raw = index_file.read((end - start + 1) * _OFFSET.size)
+        offsets = [value for (value,) in _OFFSET.iter_unpack(raw)]
+
+        with open(base_path.with_suffix(".log"), "rb") as log_file:
+            log_file.seek(offsets[0])
+            if len(offsets) > end - start:
+                data = log_file.read(offsets[-1] - offsets[0])
+                offsets = offsets[:-1]
+            else:
+                data = log_file.read()
+
+        lines = []
+        bounds = [value - offsets[0] for value in offsets] + [len(data)]
+        for line_start, line_end in zip(bounds, bounds[1:]):
+            lines.append(data[line_start:line_end].decode("utf-8", errors="replace").rstrip("\n"))
+        return lines, total
@@ -1,13 +1,26 @@
 """Job management service for tracking script execution."""
 
 import asyncio
+import hashlib
 import json
+import math
+import sys
+import time
 import uuid
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..models import JobProgress, JobResponse, JobStatus, ScriptType
+from .job_logs import JobLogStore
+from .metrics import ITEMS_PROCESSED, JOB_DURATION, JOB_ITEMS_PER_SECOND, JOB_QUEUE_WAIT, JOBS_TOTAL
+
+# Add the scripts directory to the path for the shared cancellation token
+scripts_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(scripts_dir))
+
+from cancellation import CancellationToken
 
 
 def _serialize_datetime(obj):
@@ -17,6 +30,58 @@ def _serialize_datetime(obj):
     raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
+# Time constant (seconds) for the EWMA rate estimates. Older samples decay
+# by 1/e every RATE_TIME_CONSTANT seconds regardless of the update frequency.
+RATE_TIME_CONSTANT = 10.0
+
+# Number of most recent log lines kept in memory (and in JobResponse.logs).
+# The complete log is stored on disk by JobLogStore.
+MAX_LOG_TAIL = 100
+
+
+class _RateTracker:
+    """
+    Tracks an exponentially weighted moving average of a counter's rate.
+
+    `rate` is the average as of the counter's last change. While the
+    counter stands still, update() returns it decayed towards 0 by the
+    time since that change, as if the stall were a stretch of zero rate.
+    """
+
+    __slots__ = ("_last_time", "_last_value", "rate")
+
+    def __init__(self):
+        self._last_time: Optional[float] = None
+        self._last_value = 0
+        self.rate: Optional[float] = None
+
+    def update(self, value: int, now: float) -> Optional[float]:
+        """Record the counter's current value and return the smoothed rate."""
+        if self._last_time is None:
+            self._last_time = now
+            self._last_value = value
+            return self.rate
+
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return self.rate
+        if value == self._last_value:
+            if self.rate is None:
+                return None
+            return self.rate * math.exp(-elapsed / RATE_TIME_CONSTANT)
+
+        instant = (value - self._last_value) / elapsed
+        if self.rate is None:
+            self.rate = instant
+        else:
+            alpha = 1.0 - math.exp(-elapsed / RATE_TIME_CONSTANT)
+            self.rate += alpha * (instant - self.rate)
+
+        self._last_time = now
+        self._last_value = value
+        return self.rate
+
+
 def _deserialize_job(data: dict) -> JobResponse:
     """Deserialize a job from JSON data."""
     # Convert string dates back to datetime
@@ -41,7 +106,12 @@ def _deserialize_job(data: dict) -> JobResponse:
         processed=progress_data.get('processed', 0),
         succeeded=progress_data.get('succeeded', 0),
         failed=progress_data.get('failed', 0),
-        current_item=progress_data.get('current_item')
+        current_item=progress_data.get('current_item'),
+        ai_calls=progress_data.get('ai_calls', 0),
+        elapsed_seconds=progress_data.get('elapsed_seconds'),
+        items_per_second=progress_data.get('items_per_second'),
+        ai_calls_per_second=progress_data.get('ai_calls_per_second'),
+        eta_seconds=progress_data.get('eta_seconds')
     )
 
     return JobResponse(
@@ -52,6 +122,7 @@ def _deserialize_job(data: dict) -> JobResponse:
         started_at=started_at,
         completed_at=completed_at,
         logs=data.get('logs', []),
+        log_count=data.get('log_count', len(data.get('logs', []))),
         result=data.get('result'),
         error_message=data.get('error_message')
     )
@@ -70,6 +141,18 @@ class JobManager:
         self._lock = asyncio.Lock()
         self._max_jobs_history = max_jobs_history
         self._cancellation_flags: Dict[str, bool] = {}
+        # Tokens of running jobs; cancelled by cancel_job() or the job's deadline
+        self._cancel_tokens: Dict[str, CancellationToken] = {}
+        self._created_at: Dict[str, float] = {}
+        # Per-job (items, AI calls) rate trackers for running jobs
+        self._rate_trackers: Dict[str, Tuple[_RateTracker, _RateTracker]] = {}
+
+        # Per-job version counters, bumped on every state change. Combined with
+        # a per-process instance id they make ETags unique across restarts.
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        # Cached JSON projections: (job_id, fields) -> (version, payload)
+        self._projections: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[int, Dict[str, Any]]] = {}
 
         # Set up logs directory
         if logs_dir:
@@ -79,10 +162,28 @@ class JobManager:
             self._logs_dir = Path(__file__).parent.parent.parent / "logs"
 
         self._logs_dir.mkdir(parents=True, exist_ok=True)
+        self._log_store = JobLogStore(self._logs_dir)
+        # Fixed-size in-memory log tails for jobs that are still logging
+        self._log_tails: Dict[str, deque] = {}
 
         # Load existing jobs from log files
         self._load_jobs_from_files()
 
+    @property
+    def logs_dir(self) -> Path:
+        """Directory holding job files and logs."""
+        return self._logs_dir
+
+    @property
+    def traces_dir(self) -> Path:
+        """Directory holding exported job traces."""
+        return self._logs_dir / "traces"
+
+    @property
+    def neighbors_dir(self) -> Path:
+        """Directory holding the neighbour CSVs written by related_notes jobs."""
+        return self._logs_dir / "neighbors"
+
     def _get_job_file_path(self, job_id: str, started_at: Optional[datetime] = None) -> Path:
         """Get the file path for a job's log file."""
         # Use date prefix for better organization
@@ -105,11 +206,17 @@ class JobManager:
                     'processed': job.progress.processed,
                     'succeeded': job.progress.succeeded,
                     'failed': job.progress.failed,
-                    'current_item': job.progress.current_item
+                    'current_item': job.progress.current_item,
+                    'ai_calls': job.progress.ai_calls,
+                    'elapsed_seconds': job.progress.elapsed_seconds,
+                    'items_per_second': job.progress.items_per_second,
+                    'ai_calls_per_second': job.progress.ai_calls_per_second,
+                    'eta_seconds': job.progress.eta_seconds
                 },
                 'started_at': job.started_at,
                 'completed_at': job.completed_at,
                 'logs': job.logs,
+                'log_count': job.log_count,
                 'result': job.result,
                 'error_message': job.error_message
             }
@@ -139,6 +246,44 @@ class JobManager:
         except Exception as e:
             print(f"Warning: Failed to load jobs from files: {e}")
 
+    def _touch(self, job_id: str) -> None:
+        """Bump a job's version after a state change."""
+        self._versions[job_id] = self._versions.get(job_id, 0) + 1
+
+    def get_version(self, job_id: str) -> int:
+        """Get a job's current version counter."""
+        return self._versions.get(job_id, 0)
+
+    def get_etag(self, job_ids: List[str], fields: Optional[Tuple[str, ...]] = None) -> str:
+        """
+        Build a weak ETag for a set of jobs and an optional field projection.
+
+        The tag changes whenever any of the jobs changes state, or the set
+        (or order) of jobs changes.
+        """
+        parts = [self._instance_id, ",".join(fields) if fields else "*"]
+        parts.extend(f"{job_id}:{self.get_version(job_id)}" for job_id in job_ids)
+        digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+        return f'W/"{digest}"'
+
+    def project_job(self, job: JobResponse, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """
+        Get a JSON-ready dict of a job, limited to `fields` if given.
+
+        The result is cached per job version, so unchanged jobs are not
+        re-serialized on every poll.
+        """
+        key = (job.job_id, fields)
+        version = self.get_version(job.job_id)
+        cached = self._projections.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        include = set(fields) if fields else None
+        payload = job.model_dump(mode="json", include=include)
+        self._projections[key] = (version, payload)
+        return payload
+
     async def create_job(self, script_type: ScriptType, **kwargs) -> str:
         """
         Create a new job and return its ID.
@@ -166,6 +311,8 @@ class JobManager:
                 logs=[]
             )
             self._cancellation_flags[job_id] = False
+            self._created_at[job_id] = time.monotonic()
+            self._touch(job_id)
             self._save_job_to_file(self._jobs[job_id])
 
         return job_id
@@ -199,14 +346,31 @@ class JobManager:
             running = [job for job in running if job.script_type == script_type]
         return running
 
-    async def start_job(self, job_id: str) -> None:
-        """Mark a job as started."""
+    async def start_job(self, job_id: str, timeout_seconds: Optional[float] = None) -> None:
+        """
+        Mark a job as started.
+
+        Args:
+            job_id: Job ID
+            timeout_seconds: Deadline after which the job's cancellation
+                token cancels itself
+        """
         async with self._lock:
             if job_id in self._jobs:
                 self._jobs[job_id].status = JobStatus.RUNNING
                 self._jobs[job_id].started_at = datetime.utcnow()
+                self._cancel_tokens[job_id] = CancellationToken(timeout_seconds)
+                self._rate_trackers[job_id] = (_RateTracker(), _RateTracker())
+                self._touch(job_id)
                 self._save_job_to_file(self._jobs[job_id])
 
+                created_at = self._created_at.pop(job_id, None)
+                if created_at is not None:
+                    JOB_QUEUE_WAIT.observe(
+                        time.monotonic() - created_at,
+                        script_type=self._jobs[job_id].script_type.value
+                    )
+
     async def update_progress(
         self,
         job_id: str,
@@ -214,12 +378,19 @@ class JobManager:
         processed: Optional[int] = None,
         succeeded: Optional[int] = None,
         failed: Optional[int] = None,
-        current_item: Optional[str] = None
+        current_item: Optional[str] = None,
+        ai_calls: Optional[int] = None
     ) -> None:
-        """Update job progress."""
+        """
+        Update job progress.
+
+        Also refreshes elapsed time, the smoothed items/sec and AI calls/sec
+        rates, and the ETA derived from them.
+        """
         async with self._lock:
             if job_id in self._jobs:
-                progress = self._jobs[job_id].progress
+                job = self._jobs[job_id]
+                progress = job.progress
                 if total is not None:
                     progress.total = total
                 if processed is not None:
@@ -230,23 +401,90 @@ class JobManager:
                     progress.failed = failed
                 if current_item is not None:
                     progress.current_item = current_item
+                if ai_calls is not None:
+                    progress.ai_calls = ai_calls
+
+                self._update_rates(job)
+                self._touch(job_id)
 
                 # Save to file periodically (every 10 items) to reduce I/O
                 if processed is not None and (processed % 10 == 0 or processed == progress.total):
                     self._save_job_to_file(self._jobs[job_id])
 
     async def add_log(self, job_id: str, message: str) -> None:
-        """Add a log message to a job."""
+        """
+        Add a log message to a job.
+
+        The line is appended to the job's on-disk log; only the last
+        MAX_LOG_TAIL lines are kept in memory.
+        """
         async with self._lock:
             if job_id in self._jobs:
-                # Keep only last 100 log entries in memory
-                if len(self._jobs[job_id].logs) >= 100:
-                    self._jobs[job_id].logs = self._jobs[job_id].logs[-99:]
-                self._jobs[job_id].logs.append(message)
+                job = self._jobs[job_id]
+
+                tail = self._log_tails.get(job_id)
+                if tail is None:
+                    tail = self._log_tails[job_id] = deque(job.logs, maxlen=MAX_LOG_TAIL)
+                tail.append(message)
+                job.logs = list(tail)
+                job.log_count += 1
+
+                try:
+                    self._log_store.open(job_id, self._get_job_file_path(job_id, job.started_at).with_suffix(""))
+                    self._log_store.append(job_id, message)
+                except OSError as e:
+                    print(f"Warning: Failed to write log for job {job_id}: {e}")
+
+                if job.completed_at:
+                    # Late lines after completion: don't keep handles or tails around
+                    self._log_store.close(job_id)
+                    self._log_tails.pop(job_id, None)
+
+                self._touch(job_id)
 
                 # Save to file periodically (every 5 logs)
-                if len(self._jobs[job_id].logs) % 5 == 0:
-                    self._save_job_to_file(self._jobs[job_id])
+                if job.log_count % 5 == 0:
+                    self._save_job_to_file(job)
+
+    async def read_logs(
+        self,
+        job_id: str,
+        offset: int = 0,
+        limit: int = 200,
+        tail: Optional[int] = None
+    ) -> Optional[Tuple[List[str], int, int]]:
+        """
+        Read a range of a job's complete log from disk.
+
+        Args:
+            job_id: Job ID
+            offset: Index of the first line to return
+            limit: Maximum number of lines to return
+            tail: If set, return the last `tail` lines instead (overrides offset/limit)
+
+        Returns:
+            (lines, offset, total) or None if the job is unknown
+        """
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            total = self._log_store.count(job_id)
+            if total == 0 and job.logs:
+                # Jobs recorded before on-disk logs existed only have their tail
+                lines = job.logs
+                total = len(lines)
+                if tail is not None:
+                    offset = max(total - tail, 0)
+                    limit = tail
+                return lines[offset:offset + limit], offset, total
+
+            if tail is not None:
+                offset = max(total - tail, 0)
+                limit = tail
+            lines, total = self._log_store.read(job_id, offset, limit)
+            return lines, offset, total
 
     async def complete_job(
         self,
@@ -264,25 +502,82 @@ class JobManager:
         """
         async with self._lock:
             if job_id in self._jobs:
-                self._jobs[job_id].completed_at = datetime.utcnow()
+                job = self._jobs[job_id]
+                job.completed_at = datetime.utcnow()
+                if job.started_at:
+                    job.progress.elapsed_seconds = round(
+                        (job.completed_at - job.started_at).total_seconds(), 3
+                    )
+                job.progress.eta_seconds = None
 
                 if error:
-                    self._jobs[job_id].status = JobStatus.FAILED
-                    self._jobs[job_id].error_message = error
+                    # A job stopped by cancel_job() stays cancelled
+                    job.status = JobStatus.CANCELLED if self._cancellation_flags.get(job_id) else JobStatus.FAILED
+                    job.error_message = error
                 else:
-                    self._jobs[job_id].status = JobStatus.COMPLETED
-                    self._jobs[job_id].result = result
+                    job.status = JobStatus.COMPLETED
+                    job.result = result
+
+                self._record_job_metrics(job)
+                self._touch(job_id)
 
-                # Clear cancellation flag
+                # Clear cancellation state, rate state and log handles
                 self._cancellation_flags.pop(job_id, None)
+                token = self._cancel_tokens.pop(job_id, None)
+                if token is not None:
+                    token.close()
+                self._rate_trackers.pop(job_id, None)
+                self._log_tails.pop(job_id, None)
+                self._log_store.close(job_id)
 
                 # Save final state to file
-                self._save_job_to_file(self._jobs[job_id])
+                self._save_job_to_file(job)
+
+    def _update_rates(self, job: JobResponse) -> None:
+        """Refresh elapsed time, EWMA rates and ETA for a running job."""
+        trackers = self._rate_trackers.get(job.job_id)
+        if trackers is None or not job.started_at:
+            return
+
+        progress = job.progress
+        now = time.monotonic()
+        items_tracker, ai_tracker = trackers
+
+        progress.elapsed_seconds = round((datetime.utcnow() - job.started_at).total_seconds(), 3)
+        items_rate = items_tracker.update(progress.processed, now)
+        ai_rate = ai_tracker.update(progress.ai_calls, now)
+        progress.items_per_second = round(items_rate, 3) if items_rate is not None else None
+        progress.ai_calls_per_second = round(ai_rate, 3) if ai_rate is not None else None
+
+        remaining = max(progress.total - progress.processed, 0)
+        if remaining == 0 and progress.total:
+            progress.eta_seconds = 0.0
+        elif items_rate:
+            progress.eta_seconds = round(remaining / items_rate, 1)
+        else:
+            progress.eta_seconds = None
+
+    def _record_job_metrics(self, job: JobResponse) -> None:
+        """Record duration and throughput metrics for a finished job."""
+        script_type = job.script_type.value
+        status = JobStatus.CANCELLED if self._cancellation_flags.get(job.job_id) else job.status
+        JOBS_TOTAL.inc(script_type=script_type, status=status.value)
+        ITEMS_PROCESSED.inc(job.progress.processed, script_type=script_type)
+
+        if not job.started_at or not job.completed_at:
+            return
+        duration = (job.completed_at - job.started_at).total_seconds()
+        JOB_DURATION.observe(duration, script_type=script_type, status=status.value)
+        if duration > 0 and job.progress.processed:
+            JOB_ITEMS_PER_SECOND.observe(job.progress.processed / duration, script_type=script_type)
 
     async def cancel_job(self, job_id: str) -> bool:
         """
         Request cancellation of a running job.
 
+        Cancels the job's token, which aborts its in-flight AI requests and
+        database statements.
+
         Returns True if cancellation was requested, False if job not found or not running.
         """
         async with self._lock:
@@ -296,12 +591,23 @@ class JobManager:
             self._cancellation_flags[job_id] = True
             job.status = JobStatus.CANCELLED
             job.completed_at = datetime.utcnow()
+            self._touch(job_id)
             self._save_job_to_file(job)
-            return True
+            token = self._cancel_tokens.get(job_id)
+
+        if token is not None:
+            # Abort callbacks may talk to the database; keep them off the event loop
+            await asyncio.get_event_loop().run_in_executor(None, token.cancel, "Job cancelled by user")
+        return True
 
     def is_cancelled(self, job_id: str) -> bool:
-        """Check if a job has been cancelled."""
-        return self._cancellation_flags.get(job_id, False)
+        """Check if a job has been cancelled or has passed its deadline."""
+        token = self._cancel_tokens.get(job_id)
+        return self._cancellation_flags.get(job_id, False) or (token is not None and token.cancelled)
+
+    def cancel_token(self, job_id: str) -> Optional[CancellationToken]:
+        """The cancellation token of a running job."""
+        return self._cancel_tokens.get(job_id)
 
     async def _cleanup_old_jobs(self) -> None:
         """Remove oldest completed jobs if we exceed the max history."""
@@ -320,6 +626,18 @@ class JobManager:
         for job_id, _ in completed[:jobs_to_remove]:
             del self._jobs[job_id]
             self._cancellation_flags.pop(job_id, None)
+            self._cancel_tokens.pop(job_id, None)
+            self._created_at.pop(job_id, None)
+            self._rate_trackers.pop(job_id, None)
+            self._versions.pop(job_id, None)
+            self._log_tails.pop(job_id, None)
+            self._log_store.close(job_id)
+            # Neighbour CSVs hold a row per note and neighbour; don't keep them past the job
+            (self.neighbors_dir / f"{job_id}.csv").unlink(missing_ok=True)
+
+        # Drop cached projections of removed jobs
+        for key in [key for key in self._projections if key[0] not in self._jobs]:
+            del self._projections[key]
 
     async def shutdown(self) -> None:
         """Cleanup on shutdown."""
@@ -330,4 +648,11 @@ class JobManager:
                     job.status = JobStatus.FAILED
                     job.error_message = "Service shutdown"
                     job.completed_at = datetime.utcnow()
+                    self._touch(job_id)
                     self._save_job_to_file(job)
+            self._log_store.close_all()
+            tokens = list(self._cancel_tokens.values())
+
+        # Stop in-flight work instead of leaving it running in the thread pool
+        for token in tokens:
+            token.cancel("Service shutdown")
@@ -0,0 +1,307 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Provides lightweight counters and histograms for job, AI and database
+instrumentation. Label children can be resolved once outside a hot loop
+so that each observation is a bisect plus a few additions under the
+child's own lock; observations from the thread pool and the event loop
+are never lost.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (covers sub-millisecond file work
+# through multi-minute AI completions)
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0, 3600.0
+)
+
+# Buckets for throughput observations (items/second)
+RATE_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Format a label set as {name="value",...}."""
+    pairs = [f'{n}="{_escape_label_value(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    """A single labelled counter series. Thread-safe."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    """A single labelled histogram series. Thread-safe."""
+
+    __slots__ = ("_bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        # One slot per bound plus the +Inf overflow slot
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Bucket counts, sum and count as of one moment."""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Metric:
+    """Base class for labelled metric families."""
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        """Get (or create) the child series for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def clear(self) -> None:
+        """Drop all series (mainly for tests)."""
+        with self._lock:
+            self._children.clear()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        """Render this metric family in Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self.labels(**labels).inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram with fixed, cumulative buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.labels(**labels).observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families exposed by the /metrics endpoint."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def expose(self) -> str:
+        """Render all registered metrics in Prometheus text format."""
+        return "\n".join(metric.expose() for metric in self._metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Job metrics
+JOB_DURATION = REGISTRY.register(Histogram(
+    "script_runner_job_duration_seconds",
+    "Wall-clock duration of script jobs.",
+    ["script_type", "status"]
+))
+JOB_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "script_runner_job_queue_wait_seconds",
+    "Time between job creation and job start.",
+    ["script_type"]
+))
+JOB_ITEMS_PER_SECOND = REGISTRY.register(Histogram(
+    "script_runner_job_items_per_second",
+    "Average items processed per second, observed once per finished job.",
+    ["script_type"],
+    buckets=RATE_BUCKETS
+))
+JOBS_TOTAL = REGISTRY.register(Counter(
+    "script_runner_jobs_total",
+    "Finished jobs by final status.",
+    ["script_type", "status"]
+))
+ITEMS_PROCESSED = REGISTRY.register(Counter(
+    "script_runner_items_processed_total",
+    "Items (files or notes) processed by jobs.",
+    ["script_type"]
+))
+ITEM_DURATION = REGISTRY.register(Histogram(
+    "script_runner_item_normalize_seconds",
+    "Time to normalize a single file or note.",
+    ["script_type"]
+))
+
+# AI metrics
+AI_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "script_runner_ai_request_seconds",
+    "Latency of AI chat completion requests.",
+    ["model"]
+))
+AI_REQUESTS = REGISTRY.register(Counter(
+    "script_runner_ai_requests_total",
+    "AI chat completion requests by response status.",
+    ["model", "status"]
+))
+AI_TOKENS = REGISTRY.register(Counter(
+    "script_runner_ai_tokens_total",
+    "Tokens reported by the AI provider.",
+    ["model", "kind"]
+))
+
+# Outbound HTTP metrics (every attempt, retries included)
+HTTP_CLIENT_REQUESTS = REGISTRY.register(Counter(
+    "script_runner_http_client_requests_total",
+    "Outbound HTTP attempts by host and status (code, timeout, error or circuit_open).",
+    ["host", "status"]
+))
+HTTP_CLIENT_DURATION = REGISTRY.register(Histogram(
+    "script_runner_http_client_request_seconds",
+    "Latency of outbound HTTP attempts (to response headers).",
+    ["host"]
+))
+
+# Database metrics
+DB_ROUNDTRIPS = REGISTRY.register(Counter(
+    "script_runner_db_roundtrips_total",
+    "Database round-trips by operation.",
+    ["operation"]
+))
+DB_ROUNDTRIP_DURATION = REGISTRY.register(Histogram(
+    "script_runner_db_roundtrip_seconds",
+    "Latency of database round-trips.",
+    ["operation"]
+))
+
+
+def record_ai_request(model: str, latency: float, status: str, usage: Optional[dict] = None) -> None:
+    """
+    Record a single AI completion request.
+
+    Args:
+        model: Model name sent to the provider
+        latency: Request latency in seconds
+        status: HTTP status code as a string, or "timeout"/"error"/"circuit_open",
+            or "invalid_response" for a 200 that is not a usable completion
+        usage: The provider's `usage` block, if any
+    """
+    AI_REQUEST_DURATION.observe(latency, model=model)
+    AI_REQUESTS.inc(model=model, status=status)
+    if usage:
+        AI_TOKENS.inc(usage.get('prompt_tokens') or 0, model=model, kind="prompt")
+        AI_TOKENS.inc(usage.get('completion_tokens') or 0, model=model, kind="completion")
+
+
+def record_http_call(host: str, status: str, latency: float) -> None:
+    """Record one outbound HTTP attempt."""
+    HTTP_CLIENT_REQUESTS.inc(host=host, status=status)
+    if status != "circuit_open":
+        HTTP_CLIENT_DURATION.observe(latency, host=host)
+
+
+def record_db_roundtrip(operation: str, latency: float) -> None:
+    """Record a single database round-trip."""
+    DB_ROUNDTRIPS.inc(operation=operation)
+    DB_ROUNDTRIP_DURATION.observe(latency, operation=operation)
@@ -1,54 +1,162 @@
 """Script execution service that wraps existing normalization scripts."""
 
 import asyncio
+import contextvars
 import os
 import sys
+import time
+from functools import partial
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
 
 # Add parent directory to path so we can import the existing scripts
 scripts_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(scripts_dir))
 
+from cancellation import CancellationToken, OperationCancelled, bind_connection
+from chunked_summary import SummaryCache
+from token_budget import TokenStats
+
 from ..config import settings
 from ..models import JobRequest, ScriptType
 from .job_manager import JobManager
+from .metrics import ITEM_DURATION, record_ai_request, record_db_roundtrip, record_http_call
+from .tracing import Tracer, trace_span
 
 
 async def run_script(
     job_manager: JobManager,
     job_id: str,
-    request: JobRequest
+    request: JobRequest,
+    summary_cache: Optional[SummaryCache] = None,
+    token_stats: Optional[TokenStats] = None
 ) -> None:
     """
     Run a script based on the request parameters.
 
-    This is the main entry point called by the jobs router.
+    This is the main entry point called by the jobs router. The vault job
+    reuses section summaries of long notes from `summary_cache` and sizes
+    max_tokens from the completion lengths in `token_stats`.
     """
-    await job_manager.start_job(job_id)
+    await job_manager.start_job(job_id, timeout_seconds=request.timeout_seconds)
+    if request.timeout_seconds:
+        await job_manager.add_log(job_id, f"Deadline: {request.timeout_seconds}s")
     await job_manager.add_log(job_id, f"Starting {request.script_type.value} script...")
 
+    tracer = Tracer() if request.trace else None
+    result: Optional[Dict[str, Any]] = None
+    # Stays set if the task itself is cancelled (e.g. on shutdown)
+    error_msg: Optional[str] = "Job interrupted"
+
     try:
-        if request.script_type == ScriptType.NORMALIZE_NOTES:
-            result = await run_normalize_notes(job_manager, job_id, request)
-        elif request.script_type == ScriptType.NORMALIZE_VAULT:
-            result = await run_normalize_vault(job_manager, job_id, request)
-        else:
-            raise ValueError(f"Unknown script type: {request.script_type}")
+        with trace_span(tracer, "job", job_id=job_id, script_type=request.script_type.value):
+            if request.script_type == ScriptType.NORMALIZE_NOTES:
+                result = await run_normalize_notes(job_manager, job_id, request, tracer)
+            elif request.script_type == ScriptType.NORMALIZE_VAULT:
+                result = await run_normalize_vault(job_manager, job_id, request, tracer, summary_cache, token_stats)
+            elif request.script_type == ScriptType.RELATED_NOTES:
+                result = await run_related_notes(job_manager, job_id, request, tracer)
+            else:
+                raise ValueError(f"Unknown script type: {request.script_type}")
+        error_msg = None
 
-        await job_manager.complete_job(job_id, result=result)
-        await job_manager.add_log(job_id, "Script completed successfully.")
+    except OperationCancelled as e:
+        error_msg = str(e)
+        await job_manager.add_log(job_id, f"{error_msg}.")
 
     except Exception as e:
         error_msg = str(e)
         await job_manager.add_log(job_id, f"Error: {error_msg}")
-        await job_manager.complete_job(job_id, error=error_msg)
+
+    finally:
+        # Always finish the job, so its status, cancel token and log handles are released
+        try:
+            if tracer:
+                trace_files = await _export_trace(job_manager, job_id, tracer)
+                if trace_files and result is not None:
+                    result["trace_files"] = trace_files
+        finally:
+            await job_manager.complete_job(job_id, result=result, error=error_msg)
+
+    if error_msg is None:
+        await job_manager.add_log(job_id, "Script completed successfully.")
+
+
+async def _export_trace(job_manager: JobManager, job_id: str, tracer: Tracer) -> Optional[Dict[str, str]]:
+    """Write the job's trace files next to the job logs and log their location; None if that failed."""
+    loop = asyncio.get_event_loop()
+    try:
+        paths = await loop.run_in_executor(None, tracer.export, job_manager.traces_dir, job_id)
+    except Exception as e:
+        await job_manager.add_log(job_id, f"Could not write trace files: {e}")
+        return None
+    await job_manager.add_log(job_id, f"Trace written to: {paths['chrome']}")
+    return paths
+
+
+async def _until_cancelled(future: asyncio.Future, cancel_token: Optional[CancellationToken]) -> Any:
+    """
+    Await a thread pool future, raising OperationCancelled as soon as the token is cancelled.
+
+    The token's abort callbacks stop the blocking call itself; this only
+    makes sure the job doesn't wait for the thread to notice.
+    """
+    if cancel_token is None:
+        return await future
+    loop = asyncio.get_event_loop()
+    cancelled = loop.create_future()
+
+    def wake():
+        loop.call_soon_threadsafe(lambda: cancelled.done() or cancelled.set_result(None))
+
+    unregister = cancel_token.on_cancel(wake)
+    try:
+        await asyncio.wait({future, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        unregister()
+        cancelled.cancel()
+
+    if not future.done():
+        # Nobody awaits the abandoned call; don't warn about its error
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        raise OperationCancelled(cancel_token.reason)
+    try:
+        return future.result()
+    except Exception:
+        # An aborted call fails with its own error; report the cancel instead
+        cancel_token.raise_if_cancelled()
+        raise
+
+
+def _submit_in_context(loop, func: Callable, *args) -> asyncio.Future:
+    """Start a blocking call in the thread pool, carrying the current tracing span along."""
+    context = contextvars.copy_context()
+    return loop.run_in_executor(None, partial(context.run, func, *args))
+
+
+async def _run_in_context(loop, func: Callable, *args,
+                          cancel_token: Optional[CancellationToken] = None) -> Any:
+    """Run a blocking call in the thread pool, carrying the current tracing span along."""
+    return await _until_cancelled(_submit_in_context(loop, func, *args), cancel_token)
+
+
+async def _run_db(loop, operation: str, func: Callable, *args, tracer: Optional[Tracer] = None,
+                  cancel_token: Optional[CancellationToken] = None) -> Any:
+    """Run a blocking database call in the thread pool and record the round-trip."""
+    started = time.perf_counter()
+    try:
+        with trace_span(tracer, f"db.{operation}"):
+            return await _until_cancelled(loop.run_in_executor(None, func, *args), cancel_token)
+    finally:
+        record_db_roundtrip(operation, time.perf_counter() - started)
 
 
 async def run_normalize_notes(
     job_manager: JobManager,
     job_id: str,
-    request: JobRequest
+    request: JobRequest,
+    tracer: Optional[Tracer] = None
 ) -> Dict[str, Any]:
     """
     Run the normalize_notes.py script logic.
@@ -74,20 +182,31 @@ async def run_normalize_notes(
 
     # Run database operations in thread pool to avoid blocking
     loop = asyncio.get_event_loop()
+    cancel_token = job_manager.cancel_token(job_id) or CancellationToken()
 
     def db_work():
         conn = get_connection(database_url)
+        # Statements get the job's deadline and are cancelled with the job
+        try:
+            unbind = bind_connection(cancel_token, conn)
+        except Exception:
+            conn.close()
+            raise
         cursor = conn.cursor(cursor_factory=__import__('psycopg2.extras', fromlist=['RealDictCursor']).RealDictCursor)
-        return conn, cursor
+        return conn, cursor, unbind
 
-    conn, cursor = await loop.run_in_executor(None, db_work)
+    conn, cursor, unbind = await _run_db(loop, "connect", db_work, tracer=tracer)
 
     try:
         # Fetch all notes
         await job_manager.add_log(job_id, "Fetching notes...")
-        notes = await loop.run_in_executor(None, fetch_all_notes, cursor)
+        notes = await _run_db(
+            loop, "fetch_notes", fetch_all_notes, cursor, tracer=tracer, cancel_token=cancel_token
+        )
 
         total = len(notes)
+        if tracer:
+            tracer.set_item_count(total)
         await job_manager.update_progress(job_id, total=total, processed=0)
         await job_manager.add_log(job_id, f"Found {total} notes to process.")
 
@@ -101,11 +220,12 @@ async def run_normalize_notes(
             "unchanged": 0
         }
 
+        # Resolve the metric series once so the loop only pays for observe()
+        item_timer = ITEM_DURATION.labels(script_type=request.script_type.value)
+
         for idx, note in enumerate(notes):
-            # Check for cancellation
-            if job_manager.is_cancelled(job_id):
-                await job_manager.add_log(job_id, "Job cancelled by user.")
-                raise Exception("Job cancelled")
+            # Check for cancellation and the deadline
+            cancel_token.raise_if_cancelled()
 
             note_id = str(note["Id"])
             slug = note["Slug"]
@@ -118,55 +238,63 @@ async def run_normalize_notes(
                 current_item=f"{slug} ({idx + 1}/{total})"
             )
 
-            updates = {}
-
-            # Normalize content
-            original_content = note["Content"]
-            normalized_content = normalize_content(original_content)
-            if original_content != normalized_content:
-                updates["Content"] = normalized_content
-                stats["content_normalized"] += 1
-
-            # Normalize description
-            original_desc = note["Description"]
-            normalized_desc = normalize_description(original_desc, normalized_content, title)
-            if original_desc != normalized_desc:
-                updates["Description"] = normalized_desc
-                stats["description_generated"] += 1
-
-            # Normalize tags
-            original_tags = note["Tags"]
-            normalized_tags = normalize_tags(original_tags)
-            if set(original_tags or []) != set(normalized_tags):
-                updates["Tags"] = normalized_tags
-                stats["tags_normalized"] += 1
-
-            # Normalize source_url
-            original_url = note["SourceUrl"]
-            normalized_url = normalize_source_url(original_url, vault_name, slug)
-            if original_url != normalized_url:
-                updates["SourceUrl"] = normalized_url
-                stats["source_url_generated"] += 1
-
-            # Apply updates
-            if updates:
-                if request.verbose:
-                    await job_manager.add_log(job_id, f"[{slug}] Updating {len(updates)} fields")
-
-                if not request.dry_run:
-                    await loop.run_in_executor(
-                        None,
-                        update_note,
-                        cursor,
-                        note_id,
-                        updates
-                    )
-            else:
-                stats["unchanged"] += 1
+            item_started = time.perf_counter()
+            item_tracer = tracer if tracer and tracer.should_sample(idx) else None
+            with trace_span(item_tracer, "note", slug=slug):
+                updates = {}
+
+                # Normalize content
+                original_content = note["Content"]
+                normalized_content = normalize_content(original_content)
+                if original_content != normalized_content:
+                    updates["Content"] = normalized_content
+                    stats["content_normalized"] += 1
+
+                # Normalize description
+                original_desc = note["Description"]
+                normalized_desc = normalize_description(original_desc, normalized_content, title)
+                if original_desc != normalized_desc:
+                    updates["Description"] = normalized_desc
+                    stats["description_generated"] += 1
+
+                # Normalize tags
+                original_tags = note["Tags"]
+                normalized_tags = normalize_tags(original_tags)
+                if set(original_tags or []) != set(normalized_tags):
+                    updates["Tags"] = normalized_tags
+                    stats["tags_normalized"] += 1
+
+                # Normalize source_url
+                original_url = note["SourceUrl"]
+                normalized_url = normalize_source_url(original_url, vault_name, slug)
+                if original_url != normalized_url:
+                    updates["SourceUrl"] = normalized_url
+                    stats["source_url_generated"] += 1
+
+                # Apply updates
+                if updates:
+                    if request.verbose:
+                        await job_manager.add_log(job_id, f"[{slug}] Updating {len(updates)} fields")
+
+                    if not request.dry_run:
+                        await _run_db(
+                            loop,
+                            "update_note",
+                            update_note,
+                            cursor,
+                            note_id,
+                            updates,
+                            tracer=item_tracer,
+                            cancel_token=cancel_token
+                        )
+                else:
+                    stats["unchanged"] += 1
+
+            item_timer.observe(time.perf_counter() - item_started)
 
         # Commit changes
         if not request.dry_run:
-            await loop.run_in_executor(None, conn.commit)
+            await _run_db(loop, "commit", conn.commit, tracer=tracer, cancel_token=cancel_token)
             await job_manager.add_log(job_id, "Changes committed to database.")
         else:
             await job_manager.add_log(job_id, "DRY RUN - No changes made.")
@@ -181,6 +309,7 @@ async def run_normalize_notes(
         return stats
 
     finally:
+        unbind()
         cursor.close()
         conn.close()
 
@@ -188,7 +317,10 @@ async def run_normalize_notes(
 async def run_normalize_vault(
     job_manager: JobManager,
     job_id: str,
-    request: JobRequest
+    request: JobRequest,
+    tracer: Optional[Tracer] = None,
+    summary_cache: Optional[SummaryCache] = None,
+    token_stats: Optional[TokenStats] = None
 ) -> Dict[str, Any]:
     """
     Run the normalize_obsidian_vault.py script logic.
@@ -196,9 +328,11 @@ async def run_normalize_vault(
     This reimplements the script logic to enable progress tracking.
     """
     from normalize_obsidian_vault import (
+        PREFETCH_FILES,
         AIDescriptionGenerator,
         create_backup,
         normalize_file,
+        prefetch_descriptions,
         should_ignore,
     )
 
@@ -214,6 +348,7 @@ async def run_normalize_vault(
         raise ValueError(f"Vault path is not a directory: {vault_path}")
 
     await job_manager.add_log(job_id, f"Processing vault: {vault_path}")
+    cancel_token = job_manager.cancel_token(job_id) or CancellationToken()
 
     # Set up AI generator if requested
     ai_generator = None
@@ -221,33 +356,47 @@ async def run_normalize_vault(
         if not settings.gradient_api_key:
             raise ValueError("GRADIENT_API_KEY environment variable not set")
 
+        fast_model = f", fast model: {settings.ai_fast_model}" if settings.ai_fast_model else ""
         await job_manager.add_log(
             job_id,
-            f"AI enabled: {settings.gradient_base_url} (model: {settings.ai_model})"
+            f"AI enabled: {settings.gradient_base_url} (model: {settings.ai_model}{fast_model})"
         )
         ai_generator = AIDescriptionGenerator(
             base_url=settings.gradient_base_url,
             api_key=settings.gradient_api_key,
-            model=settings.ai_model
+            model=settings.ai_model,
+            on_response=record_ai_request,
+            on_call=lambda call: record_http_call(urlsplit(call.url).netloc, call.status, call.latency),
+            cancel_token=cancel_token,
+            chunk_threshold=settings.ai_chunk_threshold or None,
+            summary_cache=summary_cache,
+            pack_size=settings.ai_pack_size,
+            token_stats=token_stats,
+            fast_model=settings.ai_fast_model or None,
+            fast_timeout=settings.ai_fast_timeout
         )
 
     # Create backup if requested
     if request.backup and not request.dry_run:
         await job_manager.add_log(job_id, "Creating backup...")
         loop = asyncio.get_event_loop()
-        backup_path = await loop.run_in_executor(
-            None,
-            create_backup,
-            vault_path,
-            None
-        )
+        with trace_span(tracer, "backup"):
+            backup_path = await loop.run_in_executor(
+                None,
+                create_backup,
+                vault_path,
+                None
+            )
         await job_manager.add_log(job_id, f"Backup created at: {backup_path}")
 
     # Find all markdown files
-    md_files = list(vault_path.rglob("*.md"))
-    md_files = [f for f in md_files if not should_ignore(f)]
+    with trace_span(tracer, "discovery"):
+        md_files = list(vault_path.rglob("*.md"))
+        md_files = [f for f in md_files if not should_ignore(f)]
 
     total = len(md_files)
+    if tracer:
+        tracer.set_item_count(total)
     await job_manager.update_progress(job_id, total=total, processed=0)
     await job_manager.add_log(job_id, f"Found {total} markdown files to process.")
 
@@ -265,63 +414,245 @@ async def run_normalize_vault(
 
     loop = asyncio.get_event_loop()
 
-    for idx, filepath in enumerate(md_files):
-        # Check for cancellation
-        if job_manager.is_cancelled(job_id):
-            await job_manager.add_log(job_id, "Job cancelled by user.")
-            raise Exception("Job cancelled")
+    # Resolve the metric series once so the loop only pays for observe()
+    item_timer = ITEM_DURATION.labels(script_type=request.script_type.value)
 
-        relative_path = filepath.relative_to(vault_path)
-        await job_manager.update_progress(
-            job_id,
-            processed=idx,
-            current_item=f"{relative_path} ({idx + 1}/{total})"
-        )
+    # The thread pool call in progress; a cancel stops waiting for it, but
+    # it still uses the AI generator and caches until it returns
+    in_flight: Optional[asyncio.Future] = None
+    try:
+        for idx, filepath in enumerate(md_files):
+            # Check for cancellation and the deadline
+            cancel_token.raise_if_cancelled()
+
+            # Describe the next files' short notes several to a request
+            if ai_generator and ai_generator.pack_size > 1 and idx % PREFETCH_FILES == 0:
+                await job_manager.update_progress(
+                    job_id,
+                    processed=idx,
+                    current_item=f"Packing AI requests for files {idx + 1}-{min(idx + PREFETCH_FILES, total)}"
+                )
+                with trace_span(tracer, "ai.prefetch"):
+                    in_flight = _submit_in_context(
+                        loop,
+                        prefetch_descriptions,
+                        ai_generator,
+                        md_files[idx:idx + PREFETCH_FILES]
+                    )
+                    await _until_cancelled(in_flight, cancel_token)
 
-        # Run file normalization in thread pool
-        result = await loop.run_in_executor(
-            None,
-            normalize_file,
-            filepath,
-            request.dry_run,
-            request.verbose,
-            ai_generator
-        )
+            relative_path = filepath.relative_to(vault_path)
+            await job_manager.update_progress(
+                job_id,
+                processed=idx,
+                current_item=f"{relative_path} ({idx + 1}/{total})",
+                ai_calls=ai_generator.request_count if ai_generator else None
+            )
 
-        if "error" in result:
-            stats["errors"] += 1
-            await job_manager.add_log(job_id, f"[ERROR] {relative_path}: {result['error']}")
-            continue
-
-        if result["modified"]:
-            stats["modified"] += 1
-
-            # Count specific changes
-            for change in result["changes"]:
-                if change.startswith("tags:"):
-                    stats["tags_updated"] += 1
-                elif change.startswith("title:"):
-                    stats["titles_added"] += 1
-                elif change.startswith("description (AI):"):
-                    stats["ai_descriptions"] += 1
-                    stats["descriptions_added"] += 1
-                elif change.startswith("description:"):
-                    stats["descriptions_added"] += 1
-
-            if request.verbose:
-                await job_manager.add_log(job_id, f"[MODIFIED] {relative_path}")
-        else:
-            stats["unchanged"] += 1
+            # Run file normalization in thread pool
+            item_started = time.perf_counter()
+            item_tracer = tracer if tracer and tracer.should_sample(idx) else None
+            with trace_span(item_tracer, "file", path=relative_path):
+                in_flight = _submit_in_context(
+                    loop,
+                    normalize_file,
+                    filepath,
+                    request.dry_run,
+                    request.verbose,
+                    ai_generator,
+                    item_tracer,
+                    cancel_token
+                )
+                result = await _until_cancelled(in_flight, cancel_token)
+            item_timer.observe(time.perf_counter() - item_started)
+
+            if "error" in result:
+                stats["errors"] += 1
+                await job_manager.add_log(job_id, f"[ERROR] {relative_path}: {result['error']}")
+                continue
+
+            if result["modified"]:
+                stats["modified"] += 1
+
+                # Count specific changes
+                for change in result["changes"]:
+                    if change.startswith("tags:"):
+                        stats["tags_updated"] += 1
+                    elif change.startswith("title:"):
+                        stats["titles_added"] += 1
+                    elif change.startswith("description (AI):"):
+                        stats["ai_descriptions"] += 1
+                        stats["descriptions_added"] += 1
+                    elif change.startswith("description:"):
+                        stats["descriptions_added"] += 1
+
+                if request.verbose:
+                    await job_manager.add_log(job_id, f"[MODIFIED] {relative_path}")
+            else:
+                stats["unchanged"] += 1
+    finally:
+        # Let an abandoned call return before closing what it is using; it
+        # sees the cancelled token and doesn't write its file
+        if in_flight is not None and not in_flight.done():
+            await asyncio.wait({in_flight})
+        # Also closes the AI connections when the job is cancelled
+        if ai_generator:
+            ai_generator.close()
+        if summary_cache is not None:
+            await loop.run_in_executor(None, summary_cache.flush)
+        if token_stats is not None:
+            await loop.run_in_executor(None, token_stats.flush)
+
+    if ai_generator and ai_generator.chunk_stats["chunked_notes"]:
+        stats["chunked_notes"] = ai_generator.chunk_stats["chunked_notes"]
+        stats["summary_cache_hits"] = ai_generator.chunk_stats["cache_hits"]
+    if ai_generator and ai_generator.pack_stats["packed_requests"]:
+        stats.update(ai_generator.pack_stats)
+    if ai_generator:
+        stats.update(ai_generator.token_summary())
+        if len(ai_generator.cascade.models) > 1:
+            stats["models"] = ai_generator.cascade.summary()
+            stats["escalations"] = ai_generator.cascade.escalations
 
     await job_manager.update_progress(
         job_id,
         processed=total,
         succeeded=stats["modified"],
         failed=stats["errors"],
-        current_item=None
+        current_item=None,
+        ai_calls=ai_generator.request_count if ai_generator else None
     )
 
     if request.dry_run:
         await job_manager.add_log(job_id, "DRY RUN - No files were modified.")
 
     return stats
+
+
+async def run_related_notes(
+    job_manager: JobManager,
+    job_id: str,
+    request: JobRequest,
+    tracer: Optional[Tracer] = None
+) -> Dict[str, Any]:
+    """
+    Precompute the nearest neighbours of every note from its embedding.
+
+    Results are written to a CSV in the job logs directory. Unless this is
+    a dry run or the vectors came from a file, the CSV then replaces the
+    contents of the NoteNeighbors table in one transaction.
+    """
+    from vector_index import (
+        ExactIndex,
+        IVFIndex,
+        NeighborCsvWriter,
+        copy_neighbors_to_db,
+        load_db_vectors,
+        load_jsonl_vectors,
+    )
+
+    work_dir = job_manager.neighbors_dir
+    matrix_path = work_dir / f"{job_id}.f32"
+    csv_path = work_dir / f"{job_id}.csv"
+    loop = asyncio.get_event_loop()
+    cancel_token = job_manager.cancel_token(job_id) or CancellationToken()
+    started = time.perf_counter()
+
+    if request.embeddings_path:
+        embeddings_path = Path(request.embeddings_path).resolve()
+        if not embeddings_path.is_file():
+            raise ValueError(f"Embeddings file does not exist: {embeddings_path}")
+        await job_manager.add_log(job_id, f"Loading embeddings from {embeddings_path}...")
+        with trace_span(tracer, "load_vectors"):
+            ids, matrix = await _until_cancelled(
+                loop.run_in_executor(None, load_jsonl_vectors, embeddings_path, matrix_path), cancel_token
+            )
+    else:
+        if not settings.database_url:
+            raise ValueError("DATABASE_URL environment variable not set")
+        await job_manager.add_log(job_id, "Loading note embeddings from the database...")
+        ids, matrix = await _run_db(
+            loop, "load_vectors", load_db_vectors, settings.database_url, matrix_path, cancel_token,
+            tracer=tracer, cancel_token=cancel_token
+        )
+
+    try:
+        total = len(ids)
+        if total < 2:
+            raise ValueError(f"Need at least two embedded notes, found {total}")
+        load_seconds = time.perf_counter() - started
+        await job_manager.add_log(
+            job_id, f"Loaded {total} vectors ({matrix.shape[1]}D) in {load_seconds:.1f}s."
+        )
+
+        index_type = "ivf" if request.use_ivf else "exact"
+        with trace_span(tracer, "build_index", index=index_type):
+            if request.use_ivf:
+                index = await _until_cancelled(loop.run_in_executor(None, IVFIndex, matrix), cancel_token)
+            else:
+                index = ExactIndex(matrix)
+        await job_manager.update_progress(job_id, total=total, processed=0)
+        await job_manager.add_log(job_id, f"Searching {request.neighbors_k} neighbours per note ({index_type} index)...")
+
+        # Each chunk is computed and written in the thread pool; progress and
+        # cancellation are checked between chunks
+        def next_chunk(chunks, writer):
+            chunk = next(chunks, None)
+            if chunk is not None:
+                writer.write_chunk(ids, chunk)
+            return chunk
+
+        chunks = index.iter_all_neighbors(request.neighbors_k)
+        writer = NeighborCsvWriter(csv_path)
+        processed = 0
+        in_flight: Optional[asyncio.Future] = None
+        try:
+            with trace_span(tracer, "search"):
+                while True:
+                    cancel_token.raise_if_cancelled()
+                    in_flight = asyncio.ensure_future(_run_in_context(loop, next_chunk, chunks, writer))
+                    chunk = await asyncio.shield(in_flight)
+                    if chunk is None:
+                        break
+                    processed += len(chunk[0])
+                    await job_manager.update_progress(job_id, processed=processed, succeeded=processed)
+        finally:
+            # If the job task was cancelled mid-chunk, the worker thread is still
+            # writing to the CSV and reading the memmap; let it finish first
+            if in_flight is not None and not in_flight.done():
+                await asyncio.wait({in_flight})
+            writer.close()
+        search_seconds = time.perf_counter() - started - load_seconds
+        await job_manager.add_log(
+            job_id, f"Wrote {writer.rows_written} neighbour rows to {csv_path} in {search_seconds:.1f}s."
+        )
+
+        written_to_db = False
+        if request.embeddings_path:
+            await job_manager.add_log(job_id, "Vectors came from a file; skipping the database write.")
+        elif request.dry_run:
+            await job_manager.add_log(job_id, "DRY RUN - NoteNeighbors table not updated.")
+        else:
+            await _run_db(
+                loop, "copy_neighbors", copy_neighbors_to_db, settings.database_url, csv_path, cancel_token,
+                tracer=tracer, cancel_token=cancel_token
+            )
+            written_to_db = True
+            await job_manager.add_log(job_id, "NoteNeighbors table updated.")
+
+        return {
+            "notes": total,
+            "dimensions": int(matrix.shape[1]),
+            "k": request.neighbors_k,
+            "index": index_type,
+            "neighbor_rows": writer.rows_written,
+            "output_file": str(csv_path),
+            "written_to_db": written_to_db,
+            "load_seconds": round(load_seconds, 2),
+            "search_seconds": round(search_seconds, 2),
+        }
+    finally:
+        # The memmap is only scratch space for the search
+        del matrix
+        if matrix_path.exists():
+            matrix_path.unlink()
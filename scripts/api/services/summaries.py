@@ -0,0 +1,152 @@
+"""
+Chunked summarization of long notes for the API.
+
+One SummaryCache is created in the application lifespan and stored on
+app.state.summary_cache. The vault job hands it to the scripts'
+AIDescriptionGenerator; the AI test endpoints run the map step here with
+the async HTTP client and send the reduce prompt themselves.
+
+The token stats the generator sizes max_tokens from are shared the same
+way, on app.state.token_stats.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import httpx
+from fastapi import Request
+
+from ..config import settings
+from .http_client import AsyncHTTPClient, CircuitOpenError
+from .metrics import record_ai_request
+
+# Add the scripts directory to the path for the shared chunking helpers
+scripts_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(scripts_dir))
+
+from chunked_summary import (
+    CHUNK_SUMMARY_MAX_CHARS,
+    DEFAULT_SUMMARY_CACHE_DIR,
+    SummaryCache,
+    build_chunk_prompt,
+    build_reduce_prompt,
+    split_into_chunks,
+)
+from token_budget import DEFAULT_TOKEN_STATS_PATH, TokenStats
+
+
+def create_summary_cache() -> SummaryCache:
+    """Open the summary cache configured by SUMMARY_CACHE_DIR."""
+    return SummaryCache(settings.summary_cache_dir or DEFAULT_SUMMARY_CACHE_DIR)
+
+
+def get_summary_cache(request: Request) -> SummaryCache:
+    """Get the shared summary cache from app state."""
+    return request.app.state.summary_cache
+
+
+def create_token_stats() -> TokenStats:
+    """Open the token stats file configured by TOKEN_STATS_PATH."""
+    return TokenStats(settings.token_stats_path or DEFAULT_TOKEN_STATS_PATH)
+
+
+def get_token_stats(request: Request) -> TokenStats:
+    """Get the shared token stats from app state."""
+    return request.app.state.token_stats
+
+
+def is_long_note(body: str) -> bool:
+    """Whether `body` is summarized chunk by chunk."""
+    return bool(settings.ai_chunk_threshold) and len(body) > settings.ai_chunk_threshold
+
+
+async def _summarize_chunk(
+    http_client: AsyncHTTPClient,
+    prompt: str,
+    max_tokens: int,
+    temperature: float
+) -> Optional[str]:
+    """Summarize one chunk; None if the request failed, or its answer was empty or malformed."""
+    base_url = settings.gradient_base_url.rstrip('/')
+    started = time.perf_counter()
+    try:
+        response = await http_client.post(
+            f"{base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {settings.gradient_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": settings.ai_model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            },
+            timeout=120,
+            retry_read_timeouts=False
+        )
+    except httpx.TimeoutException:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "timeout")
+        return None
+    except CircuitOpenError:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "circuit_open")
+        return None
+    except httpx.HTTPError:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "error")
+        return None
+
+    if response.status_code != 200:
+        record_ai_request(settings.ai_model, time.perf_counter() - started, str(response.status_code))
+        return None
+    try:
+        result = response.json()
+        content = result['choices'][0]['message']['content']
+    except (ValueError, KeyError, IndexError, TypeError):
+        # Not JSON, or not a chat completion (e.g. a proxy's error page)
+        record_ai_request(settings.ai_model, time.perf_counter() - started, "invalid_response")
+        return None
+    record_ai_request(settings.ai_model, time.perf_counter() - started, "200", result.get('usage'))
+    if not content or not isinstance(content, str):
+        return None
+    return content.strip().strip('"\'')[:CHUNK_SUMMARY_MAX_CHARS]
+
+
+async def build_long_note_prompt(
+    http_client: AsyncHTTPClient,
+    title: str,
+    body: str,
+    max_tokens: int,
+    temperature: float,
+    cache: Optional[SummaryCache] = None
+) -> Tuple[Optional[str], dict]:
+    """
+    Map step: summarize every chunk of a long note concurrently.
+
+    Returns the reduce prompt (None if no chunk could be summarized) and
+    section counts for the response: sections, cached, failed.
+    """
+    prompts = [build_chunk_prompt(title, chunk) for chunk in split_into_chunks(body)]
+    cached = 0
+
+    async def summarize(prompt: str) -> Optional[str]:
+        nonlocal cached
+        key = cache.key(settings.ai_model, prompt) if cache is not None else None
+        if key:
+            summary = cache.get(key)
+            if summary is not None:
+                cached += 1
+                return summary
+        summary = await _summarize_chunk(http_client, prompt, max_tokens, temperature)
+        if summary and key:
+            cache.put(key, summary)
+        return summary
+
+    results = await asyncio.gather(*(summarize(prompt) for prompt in prompts))
+    summaries: List[str] = [summary for summary in results if summary]
+    sections = {"sections": len(prompts), "cached": cached, "failed": len(prompts) - len(summaries)}
+    if not summaries:
+        return None, sections
+    return build_reduce_prompt(title, summaries), sections
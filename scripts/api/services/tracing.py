@@ -0,0 +1,174 @@
+"""
+Lightweight tracing for script runs.
+
+Records nested spans for job phases and (sampled) per-item work and
+exports them as Chrome trace-event JSON (chrome://tracing, Perfetto,
+speedscope) or OTLP-JSON for OpenTelemetry tooling.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Span currently open in this task/thread context. Propagates into executor
+# threads when the callable is run via contextvars.copy_context().run.
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A single timed operation."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "thread_id", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], start_ns: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns = start_ns
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+
+
+class Tracer:
+    """
+    Collects spans for one job.
+
+    Phase spans are always recorded. Per-item spans should be guarded with
+    should_sample() so that large jobs record at most `max_sampled_items`
+    items.
+    """
+
+    def __init__(self, service_name: str = "script_runner", max_sampled_items: int = 1000):
+        self.service_name = service_name
+        self.trace_id = uuid.uuid4().hex
+        self.max_sampled_items = max_sampled_items
+        self._sample_every = 1
+        self._spans: List[Span] = []
+        # Anchor monotonic timestamps to wall-clock time once
+        self._wall_base_ns = time.time_ns()
+        self._perf_base_ns = time.perf_counter_ns()
+
+    def _now_ns(self) -> int:
+        return self._wall_base_ns + (time.perf_counter_ns() - self._perf_base_ns)
+
+    def set_item_count(self, total: int) -> None:
+        """Set the number of items in the job, which determines the sampling stride."""
+        self._sample_every = max(1, -(-total // self.max_sampled_items))
+
+    def should_sample(self, index: int) -> bool:
+        """Whether the item at `index` should get per-item spans."""
+        return index % self._sample_every == 0
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Record a span around the enclosed block, nested under the current span."""
+        parent = _current_span.get()
+        span = Span(name, parent.span_id if parent else None, self._now_ns(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end_ns = self._now_ns()
+            _current_span.reset(token)
+            # list.append is atomic, so executor threads can record safely
+            self._spans.append(span)
+
+    @property
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Export spans in the Chrome trace-event format."""
+        pid = os.getpid()
+        thread_ids: Dict[int, int] = {}
+        events = []
+        for span in sorted(self._spans, key=lambda s: s.start_ns):
+            tid = thread_ids.setdefault(span.thread_id, len(thread_ids) + 1)
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": (span.start_ns - self._wall_base_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": {key: str(value) for key, value in span.attributes.items()},
+            })
+        for thread_id, tid in thread_ids.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": "event loop" if tid == 1 else f"worker {thread_id}"},
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "sample_every": self._sample_every},
+        }
+
+    def to_otlp_json(self) -> Dict[str, Any]:
+        """Export spans as an OTLP-JSON ExportTraceServiceRequest."""
+        spans = []
+        for span in self._spans:
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": key, "value": {"stringValue": str(value)}}
+                    for key, value in span.attributes.items()
+                ],
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "script_runner.tracing"},
+                    "spans": spans,
+                }],
+            }]
+        }
+
+    def export(self, directory: Path, basename: str) -> Dict[str, str]:
+        """
+        Write both trace formats to `directory`.
+
+        Returns:
+            Dict mapping format name ("chrome", "otlp") to file path
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {
+            "chrome": directory / f"{basename}.trace.json",
+            "otlp": directory / f"{basename}.otlp.json",
+        }
+        with open(paths["chrome"], "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        with open(paths["otlp"], "w", encoding="utf-8") as f:
+            json.dump(self.to_otlp_json(), f)
+        return {name: str(path) for name, path in paths.items()}
+
+
+def trace_span(tracer: Optional[Tracer], name: str, **attributes: Any):
+    """Open a span on `tracer`, or a no-op context if tracing is disabled."""
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, **attributes)
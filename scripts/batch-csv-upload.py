@@ -13,19 +13,63 @@ Options:
     --delay <seconds>       Delay between batches in seconds (default: 1)
     --api-url <url>         API base URL (default: http://localhost:5033)
     --auth-token <token>    Authentication token (required if using auth)
+    --stream                Read rows lazily and upload batches from memory
+                            (constant memory, no temp files)
+    --concurrency <number>  Batches uploaded in parallel over a keep-alive
+                            connection pool (default: 1)
+    --adaptive              Grow or shrink the batch size from server latency
+                            and errors, starting at --batch-size
+    --target-latency <s>    Adaptive mode: grow while responses take less
+                            than this (default: 5)
+    --max-batch-size <n>    Adaptive mode: upper bound on batch size (default: 500)
+    --timeout <seconds>     Request timeout per batch (default: 120)
+    --retries <number>      Retries with exponential backoff for connect
+                            timeouts, connection errors and 5xx (default: 3);
+                            a batch that timed out waiting for the answer may
+                            have been imported, so it is not sent again (use
+                            --resume). After repeated failures the circuit
+                            breaker stops sending for a while (see
+                            resilient_http.py)
+    --resume                Skip rows that a previous run of the same file
+                            already uploaded (from the checkpoint journal)
+    --journal-dir <path>    Where checkpoint journals are kept
+                            (default: scripts/upload-journals)
+    --dedupe                Skip rows uploaded by earlier runs (of any file)
+                            and remember the rows this run uploads
+    --manifest-dir <path>   Where --dedupe keeps row fingerprints
+                            (default: scripts/upload-manifests)
 
 Example:
     python scripts/batch-csv-upload.py my-books.csv --batch-size 10 --delay 2 --auth-token "your-jwt-token"
 """
 
 import argparse
+import bisect
 import csv
+import hashlib
+import io
+import json
 import os
+import re
 import sys
-import time
+import threading
+import unicodedata
 import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable, Callable, Tuple
+
+from cancellation import CancellationToken
+from resilient_http import CallRecord, HTTPClient, backoff_delay
+
+# How many times adaptive mode retries the rows of a failed batch
+MAX_ADAPTIVE_RETRIES = 3
+
+DEFAULT_JOURNAL_DIR = Path(__file__).parent / 'upload-journals'
+DEFAULT_MANIFEST_DIR = Path(__file__).parent / 'upload-manifests'
 
 
 def parse_args() -> argparse.Namespace:
@@ -43,9 +87,40 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--api-url', default='http://localhost:5033',
                        help='API base URL (default: http://localhost:5033)')
     parser.add_argument('--auth-token', help='Authentication token')
+    parser.add_argument('--stream', action='store_true',
+                       help='Read rows lazily and upload batches from memory '
+                            '(constant memory, no temp files)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Number of batches uploaded in parallel (default: 1)')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='Adapt the batch size to server latency and errors, '
+                            'starting at --batch-size')
+    parser.add_argument('--target-latency', type=float, default=5.0,
+                       help='Adaptive mode: grow batches while responses take less '
+                            'than this many seconds (default: 5)')
+    parser.add_argument('--max-batch-size', type=int, default=500,
+                       help='Adaptive mode: largest batch size to use (default: 500)')
+    parser.add_argument('--timeout', type=float, default=120.0,
+                       help='Request timeout per batch in seconds (default: 120)')
+    parser.add_argument('--retries', type=int, default=3,
+                       help='Retries with exponential backoff for connect timeouts, connection '
+                            'errors and 5xx responses (default: 3); read timeouts are not retried')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip rows already uploaded by a previous run of the same file')
+    parser.add_argument('--journal-dir', default=str(DEFAULT_JOURNAL_DIR),
+                       help='Directory for checkpoint journals (default: scripts/upload-journals)')
+    parser.add_argument('--dedupe', action='store_true',
+                       help='Skip rows already uploaded by earlier runs and record uploaded rows')
+    parser.add_argument('--manifest-dir', default=str(DEFAULT_MANIFEST_DIR),
+                       help='Directory for --dedupe row fingerprints (default: scripts/upload-manifests)')
     
     args = parser.parse_args()
     
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.adaptive and args.max_batch_size < args.batch_size:
+        parser.error('--max-batch-size must not be smaller than --batch-size')
+    
     if not os.path.exists(args.csv_file):
         print(f"Error: File not found: {args.csv_file}")
         sys.exit(1)
@@ -53,32 +128,353 @@ def parse_args() -> argparse.Namespace:
     return args
 
 
-def split_csv_into_batches(csv_file: str, batch_size: int) -> List[Dict[str, Any]]:
+def split_csv_into_batches(csv_file: str, batch_size: int, completed: 'RowRanges' = None,
+                           manifest: 'RowManifest' = None) -> List[Dict[str, Any]]:
     """Split CSV file into batches."""
-    batches = []
-    
-    with open(csv_file, 'r', encoding='utf-8') as f:
+    return list(iter_csv_batches(csv_file, batch_size, completed, manifest))
+
+
+def iter_csv_rows(csv_file: str) -> Iterator[List[str]]:
+    """Lazily yield the header row, then every non-empty data row."""
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
         reader = csv.reader(f)
-        header = next(reader)
-        rows = list(reader)
-    
-    # Filter out empty rows
-    rows = [row for row in rows if any(cell.strip() for cell in row)]
-    
-    total_rows = len(rows)
-    
-    for i in range(0, total_rows, batch_size):
-        batch_rows = rows[i:i + batch_size]
-        batches.append({
-            'number': (i // batch_size) + 1,
-            'start_row': i + 1,
-            'end_row': min(i + batch_size, total_rows),
-            'header': header,
-            'rows': batch_rows,
-            'row_count': len(batch_rows)
-        })
+        yield next(reader)
+        
+        for row in reader:
+            # Skip empty rows
+            if any(cell.strip() for cell in row):
+                yield row
+
+
+class RowRanges:
+    """A set of row numbers stored as sorted, merged (start, end) ranges."""
+    
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        self._starts = []
+        self._ends = []
+        for start, end in sorted(ranges):
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+    
+    def __contains__(self, row_number: int) -> bool:
+        i = bisect.bisect_right(self._starts, row_number) - 1
+        return i >= 0 and row_number <= self._ends[i]
+    
+    @property
+    def row_count(self) -> int:
+        return sum(end - start + 1 for start, end in zip(self._starts, self._ends))
+
+
+def row_fingerprint(header: List[str], row: List[str]) -> Tuple[str, str]:
+    """
+    Get the (media type, fingerprint) of a CSV row.
+
+    Cells are keyed by lower-cased column name, whitespace is trimmed and
+    collapsed and empty cells are dropped, so reordered columns or
+    reformatted whitespace in a new export do not count as changes.
+    """
+    fields = {}
+    for name, value in zip(header, row):
+        value = ' '.join(unicodedata.normalize('NFC', value).split())
+        if value:
+            fields[name.strip().lower()] = value
+    
+    media_type = fields.get('mediatype', 'unknown').lower()
+    canonical = json.dumps(sorted(fields.items()), ensure_ascii=False)
+    return media_type, hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class PendingRows:
+    """
+    Numbered data rows of a CSV file that still need uploading.
+
+    Rows are numbered from 1 in file order (blank rows excluded), so
+    numbers stay stable between runs. Rows in `completed` and, if a
+    manifest is given, rows it already has are skipped. take() returns
+    rows in file order, so a batch's row range only spans rows that are
+    in the batch or skipped.
+    """
+    
+    def __init__(self, csv_file: str, completed: RowRanges = None, manifest: 'RowManifest' = None):
+        rows = iter_csv_rows(csv_file)
+        self.header = next(rows)
+        self._manifest = manifest
+        self._rows = self._pending(enumerate(rows, 1), completed)
+    
+    def _pending(self, numbered_rows, completed):
+        for number, row in numbered_rows:
+            if completed is not None and number in completed:
+                continue
+            fingerprint = None
+            if self._manifest is not None:
+                fingerprint = row_fingerprint(self.header, row)
+                if self._manifest.contains(fingerprint):
+                    continue
+            yield number, row, fingerprint
+    
+    def take(self, size: int) -> List[Tuple[int, List[str], Tuple[str, str]]]:
+        """
+        Take up to `size` rows as (row_number, row, fingerprint) entries.
+
+        The fingerprint is None without a manifest. Returns an empty list
+        once the file is exhausted.
+        """
+        return list(islice(self._rows, size))
+
+
+def make_batch(number: int, header: List[str], entries: List[Tuple[int, List[str], Any]],
+               **extra: Any) -> Dict[str, Any]:
+    """Build a batch dict from PendingRows entries."""
+    return {
+        'number': number,
+        'start_row': entries[0][0],
+        'end_row': entries[-1][0],
+        'header': header,
+        'rows': [row for _, row, _ in entries],
+        'row_count': len(entries),
+        'entries': entries,
+        **extra
+    }
+
+
+def iter_csv_batches(csv_file: str, batch_size: int, completed: RowRanges = None,
+                     manifest: 'RowManifest' = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield batches from a CSV file, skipping `completed` rows and
+    rows already in `manifest`.
+
+    Only one batch of rows is held in memory at a time, so this works for
+    exports of any size.
+    """
+    pending = PendingRows(csv_file, completed, manifest)
+    batch_number = 0
+    
+    while True:
+        entries = pending.take(batch_size)
+        if not entries:
+            return
+        
+        batch_number += 1
+        yield make_batch(batch_number, pending.header, entries)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether a failed upload was a timeout, connection error or 5xx."""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return False
+
+
+class AdaptiveBatcher:
+    """
+    Yields batches whose size follows the server's response (AIMD).
+
+    The size grows by half the initial size after each batch answered
+    within `target_latency` and halves on a timeout, connection error or
+    5xx. The rows of such a failed batch are queued again and uploaded at
+    the smaller size, unless it timed out waiting for the answer: the
+    server may have imported it, so it is left to --resume. Safe to use
+    from several upload threads.
+    """
+    
+    def __init__(self, csv_file: str, initial_size: int, target_latency: float,
+                 max_size: int = 500, min_size: int = 1, completed: RowRanges = None,
+                 manifest: 'RowManifest' = None):
+        self._pending = PendingRows(csv_file, completed, manifest)
+        self._number = 0
+        # Rows of failed batches waiting for a retry: (entries, attempt)
+        self._retry = deque()
+        self._lock = threading.Lock()
+        
+        self.size = initial_size
+        self.step = max(1, initial_size // 2)
+        self.target_latency = target_latency
+        self.max_size = max_size
+        self.min_size = min_size
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> Dict[str, Any]:
+        """
+        Get the next batch at the current size, retried rows first.
+
+        StopIteration only means nothing is ready now; rows from batches
+        still in flight may be queued again later.
+        """
+        with self._lock:
+            if self._retry:
+                entries, attempt = self._retry.popleft()
+                if len(entries) > self.size:
+                    self._retry.appendleft((entries[self.size:], attempt))
+                    entries = entries[:self.size]
+            else:
+                entries = self._pending.take(self.size)
+                if not entries:
+                    raise StopIteration
+                attempt = 0
+            
+            self._number += 1
+            return make_batch(self._number, self._pending.header, entries, attempt=attempt)
+    
+    def observe(self, batch: Dict[str, Any], error: Exception = None):
+        """
+        Adjust the batch size from a finished upload.
+
+        Sets batch['requeued'] when its rows were queued for a retry.
+        """
+        with self._lock:
+            batch['requeued'] = False
+            if error is None:
+                if batch['latency_ms'] / 1000 < self.target_latency:
+                    self.size = min(self.max_size, self.size + self.step)
+                return
+            
+            if not is_retryable_error(error):
+                return
+            self.size = max(self.min_size, self.size // 2)
+            if isinstance(error, requests.exceptions.ReadTimeout):
+                return
+            if batch['attempt'] < MAX_ADAPTIVE_RETRIES:
+                self._retry.append((batch['entries'], batch['attempt'] + 1))
+                batch['requeued'] = True
+
+
+def file_sha256(path: str) -> str:
+    """Hash a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadJournal:
+    """
+    Checkpoint journal of finished batches for one CSV file.
+
+    Stored as JSON lines in <journal_dir>/<sha256 of the file>.jsonl, one
+    line per finished batch with its row range and outcome. Lines are
+    flushed to disk as each batch finishes, so an interrupted run can be
+    continued with --resume. Editing the file changes its hash and starts
+    a new journal.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_file(cls, csv_file: str, journal_dir: str) -> 'UploadJournal':
+        return cls(Path(journal_dir) / f"{file_sha256(csv_file)}.jsonl")
+    
+    def completed_rows(self) -> RowRanges:
+        """Get the rows of every batch the journal records as uploaded."""
+        ranges = []
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial line from an interrupted write
+                    if entry.get('success'):
+                        ranges.append((entry['start_row'], entry['end_row']))
+        return RowRanges(ranges)
+    
+    def open(self, resume: bool):
+        """Open for appending, or start a new journal unless resuming."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
     
-    return batches
+    def record(self, batch: Dict[str, Any], error: Exception = None):
+        """Append a finished batch. Safe to call from upload threads."""
+        entry = {
+            'start_row': batch['start_row'],
+            'end_row': batch['end_row'],
+            'success': error is None,
+            'finished_at': datetime.now().isoformat(timespec='seconds')
+        }
+        if error is not None:
+            entry['error'] = str(error)
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class RowManifest:
+    """
+    Fingerprints of rows already uploaded, one file per media type.
+
+    <manifest_dir>/<media type>.txt holds one fingerprint per line (see
+    row_fingerprint). Files are loaded on first use and appended to as
+    batches succeed, so re-importing an updated export only sends new and
+    changed rows.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.skipped_rows = 0
+        self._seen: Dict[str, set] = {}
+        self._lock = threading.Lock()
+    
+    def _path(self, media_type: str) -> Path:
+        return self.directory / f"{re.sub(r'[^a-z0-9_-]', '_', media_type)}.txt"
+    
+    def _fingerprints(self, media_type: str) -> set:
+        seen = self._seen.get(media_type)
+        if seen is None:
+            path = self._path(media_type)
+            seen = set(path.read_text(encoding='utf-8').split()) if path.exists() else set()
+            self._seen[media_type] = seen
+        return seen
+    
+    def contains(self, fingerprint: Tuple[str, str]) -> bool:
+        """Whether a row was uploaded before. Counts hits in skipped_rows."""
+        media_type, digest = fingerprint
+        with self._lock:
+            found = digest in self._fingerprints(media_type)
+            if found:
+                self.skipped_rows += 1
+            return found
+    
+    def add(self, fingerprints: Iterable[Tuple[str, str]]):
+        """Record uploaded rows. Safe to call from upload threads."""
+        by_type: Dict[str, List[str]] = {}
+        for media_type, digest in fingerprints:
+            by_type.setdefault(media_type, []).append(digest)
+        
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for media_type, digests in by_type.items():
+                seen = self._fingerprints(media_type)
+                new = [digest for digest in digests if digest not in seen]
+                if not new:
+                    continue
+                seen.update(new)
+                with open(self._path(media_type), 'a', encoding='utf-8') as f:
+                    f.write(''.join(f"{digest}\n" for digest in new))
+
+
+def serialize_batch(batch: Dict[str, Any]) -> bytes:
+    """Serialize a batch (header + rows) to CSV bytes in memory."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(batch['header'])
+    writer.writerows(batch['rows'])
+    return buffer.getvalue().encode('utf-8')
 
 
 def create_temp_csv_file(batch: Dict[str, Any], batch_number: int) -> str:
@@ -96,22 +492,218 @@ def create_temp_csv_file(batch: Dict[str, Any], batch_number: int) -> str:
     return str(temp_file)
 
 
-def upload_batch(api_url: str, batch_file: str, auth_token: str = None) -> Dict[str, Any]:
+def upload_batch(client: HTTPClient, api_url: str, batch_file: str,
+                 on_call: Callable[[CallRecord], None] = None,
+                 cancel_token: CancellationToken = None) -> Dict[str, Any]:
     """Upload a batch to the API."""
+    with open(batch_file, 'rb') as f:
+        return upload_batch_data(client, api_url, os.path.basename(batch_file), f, on_call, cancel_token)
+
+
+def upload_batch_data(client: HTTPClient, api_url: str, filename: str, data,
+                      on_call: Callable[[CallRecord], None] = None,
+                      cancel_token: CancellationToken = None) -> Dict[str, Any]:
+    """Upload a batch given as bytes or a file-like object."""
     url = f"{api_url}/api/upload/csv"
     
-    headers = {}
-    if auth_token:
-        headers['Authorization'] = f'Bearer {auth_token}'
-    
-    with open(batch_file, 'rb') as f:
-        files = {'file': (os.path.basename(batch_file), f, 'text/csv')}
-        response = requests.post(url, files=files, headers=headers)
+    files = {'file': (filename, data, 'text/csv')}
+    # The server may have imported a batch that timed out waiting for the
+    # answer; sending it again would import its rows twice
+    response = client.post(url, files=files, on_call=on_call, cancel_token=cancel_token,
+                           retry_read_timeouts=False)
     
     response.raise_for_status()
     return response.json()
 
 
+def create_client(args: argparse.Namespace) -> HTTPClient:
+    """
+    Create the upload client: one keep-alive connection per worker.
+
+    A 429 pauses every worker until its Retry-After period has passed.
+    Connect timeouts, connection errors and 5xx responses are retried up
+    to args.retries times with exponential backoff, except in adaptive
+    mode where the batcher retries them at a smaller size. Read timeouts
+    are never retried (see upload_batch_data).
+    """
+    headers = {'Authorization': f'Bearer {args.auth_token}'} if args.auth_token else None
+    return HTTPClient(
+        headers=headers,
+        timeout=args.timeout,
+        pool_size=max(1, args.concurrency),
+        max_retries=0 if args.adaptive else args.retries
+    )
+
+
+def send_batch(batch: Dict[str, Any], args: argparse.Namespace, client: HTTPClient,
+               cancel_token: CancellationToken = None) -> Dict[str, Any]:
+    """
+    Upload one batch.
+
+    Uses a temp file or in-memory data depending on --stream. Stores the
+    latency of the last attempt in batch['latency_ms'] and the number of
+    retried attempts in batch['retries']. A cancelled `cancel_token`
+    aborts the upload in progress.
+    """
+    batch['retries'] = 0
+    
+    def on_call(record: CallRecord):
+        batch['latency_ms'] = round(record.latency * 1000, 1)
+        batch['retries'] = record.attempt
+    
+    temp_file = None if args.stream else create_temp_csv_file(batch, batch['number'])
+    try:
+        if temp_file:
+            return upload_batch(client, args.api_url, temp_file, on_call, cancel_token)
+        return upload_batch_data(
+            client,
+            args.api_url,
+            f"batch-{batch['number']}.csv",
+            serialize_batch(batch),
+            on_call,
+            cancel_token
+        )
+    finally:
+        # Clean up temp file
+        if temp_file and os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def record_batch_result(results: Dict[str, Any], batch: Dict[str, Any],
+                        response: Dict[str, Any] = None, error: Exception = None):
+    """Add one batch outcome to the results totals and print it."""
+    if error is not None and batch.get('requeued'):
+        results['retried_batches'] += 1
+        results['batch_results'].append({
+            'batch': batch['number'],
+            'success': False,
+            'retried': True,
+            'rows': batch['row_count'],
+            'latency_ms': batch.get('latency_ms'),
+            'error': str(error)
+        })
+        
+        print(f"  ↻ Retrying rows {batch['start_row']}-{batch['end_row']} in smaller batches: {error}")
+        return
+    
+    if error is not None:
+        results['failed_batches'] += 1
+        results['batch_results'].append({
+            'batch': batch['number'],
+            'success': False,
+            'rows': batch['row_count'],
+            'latency_ms': batch.get('latency_ms'),
+            'error': str(error)
+        })
+        
+        print(f"  ✗ Failed: {error}")
+        return
+    
+    results['successful_batches'] += 1
+    results['rows_uploaded'] += batch['row_count']
+    success_count = response.get('SuccessCount') or response.get('successCount') or 0
+    error_count = response.get('ErrorCount') or response.get('errorCount') or 0
+    
+    results['total_successful'] += success_count
+    results['total_errors'] += error_count
+    
+    results['batch_results'].append({
+        'batch': batch['number'],
+        'success': True,
+        'rows': batch['row_count'],
+        'latency_ms': batch.get('latency_ms'),
+        'success_count': success_count,
+        'error_count': error_count,
+        'message': response.get('Message') or response.get('message')
+    })
+    
+    retries = f" (after {batch['retries']} retries)" if batch.get('retries') else ''
+    print(f"  ✓ Success: {success_count} items imported{retries}")
+    if error_count > 0:
+        print(f"  ⚠ Warnings: {error_count} errors in batch")
+        errors = response.get('Errors', [])
+        for err in errors[:3]:
+            print(f"    - {err}")
+        if len(errors) > 3:
+            print(f"    ... and {len(errors) - 3} more errors")
+
+
+def run_batches(batches: Iterable[Dict[str, Any]], args: argparse.Namespace, client: HTTPClient,
+                on_submit: Callable[[Dict[str, Any]], None],
+                on_result: Callable[[Dict[str, Any], Dict[str, Any], Exception], None],
+                on_complete: Callable[[Dict[str, Any], Dict[str, Any], Exception], None] = None,
+                cancel_token: CancellationToken = None):
+    """
+    Upload batches with at most args.concurrency requests in flight.
+
+    Each worker slot waits args.delay between its batches, so the request
+    rate per slot is the same as a sequential run. Results are passed to
+    on_result in batch order even when uploads finish out of order, and
+    at most 2 * concurrency batches are held in memory at once.
+    
+    on_complete, if given, is called from the upload thread as soon as a
+    batch finishes. `batches` is asked for more after every completion,
+    so it may produce batches again after signalling it is exhausted.
+    
+    If the run is interrupted (Ctrl+C), `cancel_token` is cancelled so
+    uploads in progress are aborted instead of being waited for.
+    """
+    concurrency = max(1, args.concurrency)
+    cancel_token = cancel_token or CancellationToken()
+    
+    def worker(batch):
+        # The first wave starts immediately; later batches take over a slot
+        if batch['number'] > concurrency and args.delay > 0:
+            cancel_token.wait(args.delay)
+        # Rows requeued by the adaptive batcher back off before retrying
+        if batch.get('attempt'):
+            cancel_token.wait(backoff_delay(batch['attempt'] - 1))
+        try:
+            response = send_batch(batch, args, client, cancel_token)
+        except Exception as error:
+            if on_complete:
+                on_complete(batch, None, error)
+            raise
+        if on_complete:
+            on_complete(batch, response, None)
+        return response
+    
+    batch_iter = iter(batches)
+    in_flight = {}
+    finished = {}
+    next_number = 1
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            while True:
+                while len(in_flight) < concurrency and len(finished) < concurrency:
+                    batch = next(batch_iter, None)
+                    if batch is None:
+                        break
+                    on_submit(batch)
+                    in_flight[executor.submit(worker, batch)] = batch
+            
+                if not in_flight:
+                    break
+            
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        finished[batch['number']] = (batch, future.result(), None)
+                    except Exception as error:
+                        finished[batch['number']] = (batch, None, error)
+            
+                # Report in order; later batches wait for earlier ones
+                while next_number in finished:
+                    on_result(*finished.pop(next_number))
+                    next_number += 1
+        except BaseException:
+            # Abort uploads in flight; the executor would otherwise wait for them
+            cancel_token.cancel("Upload interrupted")
+            raise
+
+
 def main():
     """Main execution."""
     args = parse_args()
@@ -120,96 +712,97 @@ def main():
     print('Batch CSV Upload for ProjectLoopbreaker')
     print('=' * 60)
     print(f"CSV File:       {args.csv_file}")
-    print(f"Batch Size:     {args.batch_size} rows")
+    if args.adaptive:
+        print(f"Batch Size:     adaptive, {args.batch_size}-{args.max_batch_size} rows "
+              f"(target latency {args.target_latency}s)")
+    else:
+        print(f"Batch Size:     {args.batch_size} rows")
     print(f"Delay:          {args.delay}s")
     print(f"API URL:        {args.api_url}")
     print(f"Auth:           {'Yes (token provided)' if args.auth_token else 'No'}")
+    print(f"Mode:           {'Streaming (in-memory batches)' if args.stream else 'Temp files'}")
+    print(f"Concurrency:    {args.concurrency}")
+    
+    journal = UploadJournal.for_file(args.csv_file, args.journal_dir)
+    print(f"Journal:        {journal.path}")
     print('=' * 60)
     print()
     
-    # Read and split CSV
-    print('Reading CSV file...')
-    batches = split_csv_into_batches(args.csv_file, args.batch_size)
+    completed = None
+    if args.resume:
+        completed = journal.completed_rows()
+        if completed.row_count:
+            print(f"Resuming: skipping {completed.row_count} rows already uploaded")
+        else:
+            print('Resuming: no completed batches in the journal, starting from row 1')
+    
+    manifest = RowManifest(args.manifest_dir) if args.dedupe else None
     
-    total_rows = sum(b['row_count'] for b in batches)
-    print(f"Total rows to process: {total_rows}")
-    print(f"Split into {len(batches)} batches")
+    # Read and split CSV
+    batcher = None
+    if args.adaptive:
+        # Batch sizes depend on responses, so batches are always built lazily
+        print('Streaming CSV file with adaptive batch sizes...')
+        batcher = AdaptiveBatcher(args.csv_file, args.batch_size, args.target_latency,
+                                  max_size=args.max_batch_size, completed=completed,
+                                  manifest=manifest)
+        batches = batcher
+        batch_count = None
+    elif args.stream:
+        # Batches are read lazily; the total is only known at the end
+        print('Streaming CSV file...')
+        batches = iter_csv_batches(args.csv_file, args.batch_size, completed, manifest)
+        batch_count = None
+    else:
+        print('Reading CSV file...')
+        batches = split_csv_into_batches(args.csv_file, args.batch_size, completed, manifest)
+        batch_count = len(batches)
+        
+        total_rows = sum(b['row_count'] for b in batches)
+        print(f"Total rows to process: {total_rows}")
+        print(f"Split into {batch_count} batches")
     print()
     
     # Track results
     results = {
-        'total_batches': len(batches),
+        'total_batches': batch_count or 0,
         'successful_batches': 0,
         'failed_batches': 0,
+        'retried_batches': 0,
+        'rows_uploaded': 0,
         'total_successful': 0,
         'total_errors': 0,
         'batch_results': []
     }
     
-    # Process each batch
-    for batch in batches:
-        print(f"Processing batch {batch['number']}/{len(batches)} "
-              f"(rows {batch['start_row']}-{batch['end_row']})...")
-        
-        temp_file = create_temp_csv_file(batch, batch['number'])
-        
-        try:
-            response = upload_batch(args.api_url, temp_file, args.auth_token)
-            
-            results['successful_batches'] += 1
-            success_count = response.get('SuccessCount') or response.get('successCount') or 0
-            error_count = response.get('ErrorCount') or response.get('errorCount') or 0
-            
-            results['total_successful'] += success_count
-            results['total_errors'] += error_count
-            
-            results['batch_results'].append({
-                'batch': batch['number'],
-                'success': True,
-                'success_count': success_count,
-                'error_count': error_count,
-                'message': response.get('Message') or response.get('message')
-            })
-            
-            print(f"  ✓ Success: {success_count} items imported")
-            if error_count > 0:
-                print(f"  ⚠ Warnings: {error_count} errors in batch")
-                errors = response.get('Errors', [])
-                for err in errors[:3]:
-                    print(f"    - {err}")
-                if len(errors) > 3:
-                    print(f"    ... and {len(errors) - 3} more errors")
-            
-        except requests.exceptions.RequestException as error:
-            results['failed_batches'] += 1
-            results['batch_results'].append({
-                'batch': batch['number'],
-                'success': False,
-                'error': str(error)
-            })
-            
-            print(f"  ✗ Failed: {error}")
-        
-        except Exception as error:
-            results['failed_batches'] += 1
-            results['batch_results'].append({
-                'batch': batch['number'],
-                'success': False,
-                'error': str(error)
-            })
-            
-            print(f"  ✗ Failed: {error}")
-        
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-        
-        # Wait before next batch (except for the last one)
-        if batch['number'] < len(batches):
-            print(f"  Waiting {args.delay}s before next batch...")
-            time.sleep(args.delay)
-            print()
+    client = create_client(args)
+    
+    def on_result(batch, response, error):
+        batch_label = f"{batch['number']}/{batch_count}" if batch_count else str(batch['number'])
+        print(f"Batch {batch_label} (rows {batch['start_row']}-{batch['end_row']}):")
+        record_batch_result(results, batch, response, error)
+    
+    def on_submit(batch):
+        if batch_count is None:
+            results['total_batches'] += 1
+    
+    def on_complete(batch, response, error):
+        # Runs in the upload thread, so finished batches are journaled
+        # even if the run is interrupted before they are reported
+        if batcher:
+            batcher.observe(batch, error)
+        journal.record(batch, error)
+        # Row-level errors can't be matched to rows, so only clean batches
+        # are remembered; the rest are sent again next time
+        if manifest and error is None and not (response.get('ErrorCount') or response.get('errorCount')):
+            manifest.add(fingerprint for _, _, fingerprint in batch['entries'])
+    
+    journal.open(resume=args.resume)
+    try:
+        run_batches(batches, args, client, on_submit, on_result, on_complete)
+    finally:
+        client.close()
+        journal.close()
     
     # Clean up temp directory
     temp_dir = Path(__file__).parent / 'temp-batches'
@@ -227,16 +820,35 @@ def main():
     print(f"Total Batches:        {results['total_batches']}")
     print(f"Successful Batches:   {results['successful_batches']}")
     print(f"Failed Batches:       {results['failed_batches']}")
+    if args.adaptive:
+        print(f"Retried Batches:      {results['retried_batches']}")
+        print(f"Final Batch Size:     {batcher.size} rows")
     print(f"Total Items Imported: {results['total_successful']}")
     print(f"Total Errors:         {results['total_errors']}")
+    print(f"Rows Uploaded:        {results['rows_uploaded']}")
+    if completed is not None:
+        print(f"Skipped (resumed):    {completed.row_count} rows")
+    if manifest is not None:
+        print(f"Skipped (unchanged):  {manifest.skipped_rows} rows")
     print('=' * 60)
     
+    if args.adaptive:
+        print('\nBatch Sizes and Latencies:')
+        print(f"  {'Batch':>6} {'Rows':>6} {'Latency':>10}  Result")
+        for result in results['batch_results']:
+            latency = f"{result['latency_ms']:.0f}ms" if result['latency_ms'] is not None else '-'
+            outcome = 'ok' if result['success'] else ('retried' if result.get('retried') else 'failed')
+            print(f"  {result['batch']:>6} {result['rows']:>6} {latency:>10}  {outcome}")
+    
     if results['failed_batches'] > 0:
         print('\nFailed Batches:')
         for result in results['batch_results']:
-            if not result['success']:
+            if not result['success'] and not result.get('retried'):
                 print(f"  Batch {result['batch']}: {result['error']}")
     
+    if results['failed_batches'] > 0:
+        print('\nRe-run with --resume to retry only the rows that were not uploaded.')
+    
     print('\nDone!')
 
 
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Cooperative cancellation with an optional deadline.
+
+A CancellationToken is shared by everything working on one job. Loops
+check it between items; blocking calls register an abort callback with
+on_cancel() so a cancel (or the deadline passing) stops them mid-flight:
+
+- HTTPClient shuts down the socket of the request in progress
+- database connections cancel the running statement (the same
+  protocol-level cancel as pg_cancel_backend) and get a
+  statement_timeout matching the time left
+
+Usage:
+    token = CancellationToken(timeout=600)
+    with token.cancel_with(conn.cancel):
+        cursor.execute(...)
+    token.raise_if_cancelled()
+    token.close()
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+
+class OperationCancelled(Exception):
+    """Raised when work is stopped by its cancellation token."""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancel flag with an optional deadline.
+
+    Callbacks registered with on_cancel() run once, in the thread that
+    cancels (a timer thread when the deadline passes), so they must be
+    short and must not raise. Call close() when the work is done to stop
+    the deadline timer.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        Args:
+            timeout: Seconds from now until the token cancels itself;
+                None for no deadline
+        """
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+        self._timer = None
+        if timeout is not None:
+            self._timer = threading.Timer(timeout, self.cancel, args=(self._deadline_reason(),))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _deadline_reason(self) -> str:
+        return f"Job exceeded its {self.timeout:g}s deadline"
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(self._deadline_reason())
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Job cancelled") -> None:
+        """Cancel the token and run its abort callbacks. Later calls do nothing."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # Aborting is best effort; the cancel itself has happened
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None if there is none."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise OperationCancelled(self.reason)
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep for up to `seconds`, waking early on cancel. Returns whether it was cancelled."""
+        self._event.wait(seconds)
+        return self.cancelled
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run `callback` when the token is cancelled (now, if it already is).
+
+        Returns a function that unregisters the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = self._next_id
+                self._next_id += 1
+                self._callbacks[callback_id] = callback
+                return lambda: self._callbacks.pop(callback_id, None)
+        callback()
+        return lambda: None
+
+    @contextmanager
+    def cancel_with(self, abort: Callable[[], None]) -> Iterator[None]:
+        """
+        Call `abort` if the token is cancelled while the block runs.
+
+        If the block fails because it was aborted, OperationCancelled is
+        raised in place of the error.
+        """
+        unregister = self.on_cancel(abort)
+        try:
+            yield
+        except Exception:
+            self.raise_if_cancelled()
+            raise
+        finally:
+            unregister()
+
+    def close(self) -> None:
+        """Stop the deadline timer; the token keeps its current state."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+def bind_connection(token: Optional[CancellationToken], conn) -> Callable[[], None]:
+    """
+    Tie a freshly opened psycopg2 connection to a token.
+
+    Sets statement_timeout (committed, so it lasts for the session) to
+    the time left before the deadline, and cancels the running statement
+    when the token is cancelled. Returns a function that unregisters the
+    cancel hook; call it before closing the connection.
+    """
+    if token is None:
+        return lambda: None
+    token.raise_if_cancelled()
+    remaining = token.remaining()
+    if remaining is not None:
+        with conn.cursor() as cursor:
+            cursor.execute("SET statement_timeout = %s", (max(1, int(remaining * 1000)),))
+        conn.commit()
+    return token.on_cancel(conn.cancel)
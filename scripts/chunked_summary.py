@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Map-reduce summarization helpers for long notes.
+
+Notes longer than CHUNK_THRESHOLD characters are split into chunks at
+their top-level headings (# and ##). Each chunk is summarized on its own
+(map), and the chunk summaries are combined into the final 1-2 sentence
+description (reduce).
+
+Chunk boundaries only depend on nearby text, so editing one section
+leaves the other chunks unchanged:
+
+- small sections are merged with the previous chunk
+- sections longer than CHUNK_CHARS are cut at paragraph breaks chosen by
+  paragraph content, not position
+
+Summaries are cached by content hash in a SummaryCache, so a re-run only
+sends the chunks that changed, plus the reduce step.
+
+The AI calls live with the callers: AIDescriptionGenerator
+(normalize_obsidian_vault.py) for the vault job, and
+api/services/summaries.py for the single-file endpoint.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Union
+
+# Notes longer than this are summarized chunk by chunk
+CHUNK_THRESHOLD = 4000
+# Longest chunk sent in one request
+CHUNK_CHARS = 3000
+# Sections shorter than this are merged into the previous chunk
+MIN_CHUNK_CHARS = 600
+# Longest chunk summary kept
+CHUNK_SUMMARY_MAX_CHARS = 1000
+
+CHUNK_SUMMARY_PROMPT = """Summarize this section of a longer note in 2-3 sentences. Keep names, key terms and conclusions. Output only the summary, nothing else.
+
+Note title: {title}
+
+Section:
+{content}"""
+
+REDUCE_PROMPT = """Below are summaries of consecutive sections of one note. Write a 1-2 sentence summary of the whole note. Be concise and direct. Output only the summary, nothing else.
+
+Title: {title}
+
+Section summaries:
+{summaries}"""
+
+DEFAULT_SUMMARY_CACHE_DIR = Path(__file__).parent / "summary-cache"
+
+# Bump when the prompts change so cached summaries are regenerated
+PROMPT_VERSION = 1
+
+HEADING_PATTERN = re.compile(r'^#{1,2}\s+\S')
+FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# On average one paragraph in this many ends a chunk of a long section
+ANCHOR_EVERY = 4
+
+
+def split_sections(body: str) -> List[str]:
+    """Split markdown before every # or ## heading outside code fences."""
+    sections: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    for line in body.splitlines(keepends=True):
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        elif not in_fence and HEADING_PATTERN.match(line) and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return [section for section in sections if section.strip()]
+
+
+def _split_long_section(section: str, max_chars: int, min_chars: int) -> List[str]:
+    """
+    Cut a long section at paragraph breaks.
+
+    Besides the size limit, a chunk ends after any paragraph whose CRC
+    picks it as an anchor, so an edit only moves boundaries up to the
+    next anchor instead of shifting every later chunk.
+    """
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            pieces.append("\n\n".join(current))
+        current, size = [], 0
+
+    for paragraph in PARAGRAPH_BREAK.split(section):
+        if not paragraph.strip():
+            continue
+        if current and size + len(paragraph) > max_chars:
+            flush()
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current.append(paragraph)
+        size += len(paragraph) + 2
+        if size >= min_chars and zlib.crc32(paragraph.encode("utf-8")) % ANCHOR_EVERY == 0:
+            flush()
+    flush()
+    return pieces
+
+
+def split_into_chunks(body: str, max_chars: int = CHUNK_CHARS, min_chars: int = MIN_CHUNK_CHARS) -> List[str]:
+    """Split a note body into chunks of at most `max_chars` characters."""
+    chunks: List[str] = []
+    for section in split_sections(body):
+        section = section.strip()
+        if len(section) > max_chars:
+            chunks.extend(_split_long_section(section, max_chars, min_chars))
+        elif chunks and (len(section) < min_chars or len(chunks[-1]) < min_chars) \
+                and len(chunks[-1]) + len(section) + 2 <= max_chars:
+            chunks[-1] = f"{chunks[-1]}\n\n{section}"
+        else:
+            chunks.append(section)
+    return chunks
+
+
+def build_chunk_prompt(title: str, chunk: str) -> str:
+    return CHUNK_SUMMARY_PROMPT.format(title=title, content=chunk)
+
+
+def build_reduce_prompt(title: str, summaries: List[str]) -> str:
+    numbered = "\n".join(f"{number}. {summary}" for number, summary in enumerate(summaries, 1))
+    return REDUCE_PROMPT.format(title=title, summaries=numbered)
+
+
+class SummaryCache:
+    """
+    LRU cache of chunk and reduce summaries in one JSON file.
+
+    Keys hash the model, prompt version and full prompt, so a changed
+    chunk, title or model is a miss. Thread-safe.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_entries: int = 50_000):
+        self.path = Path(directory) / "summaries.json"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        if self.path.exists():
+            try:
+                self._entries = OrderedDict(json.loads(self.path.read_text(encoding="utf-8")))
+            except (OSError, ValueError, TypeError) as e:
+                # Only a cache: a truncated or hand-edited file costs some requests, not startup
+                print(f"WARNING: Could not read summary cache {self.path} ({e}); starting empty")
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        """Cache key for the summary `model` gives for `prompt`."""
+        data = f"{PROMPT_VERSION}\0{model}\0{prompt}".encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._dirty = True
+            return summary
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Write the cache to disk if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(list(self._entries.items())), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "SummaryCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,52 @@
+"""
+Shared pytest fixtures for the script tests.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+import pytest
+
+# (status, headers, payload) answered to one POST body
+Reply = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture
+def local_server():
+    """
+    Start local HTTP endpoints for a test.
+
+    Call the fixture with a function that takes a POST body and returns
+    (status, headers, payload); it returns the endpoint's base URL. The
+    function runs on the server's request threads. All endpoints are
+    stopped when the test ends.
+    """
+    servers = []
+
+    def start(reply: Callable[[bytes], Reply]) -> str:
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                status, headers, payload = reply(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass  # The client hung up or timed out
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
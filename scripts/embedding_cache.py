@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for embedding vectors.
+
+Vectors are keyed by (model, dimensions, SHA-256 of the embedded text),
+so re-embedding unchanged content never calls the API again. Each
+(model, dimensions, dtype) combination gets its own directory holding:
+
+    vectors.bin   memory-mapped array, one row per cached vector
+    scales.bin    per-row float32 scale (int8 storage only)
+    index.json    content hash -> row, in least-recently-used order
+
+Rows are stored as float16 (2 bytes per dimension) or int8 with a
+per-vector scale (1 byte per dimension + 4), and only the pages that
+are touched get loaded into RAM. When the cache holds `max_entries`
+vectors the least recently used one is evicted. An evicted row is only
+reused once flush() has written an index without it, so a crash before
+the flush can't leave the saved index pointing at another text's vector.
+
+Usage:
+    with EmbeddingCache("embedding-cache", "text-embedding-3-large", 1024) as cache:
+        key = cache.key(text)
+        vector = cache.get(key)
+        if vector is None:
+            cache.put(key, embed(text))
+"""
+
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+STORAGE_DTYPES = ("float16", "int8")
+
+# Rows added to the memory-mapped files each time they grow
+GROW_ROWS = 1024
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embedding vectors backed by memory-mapped files.
+
+    Not thread-safe; use it from one thread.
+    """
+
+    def __init__(self, directory: Union[str, Path], model: str, dimensions: int,
+                 dtype: str = "float16", max_entries: int = 100_000):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"dtype must be one of {STORAGE_DTYPES}, got {dtype!r}")
+        self.model = model
+        self.dimensions = dimensions
+        self.dtype = dtype
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        safe_model = re.sub(r"[^A-Za-z0-9._-]", "_", model)
+        self.path = Path(directory) / f"{safe_model}-{dimensions}-{dtype}"
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.path / "index.json"
+
+        # hash -> row, oldest first; freed rows are reused before growing
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        # Rows evicted since the last flush; the index on disk still maps them
+        self._pending_free: List[int] = []
+        self._rows = 0
+        if self._index_path.exists():
+            state = json.loads(self._index_path.read_text(encoding="utf-8"))
+            self._index = OrderedDict(state["entries"])
+            self._free = state["free"]
+            self._rows = state["rows"]
+
+        self._vectors = None
+        self._scales = None
+        self._dirty = False
+        self._open_arrays()
+
+        # Honor a smaller max_entries than the cache was built with
+        while len(self._index) > self.max_entries:
+            self._evict()
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Content hash used as the cache key for `text`."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """Storage used per cached vector."""
+        if self.dtype == "int8":
+            return self.dimensions + 4
+        return self.dimensions * 2
+
+    def _open_arrays(self) -> None:
+        if self._rows == 0:
+            self._vectors = self._scales = None
+            return
+        self._vectors = self._memmap("vectors.bin", self.dtype, (self._rows, self.dimensions))
+        if self.dtype == "int8":
+            self._scales = self._memmap("scales.bin", "float32", (self._rows,))
+
+    def _memmap(self, name: str, dtype: str, shape: tuple) -> np.memmap:
+        path = self.path / name
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        # Extend (sparsely) to the required size before mapping
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _allocate_row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        # Every row below this is indexed, free or pending
+        used = len(self._index) + len(self._pending_free)
+        if used >= self._rows:
+            if self._vectors is not None:
+                self._vectors.flush()
+                if self._scales is not None:
+                    self._scales.flush()
+            self._rows += GROW_ROWS
+            self._open_arrays()
+        return used
+
+    def _evict(self) -> None:
+        _, row = self._index.popitem(last=False)
+        self._pending_free.append(row)
+        self.evictions += 1
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Get a cached vector as float32, or None on a miss."""
+        row = self._index.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self._index.move_to_end(key)
+        self._dirty = True
+        self.hits += 1
+        if self.dtype == "int8":
+            return self._vectors[row].astype(np.float32) * self._scales[row]
+        return self._vectors[row].astype(np.float32)
+
+    def put(self, key: str, vector: Sequence[float]) -> None:
+        """Store a vector, evicting the least recently used one if full."""
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.dimensions,):
+            raise ValueError(f"Expected a vector of {self.dimensions} dimensions, got shape {vector.shape}")
+
+        row = self._index.get(key)
+        if row is None:
+            if len(self._index) >= self.max_entries:
+                self._evict()
+            row = self._allocate_row()
+            self._index[key] = row
+        else:
+            self._index.move_to_end(key)
+
+        if self.dtype == "int8":
+            scale = float(np.abs(vector).max()) / 127 or 1.0
+            self._vectors[row] = np.round(vector / scale).astype(np.int8)
+            self._scales[row] = scale
+        else:
+            self._vectors[row] = vector.astype(np.float16)
+        self._dirty = True
+
+    def flush(self) -> None:
+        """Write vectors and the index to disk."""
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._scales is not None:
+            self._scales.flush()
+        if self._dirty:
+            free = self._free + self._pending_free
+            state = {"rows": self._rows, "free": free, "entries": list(self._index.items())}
+            tmp_path = self._index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(state), encoding="utf-8")
+            tmp_path.replace(self._index_path)
+            self._free, self._pending_free = free, []
+            self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        self._vectors = self._scales = None
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Model cascade for AI descriptions.
+
+A fast, small model is asked first with a tight timeout. The larger
+model is only asked when the fast one fails, times out or gives a
+low-quality answer (see is_low_quality()).
+
+ModelCascade keeps a rolling window of latency and outcome per model.
+While the fast model's success rate is low, or its p95 latency is no
+better than the large model's, requests go straight to the large model.
+Every PROBE_EVERY requests still try the fast model, so it can recover.
+"""
+
+import math
+import re
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Timeout for the fast model; slower answers are escalated
+DEFAULT_FAST_TIMEOUT = 15.0
+
+# Requests per model the routing decision looks at
+WINDOW = 50
+MIN_SAMPLES = 10
+# Below this success rate the fast model is skipped
+MIN_SUCCESS_RATE = 0.6
+# While skipped, one request in this many still tries the fast model
+PROBE_EVERY = 20
+
+MIN_DESCRIPTION_WORDS = 4
+LOW_QUALITY_PATTERN = re.compile(
+    r"^(i'?m sorry|i am sorry|i cannot|i can'?t|as an ai\b)"
+    r"|write a 1-2 sentence summary|summarize this section"
+    r"|</?think>",
+    re.IGNORECASE
+)
+
+
+def is_low_quality(answer: Optional[str]) -> bool:
+    """Whether a description is empty, a refusal, an echo of the prompt or too short to use."""
+    if not answer or not answer.strip():
+        return True
+    if LOW_QUALITY_PATTERN.search(answer.strip()):
+        return True
+    return len(answer.split()) < MIN_DESCRIPTION_WORDS
+
+
+class ModelHealth:
+    """Latency and outcome of a model's most recent requests."""
+
+    def __init__(self, window: int = WINDOW):
+        self.requests = 0
+        self.successes = 0
+        self._recent: Deque[Tuple[float, bool]] = deque(maxlen=window)
+
+    def observe(self, latency: float, ok: bool) -> None:
+        self.requests += 1
+        self.successes += ok
+        self._recent.append((latency, ok))
+
+    @property
+    def samples(self) -> int:
+        return len(self._recent)
+
+    def success_rate(self) -> Optional[float]:
+        if not self._recent:
+            return None
+        return sum(ok for _, ok in self._recent) / len(self._recent)
+
+    def p95(self) -> Optional[float]:
+        if not self._recent:
+            return None
+        latencies = sorted(latency for latency, _ in self._recent)
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+
+class ModelCascade:
+    """
+    Orders models for each request, fastest first, from their recent
+    latency and success rate. Thread-safe.
+    """
+
+    def __init__(self, models: List[str], window: int = WINDOW):
+        """
+        Args:
+            models: Models to try in order, the fast model first; a
+                single model makes route() always return just that one
+            window: Requests per model the routing looks at
+        """
+        self.models = models
+        self.escalations = 0
+        self._health: Dict[str, ModelHealth] = {model: ModelHealth(window) for model in models}
+        self._routed = 0
+        self._lock = threading.Lock()
+
+    def _fast_model_lags(self) -> bool:
+        fast, fallback = self._health[self.models[0]], self._health[self.models[-1]]
+        if fast.samples < MIN_SAMPLES:
+            return False
+        if fast.success_rate() < MIN_SUCCESS_RATE:
+            return True
+        return fallback.samples >= MIN_SAMPLES and fast.p95() >= fallback.p95()
+
+    def route(self) -> List[str]:
+        """The models to try for the next request, in order."""
+        with self._lock:
+            self._routed += 1
+            if len(self.models) > 1 and self._routed % PROBE_EVERY and self._fast_model_lags():
+                return self.models[1:]
+            return list(self.models)
+
+    def observe(self, model: str, latency: float, ok: bool, escalated: bool = False) -> None:
+        """Record a request's latency and whether it gave a usable answer."""
+        with self._lock:
+            self._health[model].observe(latency, ok)
+            self.escalations += escalated
+
+    def summary(self) -> Dict[str, dict]:
+        """Requests, success rate and p95 latency per model, over the recent window."""
+        with self._lock:
+            return {
+                model: {
+                    "requests": health.requests,
+                    "successes": health.successes,
+                    "success_rate": None if health.success_rate() is None else round(health.success_rate(), 3),
+                    "p95_seconds": None if health.p95() is None else round(health.p95(), 3),
+                }
+                for model, health in self._health.items()
+            }
@@ -23,10 +23,13 @@ import os
 import re
 import shutil
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 try:
     import yaml
@@ -34,8 +37,22 @@ except ImportError:
     print("Error: PyYAML is required. Install with: pip install pyyaml")
     sys.exit(1)
 
+from cancellation import CancellationToken, OperationCancelled
+from chunked_summary import (
+    CHUNK_SUMMARY_MAX_CHARS,
+    CHUNK_THRESHOLD,
+    DEFAULT_SUMMARY_CACHE_DIR,
+    SummaryCache,
+    build_chunk_prompt,
+    build_reduce_prompt,
+    split_into_chunks,
+)
+from model_cascade import DEFAULT_FAST_TIMEOUT, ModelCascade, is_low_quality
+from token_budget import DEFAULT_INPUT_TOKENS, DEFAULT_TOKEN_STATS_PATH, TokenBudget, TokenStats
+
 try:
     import requests
+    from resilient_http import CallRecord, CircuitOpenError, HTTPClient
 except ImportError:
     requests = None  # Optional, only needed for AI descriptions
 
@@ -64,11 +81,135 @@ Title: {title}
 Content:
 {content}"""
 
+PACKED_DESCRIPTION_PROMPT = """Write a 1-2 sentence summary of each note below. Be concise and direct.
+
+Answer with only a JSON object mapping each note number to its summary, like {{"1": "summary", "2": "summary"}}. Include every note.
+
+{notes}"""
+
+# Notes up to this many characters can share a request with other notes
+PACK_NOTE_CHARS = 1500
+# Most note content sent in one packed request
+PACK_MAX_CHARS = 8000
+# Files read ahead to find notes to pack
+PREFETCH_FILES = 100
+
+
+def pack_notes(
+    notes: List[Tuple[str, str]],
+    pack_size: int,
+    max_chars: int = PACK_MAX_CHARS
+) -> Iterator[List[Tuple[str, str]]]:
+    """Group (title, content) pairs into packs of at most `pack_size` notes and `max_chars` characters."""
+    pack: List[Tuple[str, str]] = []
+    size = 0
+    for title, content in notes:
+        if pack and (len(pack) >= pack_size or size + len(content) > max_chars):
+            yield pack
+            pack, size = [], 0
+        pack.append((title, content))
+        size += len(content)
+    if pack:
+        yield pack
+
+
+def build_packed_prompt(pack: List[Tuple[str, str]]) -> str:
+    notes = "\n\n".join(
+        f"=== Note {number} ===\nTitle: {title}\nContent:\n{content.strip()}"
+        for number, (title, content) in enumerate(pack, 1)
+    )
+    return PACKED_DESCRIPTION_PROMPT.format(notes=notes)
+
+
+def parse_packed_descriptions(reply: Optional[str], count: int) -> Dict[int, str]:
+    """
+    Descriptions by note number (1-based) from the answer to a packed prompt.
+
+    Notes without a usable description are left out; the whole answer is
+    ignored if it does not contain a JSON object.
+    """
+    if not reply:
+        return {}
+    start, end = reply.find('{'), reply.rfind('}')
+    if start < 0 or end < start:
+        return {}
+    try:
+        data = json.loads(reply[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    descriptions = {}
+    for key, value in data.items():
+        try:
+            number = int(key)
+        except ValueError:
+            continue
+        if 1 <= number <= count and isinstance(value, str) and value.strip():
+            descriptions[number] = value.strip().strip('"\'')
+    return descriptions
+
+
+def clip_description(description: str, max_length: int) -> str:
+    """Shorten a description to `max_length`, at a sentence end if one is close."""
+    if len(description) <= max_length:
+        return description
+    last_period = description[:max_length].rfind('.')
+    if last_period > max_length * 0.6:
+        return description[:last_period + 1]
+    return description[:max_length - 3] + "..."
+
 
 class AIDescriptionGenerator:
     """Generates descriptions using an OpenAI-compatible API."""
 
-    def __init__(self, base_url: str, api_key: str, model: str = "llama-3.1-8b-instruct"):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str = "llama-3.1-8b-instruct",
+        on_response: Optional[Callable[[str, float, str, dict], None]] = None,
+        pool_size: int = 4,
+        on_call: Optional[Callable[["CallRecord"], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        chunk_threshold: Optional[int] = CHUNK_THRESHOLD,
+        summary_cache: Optional[SummaryCache] = None,
+        pack_size: int = 1,
+        token_stats: Optional[TokenStats] = None,
+        fast_model: Optional[str] = None,
+        fast_timeout: float = DEFAULT_FAST_TIMEOUT
+    ):
+        """
+        Args:
+            base_url: OpenAI-compatible API base URL
+            api_key: API key for the provider
+            model: Model name to request
+            on_response: Optional callback invoked after every request with
+                (model, latency_seconds, status, usage). Status is the HTTP status code
+                as a string, or "timeout"/"error"/"circuit_open"/"cancelled"
+                when no response was received. Latency includes any retries.
+            pool_size: Connections kept alive for concurrent callers
+            on_call: Optional callback invoked with a CallRecord (method,
+                url, status, latency, attempt) for every attempt, retries
+                included
+            cancel_token: Aborts an in-flight request when cancelled;
+                generate_description() then raises OperationCancelled
+            chunk_threshold: Notes longer than this many characters are
+                summarized chunk by chunk; None sends only the first
+                DEFAULT_INPUT_TOKENS tokens in one request
+            summary_cache: Reuses chunk and reduce summaries of unchanged
+                text across runs
+            pack_size: Short notes described together in one request by
+                prefetch(); 1 disables packing
+            token_stats: Completion lengths observed in earlier runs, used
+                to pick max_tokens (see token_budget.py); None starts from
+                DEFAULT_MAX_TOKENS and learns in memory
+            fast_model: Smaller model asked first; `model` is then only
+                asked when it fails or answers poorly (see model_cascade.py)
+            fast_timeout: Timeout in seconds for fast_model requests, which
+                are not retried
+        """
         if requests is None:
             raise ImportError("requests library is required for AI descriptions. Install with: pip install requests")
 
@@ -77,45 +218,252 @@ class AIDescriptionGenerator:
         self.model = model
         self.request_count = 0
         self.rate_limit_delay = 0.5  # Delay between requests in seconds
+        self.on_response = on_response
+        self.cancel_token = cancel_token
+        self.chunk_threshold = chunk_threshold
+        self.summary_cache = summary_cache
+        self.pool_size = pool_size
+        self.chunk_stats = {"chunked_notes": 0, "chunks": 0, "cache_hits": 0}
+        self.pack_size = pack_size
+        self.pack_stats = {"packed_requests": 0, "packed_notes": 0, "pack_fallbacks": 0}
+        self._prefetched: Dict[Tuple[str, str], str] = {}
+        self._count_lock = threading.Lock()
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # Retries 429s/5xx/timeouts and stops calling a failing provider for a while
+        self.client = HTTPClient(
+            headers=headers,
+            timeout=90,  # Longer timeout for reasoning models
+            pool_size=pool_size,
+            on_call=on_call
+        )
+        self._clients = {model: self.client}
+
+        models = [model]
+        if fast_model and fast_model != model:
+            models.insert(0, fast_model)
+            # Own client, so fast model timeouts open its circuit and not the main model's
+            self._clients[fast_model] = HTTPClient(
+                headers=headers,
+                timeout=fast_timeout,
+                pool_size=pool_size,
+                max_retries=0,
+                on_call=on_call
+            )
+        self.cascade = ModelCascade(models)
+
+        token_stats = token_stats if token_stats is not None else TokenStats()
+        self._budgets = {name: TokenBudget(token_stats, name) for name in models}
+        self.token_budget = self._budgets[model]
+
+    def _report(self, model: str, started: float, status: str, usage: Optional[dict] = None) -> None:
+        """Report request latency/status to the on_response callback, if any."""
+        if self.on_response:
+            self.on_response(model, time.perf_counter() - started, status, usage or {})
 
     def generate_description(self, title: str, content: str, max_length: int = 2000) -> Optional[str]:
-        """Generate a description using the AI model."""
+        """
+        Generate a description using the AI model.
+
+        Notes longer than chunk_threshold are summarized section by section
+        and the section summaries reduced to one description (see
+        chunked_summary.py); shorter notes are sent in one request, unless
+        prefetch() already described them.
+        """
         if not content or not content.strip():
             return None
 
-        # Truncate content to avoid token limits (first ~2000 chars)
-        truncated_content = content[:2000]
+        prefetched = self._prefetched.pop((title, content), None)
+        if prefetched is not None:
+            return prefetched
+
+        self._wait_for_rate_limit()
+
+        if self.chunk_threshold and len(content) > self.chunk_threshold:
+            return self._generate_chunked(title, content, max_length)
+
+        # Truncate content to avoid token limits
+        truncated_content = self.token_budget.fit(content)
 
         prompt = AI_DESCRIPTION_PROMPT.format(title=title, content=truncated_content)
+        return self._complete(prompt, max_length)
 
-        try:
-            # Rate limiting
-            if self.request_count > 0:
+    def prefetch(self, notes: List[Tuple[str, str]], max_length: int = 2000) -> None:
+        """
+        Describe short notes several to a request ahead of generate_description().
+
+        Notes of up to PACK_NOTE_CHARS characters are sent pack_size at a
+        time with a prompt asking for a JSON object of descriptions. Later
+        generate_description() calls with the same title and content
+        return the parsed descriptions; notes missing from an answer, or
+        from one that does not parse, get their own request as usual.
+        """
+        self._prefetched.clear()
+        if self.pack_size < 2:
+            return
+
+        short_notes = [
+            (title, content) for title, content in notes
+            if content.strip() and len(content) <= PACK_NOTE_CHARS
+        ]
+        for pack in pack_notes(short_notes, self.pack_size):
+            if len(pack) < 2:
+                continue
+            self._wait_for_rate_limit()
+            reply = self._complete(build_packed_prompt(pack), max_length=sys.maxsize, outputs=len(pack))
+            descriptions = parse_packed_descriptions(reply, len(pack))
+            for number, description in descriptions.items():
+                self._prefetched[pack[number - 1]] = clip_description(description, max_length)
+
+            with self._count_lock:
+                self.pack_stats["packed_requests"] += 1
+                self.pack_stats["packed_notes"] += len(descriptions)
+                self.pack_stats["pack_fallbacks"] += len(pack) - len(descriptions)
+            if len(descriptions) < len(pack):
+                print(f"  [AI Warning] {len(pack) - len(descriptions)} of {len(pack)} packed notes "
+                      f"were not described; requesting them one by one")
+
+    def _wait_for_rate_limit(self) -> None:
+        """Sleep between requests; raises OperationCancelled if cancelled meanwhile."""
+        if self.request_count > 0:
+            if self.cancel_token is None:
                 time.sleep(self.rate_limit_delay)
+            elif self.cancel_token.wait(self.rate_limit_delay):
+                raise OperationCancelled(self.cancel_token.reason)
 
-            response = requests.post(
+    def _cached_complete(self, prompt: str, max_length: int) -> Optional[str]:
+        """
+        _complete() through the summary cache, if there is one.
+
+        Summaries are cached under the model that wrote them, and found
+        from any model in the cascade, the main model's first. Low-quality
+        answers are not cached, so the next run asks again.
+        """
+        if self.summary_cache is None:
+            return self._complete(prompt, max_length)
+
+        for model in reversed(self.cascade.models):
+            summary = self.summary_cache.get(self.summary_cache.key(model, prompt))
+            if summary is not None:
+                with self._count_lock:
+                    self.chunk_stats["cache_hits"] += 1
+                return summary
+        model, summary = self._cascade_complete(prompt, max_length)
+        if model and not is_low_quality(summary):
+            self.summary_cache.put(self.summary_cache.key(model, prompt), summary)
+        return summary
+
+    def _generate_chunked(self, title: str, content: str, max_length: int) -> Optional[str]:
+        """Summarize each chunk in parallel, then reduce the summaries to one description."""
+        chunks = split_into_chunks(content)
+        with self._count_lock:
+            self.chunk_stats["chunked_notes"] += 1
+            self.chunk_stats["chunks"] += len(chunks)
+
+        prompts = [build_chunk_prompt(title, chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(prompts))) as executor:
+            summaries = list(executor.map(
+                lambda prompt: self._cached_complete(prompt, CHUNK_SUMMARY_MAX_CHARS), prompts
+            ))
+
+        summaries = [summary for summary in summaries if summary]
+        if not summaries:
+            return None
+        if len(summaries) < len(chunks):
+            print(f"  [AI Warning] {len(chunks) - len(summaries)} of {len(chunks)} section summaries failed")
+            # Not cached, so the next run retries the missing sections
+            return self._complete(build_reduce_prompt(title, summaries), max_length)
+        return self._cached_complete(build_reduce_prompt(title, summaries), max_length)
+
+    def _complete(
+        self,
+        prompt: str,
+        max_length: int,
+        outputs: int = 1,
+        max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Send one prompt down the model cascade; return the first usable
+        answer, or the last model's answer (None on failure).
+
+        `outputs` is the number of descriptions the prompt asks for; an
+        answer to a prompt asking for several is only checked for being
+        non-empty.
+        """
+        return self._cascade_complete(prompt, max_length, outputs, max_tokens)[1]
+
+    def _cascade_complete(
+        self,
+        prompt: str,
+        max_length: int,
+        outputs: int = 1,
+        max_tokens: Optional[int] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """_complete(), also returning the model the answer came from: (model, answer)."""
+        models = self.cascade.route()
+        for position, model in enumerate(models):
+            started = time.perf_counter()
+            answer = self._complete_with(model, prompt, max_length, outputs, max_tokens)
+            ok = bool(answer) if outputs > 1 else not is_low_quality(answer)
+            escalate = not ok and position < len(models) - 1
+            self.cascade.observe(model, time.perf_counter() - started, ok, escalated=escalate)
+            if not escalate:
+                return model, answer
+            print(f"  [AI Info] No usable answer from {model}; asking {models[position + 1]}")
+        return None, None
+
+    def _complete_with(
+        self,
+        model: str,
+        prompt: str,
+        max_length: int,
+        outputs: int = 1,
+        max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Send one prompt to `model` and return the cleaned-up answer, or None on failure.
+
+        Unless given, max_tokens comes from the model's token budget; an
+        answer cut off by a learned budget is requested again with the
+        full allowance.
+        """
+        budget = self._budgets[model]
+        if max_tokens is None:
+            max_tokens = budget.max_tokens(outputs)
+        estimated_tokens = budget.estimate(prompt)
+        try:
+            started = time.perf_counter()
+            response = self._clients[model].post(
                 f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
                 json={
-                    "model": self.model,
+                    "model": model,
                     "messages": [
                         {"role": "user", "content": prompt}
                     ],
-                    # High token limit for reasoning models that do extensive chain-of-thought
-                    "max_tokens": 3000,
+                    # Reasoning models spend most of this on chain-of-thought
+                    "max_tokens": max_tokens,
                     "temperature": 0.3
                 },
-                timeout=90  # Longer timeout for reasoning models
+                cancel_token=self.cancel_token,
+                # A completion that timed out is slow, not lost; don't wait for it again
+                retry_read_timeouts=False
             )
 
-            self.request_count += 1
+            with self._count_lock:
+                self.request_count += 1
 
             if response.status_code == 200:
                 result = response.json()
-                message = result['choices'][0]['message']
+                self._report(model, started, "200", result.get('usage'))
+                choice = result['choices'][0]
+                truncated = choice.get('finish_reason') == 'length'
+                budget.record(max_tokens, result.get('usage'), estimated_tokens, outputs, truncated)
+                if truncated and max_tokens < budget.ceiling:
+                    print(f"  [AI Info] Answer hit max_tokens={max_tokens}; retrying with {budget.ceiling}")
+                    return self._complete_with(model, prompt, max_length, outputs, budget.ceiling)
+                message = choice['message']
                 raw_content = message.get('content')
 
                 # Some reasoning models put output in reasoning_content instead of content
@@ -141,28 +489,46 @@ class AIDescriptionGenerator:
                 description = description.strip('"\'')
 
                 # Truncate if too long (max 2000 chars for Typesense compatibility)
-                if len(description) > max_length:
-                    last_period = description[:max_length].rfind('.')
-                    if last_period > max_length * 0.6:
-                        description = description[:last_period + 1]
-                    else:
-                        description = description[:max_length - 3] + "..."
-
-                return description
+                return clip_description(description, max_length)
             else:
+                self._report(model, started, str(response.status_code))
                 print(f"  [AI Error] Status {response.status_code}: {response.text[:200]}")
                 return None
 
+        except OperationCancelled:
+            self._report(model, started, "cancelled")
+            raise
         except requests.exceptions.Timeout:
+            self._report(model, started, "timeout")
             print(f"  [AI Error] Request timed out")
             return None
+        except CircuitOpenError as e:
+            self._report(model, started, "circuit_open")
+            print(f"  [AI Error] {e}")
+            return None
         except requests.exceptions.RequestException as e:
+            self._report(model, started, "error")
             print(f"  [AI Error] Request failed: {e}")
             return None
         except (KeyError, IndexError, json.JSONDecodeError) as e:
             print(f"  [AI Error] Failed to parse response: {e}")
             return None
 
+    def token_summary(self) -> dict:
+        """Token usage summed over the models of the cascade (see TokenBudget.summary())."""
+        summaries = [budget.summary() for budget in self._budgets.values()]
+        return {key: sum(summary[key] for summary in summaries) for key in summaries[0]}
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        for client in self._clients.values():
+            client.close()
+
+
+def _trace(tracer, name: str):
+    """Open a tracing span if a tracer was provided (see api/services/tracing.py)."""
+    return tracer.span(name) if tracer is not None else nullcontext()
+
 
 def should_ignore(path: Path) -> bool:
     """Check if path should be ignored."""
@@ -314,15 +680,41 @@ def normalize_tags(existing_tags: list, inline_tags: list) -> list:
     return sorted(tag for tag in all_tags if tag)
 
 
+def note_needing_description(filepath: Path) -> Optional[Tuple[str, str]]:
+    """(title, body) as normalize_file() would send them to the AI, or None if it would not."""
+    try:
+        content = filepath.read_text(encoding='utf-8')
+    except Exception:
+        return None
+    frontmatter, body = parse_frontmatter(content)
+    if frontmatter.get('description') or not body.strip():
+        return None
+    return frontmatter.get('title') or title_from_filename(filepath), body
+
+
+def prefetch_descriptions(ai_generator: AIDescriptionGenerator, filepaths: List[Path]) -> None:
+    """Describe the short notes among `filepaths` in packed requests before normalize_file() runs on them."""
+    notes = [note for note in map(note_needing_description, filepaths) if note]
+    if notes:
+        ai_generator.prefetch(notes)
+
+
 def normalize_file(
     filepath: Path,
     dry_run: bool = False,
     verbose: bool = False,
-    ai_generator: Optional[AIDescriptionGenerator] = None
+    ai_generator: Optional[AIDescriptionGenerator] = None,
+    tracer=None,
+    cancel_token: Optional[CancellationToken] = None
 ) -> dict:
     """
     Normalize a single markdown file.
     Returns dict with changes made.
+
+    If a tracer is given, the read, parse, description and write phases
+    are recorded as spans. If cancel_token is cancelled by the time the
+    file would be written, OperationCancelled is raised instead, so an
+    aborted AI call never leaves a fallback description behind.
     """
     changes = {
         'file': str(filepath),
@@ -331,13 +723,15 @@ def normalize_file(
     }
 
     try:
-        content = filepath.read_text(encoding='utf-8')
+        with _trace(tracer, "file.read"):
+            content = filepath.read_text(encoding='utf-8')
     except Exception as e:
         changes['error'] = f"Could not read file: {e}"
         return changes
 
     # Parse existing frontmatter
-    frontmatter, body = parse_frontmatter(content)
+    with _trace(tracer, "file.parse_yaml"):
+        frontmatter, body = parse_frontmatter(content)
     original_frontmatter = frontmatter.copy()
 
     # 1. Extract inline tags and merge with frontmatter tags
@@ -367,13 +761,15 @@ def normalize_file(
 
         # Try AI generation first if available
         if ai_generator and body.strip():
-            new_description = ai_generator.generate_description(title, body)
+            with _trace(tracer, "ai.wait"):
+                new_description = ai_generator.generate_description(title, body)
             if new_description:
                 changes['changes'].append(f"description (AI): '{new_description[:50]}...'")
 
         # Fall back to simple extraction if no AI description generated
         if not new_description:
-            new_description = generate_description(body)
+            with _trace(tracer, "description.extract"):
+                new_description = generate_description(body)
             if new_description:
                 changes['changes'].append(f"description: (none) -> '{new_description[:50]}...'")
 
@@ -385,11 +781,15 @@ def normalize_file(
         changes['modified'] = True
 
         if not dry_run:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
             # Reconstruct file content
             new_content = serialize_frontmatter(frontmatter) + body.lstrip('\n')
 
             try:
-                filepath.write_text(new_content, encoding='utf-8')
+                with _trace(tracer, "file.write"):
+                    filepath.write_text(new_content, encoding='utf-8')
             except Exception as e:
                 changes['error'] = f"Could not write file: {e}"
                 changes['modified'] = False
@@ -430,6 +830,15 @@ Examples:
 
     # Use AI for description generation (requires GRADIENT_API_KEY env var)
     python normalize_obsidian_vault.py /path/to/vault --use-ai --gradient-base-url https://api.gradient.ai/v1
+
+    # Send long notes whole instead of summarizing them section by section
+    python normalize_obsidian_vault.py /path/to/vault --use-ai --chunk-threshold 0
+
+    # Describe every note in its own request instead of packing short notes together
+    python normalize_obsidian_vault.py /path/to/vault --use-ai --pack-size 1
+
+    # Ask a small model first and the default model only when it fails
+    python normalize_obsidian_vault.py /path/to/vault --use-ai --fast-model llama-3.2-3b-instruct
         """
     )
 
@@ -483,6 +892,46 @@ Examples:
         default='llama-3.1-8b-instruct',
         help='AI model to use for descriptions (default: llama-3.1-8b-instruct)'
     )
+    parser.add_argument(
+        '--chunk-threshold',
+        type=int,
+        default=CHUNK_THRESHOLD,
+        help=f'Summarize notes longer than this many characters section by section, then '
+             f'combine the summaries; 0 sends the first {DEFAULT_INPUT_TOKENS} tokens only (default: {CHUNK_THRESHOLD})'
+    )
+    parser.add_argument(
+        '--summary-cache',
+        type=Path,
+        default=DEFAULT_SUMMARY_CACHE_DIR,
+        help='Directory caching section summaries, so unchanged sections are not sent again '
+             '(default: scripts/summary-cache)'
+    )
+    parser.add_argument(
+        '--pack-size',
+        type=int,
+        default=8,
+        help=f'Describe up to this many short notes (<= {PACK_NOTE_CHARS} characters) in one request; '
+             f'1 sends every note on its own (default: 8)'
+    )
+    parser.add_argument(
+        '--fast-model',
+        type=str,
+        help='Smaller model to ask first; --ai-model is only asked when it fails, times out '
+             'or gives an unusable answer'
+    )
+    parser.add_argument(
+        '--fast-timeout',
+        type=float,
+        default=DEFAULT_FAST_TIMEOUT,
+        help=f'Timeout in seconds for --fast-model requests (default: {DEFAULT_FAST_TIMEOUT:g})'
+    )
+    parser.add_argument(
+        '--token-stats',
+        type=Path,
+        default=DEFAULT_TOKEN_STATS_PATH,
+        help='File of completion lengths seen in earlier runs, used to size max_tokens '
+             '(default: scripts/token-stats.json)'
+    )
 
     args = parser.parse_args()
 
@@ -514,11 +963,18 @@ Examples:
             print("Set it with: export GRADIENT_API_KEY=your_api_key")
             sys.exit(1)
 
-        print(f"AI enabled: {args.gradient_base_url} (model: {args.ai_model})")
+        fast_model = f", fast model: {args.fast_model}" if args.fast_model else ""
+        print(f"AI enabled: {args.gradient_base_url} (model: {args.ai_model}{fast_model})")
         ai_generator = AIDescriptionGenerator(
             base_url=args.gradient_base_url,
             api_key=api_key,
-            model=args.ai_model
+            model=args.ai_model,
+            chunk_threshold=args.chunk_threshold or None,
+            summary_cache=SummaryCache(args.summary_cache) if args.chunk_threshold else None,
+            pack_size=args.pack_size,
+            token_stats=TokenStats(args.token_stats),
+            fast_model=args.fast_model,
+            fast_timeout=args.fast_timeout
         )
 
     print()
@@ -549,7 +1005,10 @@ Examples:
         'ai_descriptions': 0
     }
 
-    for filepath in md_files:
+    for idx, filepath in enumerate(md_files):
+        if ai_generator and ai_generator.pack_size > 1 and idx % PREFETCH_FILES == 0:
+            prefetch_descriptions(ai_generator, md_files[idx:idx + PREFETCH_FILES])
+
         relative_path = filepath.relative_to(vault_path)
         result = normalize_file(
             filepath,
@@ -587,6 +1046,12 @@ Examples:
             if args.verbose:
                 print(f"[UNCHANGED] {relative_path}")
 
+    if ai_generator:
+        ai_generator.close()
+        if ai_generator.summary_cache is not None:
+            ai_generator.summary_cache.close()
+        ai_generator.token_budget.stats.close()
+
     # Print summary
     print()
     print("=" * 50)
@@ -603,6 +1068,23 @@ Examples:
     print(f"  Descriptions added:  {stats['descriptions_added']}")
     if ai_generator:
         print(f"    (AI-generated):    {stats['ai_descriptions']}")
+        chunk_stats = ai_generator.chunk_stats
+        if chunk_stats['chunked_notes']:
+            print(f"  Long notes chunked:  {chunk_stats['chunked_notes']} "
+                  f"({chunk_stats['chunks']} sections, {chunk_stats['cache_hits']} cached summaries reused)")
+        pack_stats = ai_generator.pack_stats
+        if pack_stats['packed_requests']:
+            print(f"  Packed requests:     {pack_stats['packed_requests']} "
+                  f"({pack_stats['packed_notes']} notes described, {pack_stats['pack_fallbacks']} sent singly)")
+        token_summary = ai_generator.token_summary()
+        print(f"  Tokens spent:        {token_summary['tokens_spent']} "
+              f"({token_summary['prompt_tokens']} prompt, {token_summary['completion_tokens']} completion)")
+        print(f"  Tokens saved:        {token_summary['tokens_saved']} (max_tokens not reserved)")
+        if len(ai_generator.cascade.models) > 1:
+            for model, health in ai_generator.cascade.summary().items():
+                print(f"  {model}: {health['requests']} requests, {health['successes']} usable, "
+                      f"p95 {health['p95_seconds']}s")
+            print(f"  Escalated to {args.ai_model}: {ai_generator.cascade.escalations}")
 
     if args.dry_run:
         print()
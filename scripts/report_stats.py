@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the benchmark and load test reports: nearest-rank
+percentiles and comma separated integer options.
+"""
+
+import argparse
+import math
+from typing import List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def parse_int_list(value: str) -> List[int]:
+    """Parse a comma separated list of positive integers (argparse type)."""
+    try:
+        numbers = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma separated integers, got {value!r}")
+    if not numbers or min(numbers) < 1:
+        raise argparse.ArgumentTypeError(f"expected positive integers, got {value!r}")
+    return numbers
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for AI and upload calls.
+
+HTTPClient wraps a pooled requests.Session with:
+
+- retries for timeouts, connection errors and 429/5xx responses, with
+  jittered exponential backoff that honours Retry-After
+- a shared pause: after a 429 every caller of the client waits out the
+  Retry-After period instead of piling on more requests
+- a per-host circuit breaker that fails calls fast (CircuitOpenError)
+  after repeated failures, then lets one trial request through once
+  `reset_timeout` has passed
+- per-call instrumentation: an `on_call` callback receives a CallRecord
+  for every attempt
+- cancellation: a call given a CancellationToken stops waiting, caps its
+  timeout at the token's deadline and has its socket shut down if the
+  token is cancelled mid-request
+
+The backoff, Retry-After and CircuitBreaker helpers have no requests
+dependency in use and are shared with the API's async client
+(api/services/http_client.py).
+
+Usage:
+    client = HTTPClient(headers={"Authorization": f"Bearer {api_key}"}, timeout=90)
+    response = client.post(f"{base_url}/chat/completions", json=payload)
+    client.close()
+"""
+
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from cancellation import CancellationToken, OperationCancelled
+
+# Responses worth retrying: throttling and server-side failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_THROTTLE_RETRIES = 5
+BACKOFF_BASE_DELAY = 1.0
+BACKOFF_MAX_DELAY = 30.0
+
+# Longest Retry-After honoured before giving up on the wait
+MAX_RETRY_AFTER = 120.0
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_DELAY, cap: float = BACKOFF_MAX_DELAY) -> float:
+    """Jittered exponential backoff delay before retry number `attempt` (0-based)."""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date), or None if absent/invalid."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while a host's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures for one upstream.
+
+    closed     requests flow; `failure_threshold` failures in a row open it
+    open       requests are refused until `reset_timeout` has passed
+    half_open  one trial request is allowed; success closes the circuit,
+               failure opens it again
+
+    Thread-safe. Every allowed request must be followed by
+    record_success(), record_failure() or, if it was abandoned, release().
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open":
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = "half_open"
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a trial request through."""
+        with self._lock:
+            if self._state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back a half-open trial slot without judging the host."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                self._state = "open"
+                self._opened_at = self._clock()
+
+
+# Connections checked out by the current thread while a cancellable call runs
+_checked_out = threading.local()
+
+
+class _TrackingPoolMixin:
+    """Records each connection a thread checks out so a cancel can abort it."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        connections = getattr(_checked_out, "connections", None)
+        if connections is not None:
+            connections.append(conn)
+        return conn
+
+
+class _TrackingHTTPConnectionPool(_TrackingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackingHTTPSConnectionPool(_TrackingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _AbortableAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose in-flight connections can be shut down from another thread."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackingHTTPConnectionPool,
+            "https": _TrackingHTTPSConnectionPool,
+        }
+
+
+def _shutdown_connections(connections: list) -> None:
+    """Shut down the sockets of in-flight connections; the blocked read then fails at once."""
+    for conn in list(connections):
+        sock = getattr(conn, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _cap_timeout(timeout, limit: float):
+    """Shorten a requests timeout (seconds, (connect, read) or None) to at most `limit`."""
+    if isinstance(timeout, tuple):
+        return tuple(limit if part is None else min(part, limit) for part in timeout)
+    return limit if timeout is None else min(timeout, limit)
+
+
+class CallRecord(NamedTuple):
+    """One attempt made by a client."""
+
+    method: str
+    url: str
+    # HTTP status code as a string, or "timeout"/"error"/"circuit_open"/"cancelled"
+    status: str
+    latency: float
+    # 0 for the first attempt of a call, 1 for the first retry, ...
+    attempt: int
+
+
+class HTTPClient:
+    """
+    Pooled, retrying requests client with a per-host circuit breaker.
+
+    Thread-safe; share one instance between worker threads. Responses are
+    returned whatever their status once retries are exhausted, so callers
+    keep their own status handling. Request bodies given as seekable
+    files are rewound before each retry.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = 60,
+        pool_size: int = 10,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_throttle_retries: int = DEFAULT_MAX_THROTTLE_RETRIES,
+        backoff_base: float = BACKOFF_BASE_DELAY,
+        backoff_max: float = BACKOFF_MAX_DELAY,
+        failure_threshold: Optional[int] = 5,
+        reset_timeout: float = 30.0,
+        shared_throttle: bool = True,
+        on_call: Optional[Callable[[CallRecord], None]] = None
+    ):
+        """
+        Args:
+            headers: Headers sent with every request
+            timeout: Default request timeout in seconds
+            pool_size: Connections kept alive per host
+            max_retries: Retries for timeouts, connection errors and 5xx
+            max_throttle_retries: Retries for 429 responses
+            backoff_base: First backoff delay in seconds (doubles per retry)
+            backoff_max: Longest backoff delay in seconds
+            failure_threshold: Consecutive failures that open a host's
+                circuit; None disables the breaker
+            reset_timeout: Seconds an open circuit waits before a trial request
+            shared_throttle: Make every caller wait after a 429, not just
+                the one that received it
+            on_call: Called with a CallRecord after every attempt
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_throttle_retries = max_throttle_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.shared_throttle = shared_throttle
+        self.on_call = on_call
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = _AbortableAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._resume_at = 0.0
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "circuit_rejections": 0}
+
+    def breaker(self, url: str) -> Optional[CircuitBreaker]:
+        """The circuit breaker for `url`'s host, or None if disabled."""
+        if self.failure_threshold is None:
+            return None
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def pause(self, seconds: float) -> None:
+        """Hold off all requests through this client for `seconds`."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_throttle(self, cancel_token: Optional[CancellationToken] = None) -> None:
+        while True:
+            with self._lock:
+                remaining = self._resume_at - time.monotonic()
+            if remaining <= 0:
+                return
+            self._sleep(remaining, cancel_token)
+
+    @staticmethod
+    def _sleep(seconds: float, cancel_token: Optional[CancellationToken] = None) -> None:
+        """Sleep, or wait on the token so a cancel ends the wait at once."""
+        if cancel_token is None:
+            time.sleep(seconds)
+        elif cancel_token.wait(seconds):
+            raise OperationCancelled(cancel_token.reason)
+
+    def _send(self, method: str, url: str, cancel_token: Optional[CancellationToken],
+              kwargs: Dict[str, Any]) -> requests.Response:
+        """Send one attempt; with a token, cap its timeout and abort it on cancel."""
+        if cancel_token is None:
+            return self.session.request(method, url, **kwargs)
+        cancel_token.raise_if_cancelled()
+        remaining = cancel_token.remaining()
+        if remaining is not None:
+            kwargs = dict(kwargs, timeout=_cap_timeout(kwargs.get("timeout"), remaining))
+        connections = _checked_out.connections = []
+        try:
+            with cancel_token.cancel_with(lambda: _shutdown_connections(connections)):
+                return self.session.request(method, url, **kwargs)
+        finally:
+            _checked_out.connections = None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _report(self, on_call, record: CallRecord) -> None:
+        for callback in (self.on_call, on_call):
+            if callback:
+                callback(record)
+
+    @staticmethod
+    def _body_positions(kwargs: Dict[str, Any]) -> list:
+        """(file, position) for every seekable request body, so retries can rewind."""
+        bodies = [kwargs.get("data")]
+        files = kwargs.get("files") or {}
+        for value in (files.values() if isinstance(files, dict) else files):
+            bodies.append(value[1] if isinstance(value, tuple) else value)
+        return [(body, body.tell()) for body in bodies if hasattr(body, "seek") and hasattr(body, "tell")]
+
+    def request(self, method: str, url: str, retries: Optional[int] = None,
+                on_call: Optional[Callable[[CallRecord], None]] = None,
+                cancel_token: Optional[CancellationToken] = None, retry_read_timeouts: bool = True,
+                **kwargs: Any) -> requests.Response:
+        """
+        Send a request, retrying transient failures.
+
+        Args:
+            retries: Overrides max_retries for this call (429s still use
+                max_throttle_retries)
+            on_call: Called with a CallRecord after every attempt of this call
+            cancel_token: Stops the call (including backoff and throttle
+                waits) when cancelled; attempts never outlast its deadline
+            retry_read_timeouts: False gives up when a request that was sent
+                times out waiting for the answer, so a slow completion costs
+                one timeout rather than one per retry (connect errors are
+                still retried)
+            **kwargs: Passed to requests.Session.request
+
+        Raises:
+            CircuitOpenError: The host's circuit is open
+            OperationCancelled: The token was cancelled
+            requests.exceptions.RequestException: Timeouts and connection
+                errors once retries are exhausted
+        """
+        max_retries = self.max_retries if retries is None else retries
+        kwargs.setdefault("timeout", self.timeout)
+        breaker = self.breaker(url)
+        bodies = self._body_positions(kwargs)
+        self._count("calls")
+        failed_attempts = throttled_attempts = 0
+
+        for attempt in range(max_retries + self.max_throttle_retries + 1):
+            if attempt:
+                self._count("retries")
+                for body, position in bodies:
+                    body.seek(position)
+            if self.shared_throttle:
+                self._wait_for_throttle(cancel_token)
+            if breaker is not None and not breaker.allow_request():
+                self._count("circuit_rejections")
+                self._report(on_call, CallRecord(method, url, "circuit_open", 0.0, attempt))
+                raise CircuitOpenError(
+                    f"Circuit open for {urlsplit(url).netloc} after repeated failures; "
+                    f"retry in {breaker.retry_in():.0f}s"
+                )
+
+            self._count("attempts")
+            started = time.perf_counter()
+            try:
+                response = self._send(method, url, cancel_token, kwargs)
+            except OperationCancelled:
+                if breaker is not None:
+                    breaker.release()
+                self._report(on_call, CallRecord(method, url, "cancelled", time.perf_counter() - started, attempt))
+                raise
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as error:
+                status = "timeout" if isinstance(error, requests.exceptions.Timeout) else "error"
+                self._report(on_call, CallRecord(method, url, status, time.perf_counter() - started, attempt))
+                self._count("failures")
+                if breaker is not None:
+                    breaker.record_failure()
+                if failed_attempts >= max_retries:
+                    raise
+                if not retry_read_timeouts and isinstance(error, requests.exceptions.ReadTimeout):
+                    raise
+                self._sleep(backoff_delay(failed_attempts, self.backoff_base, self.backoff_max), cancel_token)
+                failed_attempts += 1
+                continue
+            except BaseException:
+                # Not the host's fault (bad URL, redirect loop, broken body...):
+                # don't count a failure, but don't hold a half-open trial slot either
+                if breaker is not None:
+                    breaker.release()
+                raise
+
+            self._report(on_call, CallRecord(
+                method, url, str(response.status_code), time.perf_counter() - started, attempt
+            ))
+            if response.status_code >= 500:
+                self._count("failures")
+                if breaker is not None:
+                    breaker.record_failure()
+            elif breaker is not None:
+                # Anything else, 429 included, means the host is up
+                breaker.record_success()
+
+            if response.status_code == 429:
+                if throttled_attempts >= self.max_throttle_retries:
+                    return response
+                delay = retry_after_seconds(response.headers)
+                if delay is None:
+                    delay = backoff_delay(throttled_attempts, self.backoff_base, self.backoff_max)
+                delay = min(delay, MAX_RETRY_AFTER)
+                throttled_attempts += 1
+                response.close()
+                if self.shared_throttle:
+                    self.pause(delay)
+                else:
+                    self._sleep(delay, cancel_token)
+                continue
+
+            if response.status_code in RETRY_STATUSES and failed_attempts < max_retries:
+                delay = retry_after_seconds(response.headers)
+                if delay is None:
+                    delay = backoff_delay(failed_attempts, self.backoff_base, self.backoff_max)
+                failed_attempts += 1
+                response.close()
+                self._sleep(min(delay, MAX_RETRY_AFTER), cancel_token)
+                continue
+
+            return response
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+    def __enter__(self) -> "HTTPClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
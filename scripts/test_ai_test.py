@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Tests for api/routers/ai_test.py
+
+Run with: python -m pytest test_ai_test.py -v
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from api.config import settings
+from api.routers import ai_test
+from api.routers.ai_test import BatchFileRequest, SingleFileResponse, _resolve_batch_paths, _summarize_batch
+from api.services.http_client import AsyncHTTPClient
+from chunked_summary import CHUNK_SUMMARY_PROMPT, SummaryCache
+
+
+def completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 40, "completion_tokens": 20, "total_tokens": 60},
+    })
+
+
+@pytest.fixture
+def ai_api(tmp_path, monkeypatch):
+    """
+    The AI test router against a mock chat completions endpoint. Set
+    `state["handler"]` to answer requests; sent prompts are recorded.
+    """
+    monkeypatch.setattr(settings, "gradient_api_key", "key")
+    monkeypatch.setattr(settings, "gradient_base_url", "http://ai.test/v1")
+    monkeypatch.setattr(settings, "ai_chunk_threshold", 2000)
+    state = {"handler": lambda prompt: completion("A short description of the note."), "prompts": []}
+
+    def handler(request):
+        prompt = json.loads(request.content)["messages"][0]["content"]
+        state["prompts"].append(prompt)
+        return state["handler"](prompt)
+
+    app = FastAPI()
+    app.include_router(ai_test.router, prefix="/ai-test")
+    app.state.http_client = AsyncHTTPClient(max_retries=0, transport=httpx.MockTransport(handler))
+    app.state.summary_cache = SummaryCache(tmp_path / "summary-cache")
+    yield TestClient(app), state
+    asyncio.run(app.state.http_client.aclose())
+    app.state.summary_cache.close()
+
+
+def write_long_note(path, sections: int = 3):
+    parts = [f"## Part {number}\n\n" + f"Words about part {number}. " * 80 for number in range(sections)]
+    path.write_text("---\ntitle: Parts\n---\n" + "\n".join(parts), encoding="utf-8")
+    return path
+
+
+class TestLongNotes:
+    """Tests for describing long notes from section summaries."""
+
+    def test_description_is_built_from_usable_section_summaries(self, ai_api, tmp_path):
+        client, state = ai_api
+        note = write_long_note(tmp_path / "parts.md")
+
+        def answer(prompt):
+            if "## Part 1" in prompt:
+                return httpx.Response(200, text="<html>Bad gateway</html>")
+            if prompt.startswith(CHUNK_SUMMARY_PROMPT[:30]):
+                return completion("Summary of a part.")
+            return completion("A note in three parts.")
+
+        state["handler"] = answer
+        response = client.post("/ai-test/single-file", json={"file_path": str(note)})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["success"] and body["description"] == "A note in three parts."
+        assert body["sections"] == {"sections": 3, "cached": 0, "failed": 1}
+        assert body["tokens_used"]["total"] == 60
+        assert state["prompts"][-1].count("Summary of a part.") == 2
+
+    def test_note_with_no_usable_section_fails(self, ai_api, tmp_path):
+        client, state = ai_api
+        note = write_long_note(tmp_path / "parts.md")
+        state["handler"] = lambda prompt: httpx.Response(200, json={"choices": []})
+
+        body = client.post("/ai-test/single-file", json={"file_path": str(note)}).json()
+
+        assert not body["success"]
+        assert body["error"] == "No section of the note could be summarized"
+        assert body["sections"]["failed"] == 3
+        assert len(state["prompts"]) == 3
+
+
+def write_vault(path):
+    (path / "Projects").mkdir(parents=True)
+    (path / ".obsidian").mkdir()
+    (path / "Habits.md").write_text("Notes about building habits.", encoding="utf-8")
+    (path / "Projects" / "Garden.md").write_text("Plans for the garden.", encoding="utf-8")
+    (path / "Projects" / "Empty.md").write_text("---\ntitle: Empty\n---\n", encoding="utf-8")
+    (path / ".obsidian" / "Workspace.md").write_text("Editor state.", encoding="utf-8")
+    return path
+
+
+class TestBatch:
+    """Tests for describing many files in one request."""
+
+    def test_vault_glob_skips_ignored_folders(self, tmp_path):
+        vault = write_vault(tmp_path / "vault")
+        paths = _resolve_batch_paths(BatchFileRequest(vault_path=str(vault)))
+        assert [path.relative_to(vault.resolve()).as_posix() for path in paths] == [
+            "Habits.md", "Projects/Empty.md", "Projects/Garden.md"
+        ]
+
+        capped = _resolve_batch_paths(BatchFileRequest(file_paths=["a.md"], vault_path=str(vault), max_files=2))
+        assert capped[0].name == "a.md" and len(capped) == 2
+
+    @pytest.mark.parametrize("glob", ["../**/*.md", "Projects/../../*.md", "/etc/*.md"])
+    def test_glob_outside_the_vault_is_rejected(self, tmp_path, glob):
+        vault = write_vault(tmp_path / "vault")
+        with pytest.raises(HTTPException) as raised:
+            _resolve_batch_paths(BatchFileRequest(vault_path=str(vault), glob=glob))
+        assert raised.value.status_code == 400
+
+    def test_summary_totals_and_percentiles(self):
+        results = [
+            SingleFileResponse(
+                success=latency < 400, file_path=f"{latency}.md", title="", content_length=1,
+                latency_ms=latency, tokens_used={"prompt": 10, "completion": 5, "total": 15}
+            )
+            for latency in (100.0, 200.0, 300.0, 400.0)
+        ]
+        results.append(SingleFileResponse(success=False, file_path="missing.md", title="", content_length=0))
+
+        summary = _summarize_batch(results, 450.0)
+        assert (summary["files"], summary["succeeded"], summary["failed"]) == (5, 3, 2)
+        assert summary["tokens_used"] == {"prompt": 40, "completion": 20, "total": 60}
+        assert summary["latency_ms"] == {
+            "p50": 200.0, "p90": 400.0, "p95": 400.0, "p99": 400.0, "max": 400.0, "mean": 250.0
+        }
+        assert summary["wall_time_ms"] == 450.0
+
+    def test_streams_results_then_summary(self, ai_api, tmp_path):
+        client, state = ai_api
+        vault = write_vault(tmp_path / "vault")
+
+        response = client.post("/ai-test/batch", json={
+            "vault_path": str(vault), "file_paths": [str(tmp_path / "missing.md")], "concurrency": 2
+        })
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+        results = {line["file_path"]: line for line in lines[:-1]}
+        assert all(line["type"] == "result" for line in lines[:-1])
+        assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2, 3]
+        assert results[str(vault.resolve() / "Habits.md")]["description"] == "A short description of the note."
+        assert results[str(vault.resolve() / "Projects" / "Empty.md")]["error"] == "File has no content after frontmatter"
+        assert results[str(tmp_path / "missing.md")]["error"].startswith("File not found")
+
+        summary = lines[-1]
+        assert summary["type"] == "summary"
+        assert (summary["files"], summary["succeeded"], summary["failed"]) == (4, 2, 2)
+        assert summary["tokens_used"]["total"] == 120
+        assert len(state["prompts"]) == 2
+
+    def test_traversal_is_rejected_before_any_request(self, ai_api, tmp_path):
+        client, state = ai_api
+        vault = write_vault(tmp_path / "vault")
+
+        response = client.post("/ai-test/batch", json={"vault_path": str(vault), "glob": "../*/*.md"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "glob must be relative to the vault"
+        assert client.post("/ai-test/batch", json={}).status_code == 400
+        assert state["prompts"] == []
+
+
+def sse_events(text: str):
+    events = []
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+class TestStreaming:
+    """Tests for streaming completions as server-sent events."""
+
+    def test_event_sequence(self, ai_api):
+        client, state = ai_api
+        chunks = [
+            {"choices": [{"delta": {"reasoning_content": "Short prompt."}}]},
+            {"choices": [{"delta": {"content": "Hello"}}]},
+            {"choices": [{"delta": {}}]},
+            {"choices": [{"delta": {"content": " there."}}]},
+            {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}},
+        ]
+        body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + ": keep-alive\n\ndata: [DONE]\n\n"
+        state["handler"] = lambda prompt: httpx.Response(200, text=body)
+
+        response = client.post("/ai-test/direct-prompt", json={"prompt": "Say hello", "stream": True})
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = sse_events(response.text)
+        assert [(event, data.get("delta")) for event, data in events[:-1]] == [
+            ("reasoning", "Short prompt."), ("content", "Hello"), ("content", " there.")
+        ]
+        event, done = events[-1]
+        assert event == "done"
+        assert (done["content"], done["reasoning"]) == ("Hello there.", "Short prompt.")
+        assert done["tokens_used"] == {"prompt": 5, "completion": 3, "total": 8}
+        assert done["time_to_first_token_ms"] <= done["latency_ms"]
+
+    def test_upstream_error_is_one_error_event(self, ai_api):
+        client, state = ai_api
+        state["handler"] = lambda prompt: httpx.Response(503, text="overloaded")
+
+        response = client.post("/ai-test/direct-prompt", json={"prompt": "Say hello", "stream": True})
+        assert sse_events(response.text) == [("error", {"error": "API returned status 503: overloaded"})]
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Tests for batch-csv-upload.py
+
+Run with: python -m pytest test_batch_csv_upload.py -v
+"""
+
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+# The script name contains a hyphen, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    "batch_csv_upload", Path(__file__).parent / "batch-csv-upload.py"
+)
+batch_csv_upload = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(batch_csv_upload)
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    """A CSV with 25 data rows, one blank row and one multi-line cell."""
+    path = tmp_path / "books.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["MediaType", "Title", "Notes"])
+        for i in range(25):
+            writer.writerow(["Book", f"Title {i}", "line one\nline two" if i == 3 else ""])
+            if i == 10:
+                writer.writerow(["", "", ""])
+    return path
+
+
+@pytest.fixture
+def upload_server(local_server):
+    """
+    Local upload endpoint. Earlier batches answer more slowly so uploads
+    finish out of order, and the first request is answered with a 429.
+    """
+    state = {"requests": 0}
+    lock = threading.Lock()
+
+    def reply(body):
+        with lock:
+            state["requests"] += 1
+            first = state["requests"] == 1
+        if first:
+            return 429, {"Retry-After": "0"}, b""
+        number = int(body.split(b'filename="batch-')[1].split(b".csv")[0])
+        time.sleep(max(0, 0.2 - number * 0.04))
+        return 200, {"Content-Type": "application/json"}, json.dumps({"successCount": number}).encode()
+
+    return local_server(reply), state
+
+
+class TestStreamingBatches:
+    """Tests for lazy batching and in-memory serialization."""
+
+    def test_stream_matches_eager_split(self, sample_csv):
+        eager = batch_csv_upload.split_csv_into_batches(str(sample_csv), 10)
+        streamed = list(batch_csv_upload.iter_csv_batches(str(sample_csv), 10))
+
+        assert streamed == eager
+        assert [b["row_count"] for b in streamed] == [10, 10, 5]
+        assert streamed[-1]["start_row"] == 21
+        assert streamed[-1]["end_row"] == 25
+
+    def test_serialize_batch_round_trips(self, sample_csv):
+        batch = next(batch_csv_upload.iter_csv_batches(str(sample_csv), 5))
+
+        data = batch_csv_upload.serialize_batch(batch)
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+        assert rows[0] == ["MediaType", "Title", "Notes"]
+        assert rows[1:] == batch["rows"]
+        assert rows[4][2] == "line one\nline two"
+
+
+class TestConcurrentUpload:
+    """Tests for bounded concurrent uploads."""
+
+    def test_results_are_reported_in_batch_order(self, sample_csv, upload_server):
+        api_url, state = upload_server
+        args = argparse.Namespace(api_url=api_url, auth_token=None, stream=True,
+                                  concurrency=3, delay=0, timeout=10,
+                                  adaptive=False, retries=0)
+        batches = batch_csv_upload.iter_csv_batches(str(sample_csv), 5)
+        client = batch_csv_upload.create_client(args)
+        reported = []
+
+        batch_csv_upload.run_batches(
+            batches, args, client,
+            on_submit=lambda batch: None,
+            on_result=lambda batch, response, error: reported.append((batch["number"], response, error))
+        )
+        client.close()
+
+        assert [number for number, _, _ in reported] == [1, 2, 3, 4, 5]
+        assert all(error is None for _, _, error in reported)
+        assert [response["successCount"] for _, response, _ in reported] == [1, 2, 3, 4, 5]
+        # One extra request for the throttled retry
+        assert state["requests"] == 6
+
+    def test_batch_that_timed_out_waiting_is_not_sent_again(self, sample_csv, local_server):
+        requests_seen = []
+
+        def reply(body):
+            requests_seen.append(body)
+            time.sleep(0.3)
+            return 200, {"Content-Type": "application/json"}, b'{"successCount": 5}'
+
+        args = argparse.Namespace(api_url=local_server(reply), auth_token=None, timeout=0.1,
+                                  concurrency=1, adaptive=False, retries=3)
+        batch = next(batch_csv_upload.iter_csv_batches(str(sample_csv), 5))
+        client = batch_csv_upload.create_client(args)
+
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            batch_csv_upload.upload_batch_data(client, args.api_url, "batch-1.csv",
+                                               batch_csv_upload.serialize_batch(batch))
+        client.close()
+        assert len(requests_seen) == 1
+
+
+class TestAdaptiveBatcher:
+    """Tests for AIMD batch sizing."""
+
+    def _server_error(self, status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.exceptions.HTTPError(response=response)
+
+    def test_grows_while_under_target_latency(self, sample_csv):
+        batcher = batch_csv_upload.AdaptiveBatcher(str(sample_csv), 4, target_latency=1.0)
+
+        fast = next(batcher)
+        fast["latency_ms"] = 100
+        batcher.observe(fast)
+        assert batcher.size == 6
+
+        slow = next(batcher)
+        slow["latency_ms"] = 2000
+        batcher.observe(slow)
+        assert batcher.size == 6
+        assert slow["row_count"] == 6
+
+    def test_server_error_halves_size_and_retries_rows(self, sample_csv):
+        batcher = batch_csv_upload.AdaptiveBatcher(str(sample_csv), 8, target_latency=1.0)
+
+        failed = next(batcher)
+        failed["latency_ms"] = 100
+        batcher.observe(failed, self._server_error(503))
+
+        assert failed["requeued"] is True
+        assert batcher.size == 4
+        retries = [next(batcher), next(batcher)]
+        assert [(b["start_row"], b["end_row"]) for b in retries] == [(1, 4), (5, 8)]
+        assert retries[0]["rows"] + retries[1]["rows"] == failed["rows"]
+        assert next(batcher)["start_row"] == 9
+
+    def test_read_timeout_halves_size_without_resending_rows(self, sample_csv):
+        batcher = batch_csv_upload.AdaptiveBatcher(str(sample_csv), 8, target_latency=1.0)
+
+        failed = next(batcher)
+        failed["latency_ms"] = 100
+        batcher.observe(failed, requests.exceptions.ReadTimeout())
+
+        assert failed["requeued"] is False
+        assert batcher.size == 4
+        assert next(batcher)["start_row"] == 9
+
+    def test_client_error_is_not_retried(self, sample_csv):
+        batcher = batch_csv_upload.AdaptiveBatcher(str(sample_csv), 8, target_latency=1.0)
+
+        failed = next(batcher)
+        failed["latency_ms"] = 100
+        batcher.observe(failed, self._server_error(400))
+
+        assert failed["requeued"] is False
+        assert batcher.size == 8
+        assert next(batcher)["start_row"] == 9
+
+
+class TestResume:
+    """Tests for the checkpoint journal and resumed batching."""
+
+    def test_journal_marks_only_successful_rows_completed(self, sample_csv, tmp_path):
+        journal = batch_csv_upload.UploadJournal.for_file(str(sample_csv), tmp_path / "journals")
+        journal.open(resume=False)
+        for batch in batch_csv_upload.iter_csv_batches(str(sample_csv), 10):
+            journal.record(batch, None if batch["number"] != 2 else RuntimeError("boom"))
+        journal.close()
+
+        completed = batch_csv_upload.UploadJournal.for_file(
+            str(sample_csv), tmp_path / "journals"
+        ).completed_rows()
+
+        assert completed.row_count == 15
+        assert 10 in completed and 21 in completed
+        assert 11 not in completed and 20 not in completed
+
+    def test_resumed_batches_skip_completed_rows(self, sample_csv):
+        completed = batch_csv_upload.RowRanges([(1, 8), (13, 20), (9, 9)])
+
+        batches = list(batch_csv_upload.iter_csv_batches(str(sample_csv), 4, completed))
+
+        # A range may span skipped rows, but never a pending row outside the batch
+        assert [(b["start_row"], b["end_row"]) for b in batches] == [(10, 21), (22, 25)]
+        assert [row[1] for row in batches[0]["rows"]] == ["Title 9", "Title 10", "Title 11", "Title 20"]
+
+
+class TestDedupe:
+    """Tests for the uploaded-row manifest."""
+
+    def test_fingerprint_ignores_column_order_and_whitespace(self):
+        original = batch_csv_upload.row_fingerprint(["MediaType", "Title"], ["Book", "Dune "])
+        reordered = batch_csv_upload.row_fingerprint(["Title", "MediaType"], ["Dune", "Book"])
+        changed = batch_csv_upload.row_fingerprint(["MediaType", "Title"], ["Book", "Dune Messiah"])
+
+        assert original == reordered
+        assert original[0] == "book"
+        assert changed != original
+
+    def test_manifest_skips_uploaded_rows(self, sample_csv, tmp_path):
+        manifest = batch_csv_upload.RowManifest(tmp_path / "manifests")
+        first = batch_csv_upload.split_csv_into_batches(str(sample_csv), 10, manifest=manifest)
+        manifest.add(fingerprint for _, _, fingerprint in first[0]["entries"])
+
+        # A fresh manifest reads the fingerprints back from disk
+        manifest = batch_csv_upload.RowManifest(tmp_path / "manifests")
+        second = batch_csv_upload.split_csv_into_batches(str(sample_csv), 10, manifest=manifest)
+
+        assert manifest.skipped_rows == 10
+        assert [b["start_row"] for b in second] == [11, 21]
+        assert sum(b["row_count"] for b in second) == 15
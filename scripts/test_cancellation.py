@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for cancellation.py and how cancellation reaches in-flight work
+
+Run with: python -m pytest test_cancellation.py -v
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.config import settings
+from api.models import JobRequest, ScriptType
+from api.services.job_manager import JobManager
+from api.services.script_runner import _run_in_context, run_normalize_vault
+from cancellation import CancellationToken, OperationCancelled
+from normalize_obsidian_vault import AIDescriptionGenerator
+from resilient_http import HTTPClient
+
+
+@pytest.fixture
+def slow_server(local_server):
+    """Local endpoint that takes `state["delay"]` seconds to answer."""
+    state = {"delay": 5.0, "requests": 0}
+    release = threading.Event()
+
+    def reply(body):
+        state["requests"] += 1
+        release.wait(state["delay"])
+        return 200, {}, b'{"ok": true}'
+
+    yield local_server(reply) + "/", state
+    release.set()
+
+
+class TestCancellationToken:
+    """Tests for cancel state, callbacks and the deadline."""
+
+    def test_callbacks_run_once_and_can_be_unregistered(self):
+        token = CancellationToken()
+        calls = []
+        token.on_cancel(lambda: calls.append("a"))
+        unregister = token.on_cancel(lambda: calls.append("b"))
+        unregister()
+
+        token.cancel("stop")
+        token.cancel("again")
+
+        assert calls == ["a"]
+        assert token.reason == "stop"
+        with pytest.raises(OperationCancelled, match="stop"):
+            token.raise_if_cancelled()
+        # Registering after the cancel runs the callback at once
+        token.on_cancel(lambda: calls.append("late"))
+        assert calls == ["a", "late"]
+
+    def test_deadline_cancels_and_wakes_waiters(self):
+        token = CancellationToken(timeout=0.2)
+        assert not token.cancelled
+        assert 0 < token.remaining() <= 0.2
+
+        started = time.monotonic()
+        assert token.wait(5)
+        assert time.monotonic() - started < 1
+        assert "0.2s deadline" in token.reason
+        assert token.remaining() == 0
+
+
+class TestCancellingRequests:
+    """Tests for HTTPClient calls given a token."""
+
+    def test_cancel_aborts_request_in_flight(self, slow_server):
+        url, state = slow_server
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        started = time.monotonic()
+        with HTTPClient(max_retries=3) as client:
+            with pytest.raises(OperationCancelled):
+                client.post(url, json={}, cancel_token=token)
+
+        assert time.monotonic() - started < 1
+        # Aborted, not retried
+        assert state["requests"] == 1
+
+    def test_deadline_caps_request_timeout(self, slow_server):
+        url, _ = slow_server
+        token = CancellationToken(timeout=0.3)
+
+        started = time.monotonic()
+        with HTTPClient(timeout=60, max_retries=0) as client:
+            with pytest.raises(OperationCancelled, match="deadline"):
+                client.post(url, json={}, cancel_token=token)
+
+        assert time.monotonic() - started < 1
+
+
+class TestRunnerCancellation:
+    """Tests for the script runner not waiting on cancelled thread pool calls."""
+
+    def test_blocking_call_is_abandoned_on_cancel(self):
+        token = CancellationToken()
+
+        async def run():
+            loop = asyncio.get_event_loop()
+            loop.call_later(0.1, token.cancel)
+            started = time.monotonic()
+            with pytest.raises(OperationCancelled):
+                await _run_in_context(loop, time.sleep, 2, cancel_token=token)
+            return time.monotonic() - started
+
+        assert asyncio.run(run()) < 1
+
+    def test_cancelled_vault_job_waits_for_the_note_being_described(self, tmp_path, monkeypatch):
+        note = tmp_path / "vault" / "Habits.md"
+        note.parent.mkdir()
+        note.write_text("---\ntitle: Habits\n---\nNotes about building habits.", encoding="utf-8")
+
+        events = []
+        describing = threading.Event()
+
+        def aborted_describe(self, title, body):
+            describing.set()
+            self.cancel_token.wait(5)
+            time.sleep(0.1)
+            events.append("described")
+            return None
+
+        monkeypatch.setattr(AIDescriptionGenerator, "generate_description", aborted_describe)
+        monkeypatch.setattr(AIDescriptionGenerator, "close", lambda self: events.append("closed"))
+        monkeypatch.setattr(settings, "gradient_api_key", "key")
+        monkeypatch.setattr(settings, "ai_pack_size", 1)
+
+        async def run():
+            job_manager = JobManager(logs_dir=tmp_path / "logs")
+            request = JobRequest(script_type=ScriptType.NORMALIZE_VAULT, vault_path=str(note.parent), use_ai=True)
+            job_id = await job_manager.create_job(request.script_type)
+            await job_manager.start_job(job_id)
+            task = asyncio.create_task(run_normalize_vault(job_manager, job_id, request))
+            await asyncio.get_event_loop().run_in_executor(None, describing.wait, 5)
+            await job_manager.cancel_job(job_id)
+            with pytest.raises(OperationCancelled):
+                await task
+
+        asyncio.run(run())
+        assert events == ["described", "closed"]
+        # No fallback description was written after the cancel
+        assert note.read_text(encoding="utf-8") == "---\ntitle: Habits\n---\nNotes about building habits."
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked_summary.py and chunked descriptions in AIDescriptionGenerator
+
+Run with: python -m pytest test_chunked_summary.py -v
+"""
+
+import random
+
+import pytest
+
+from chunked_summary import (
+    CHUNK_SUMMARY_PROMPT,
+    SummaryCache,
+    split_into_chunks,
+    split_sections,
+)
+from normalize_obsidian_vault import AIDescriptionGenerator
+
+
+def make_note(sections: int = 6, words: int = 150, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocabulary = ["graph", "note", "memory", "vector", "reading", "habit", "review", "idea", "source"]
+    parts = []
+    for number in range(sections):
+        text = " ".join(rng.choice(vocabulary) for _ in range(words))
+        parts.append(f"## Section {number}\n\n{text}\n")
+    return "\n".join(parts)
+
+
+class TestSplitting:
+    """Tests for heading-based chunking."""
+
+    def test_splits_on_top_level_headings_outside_code(self):
+        body = "Intro\n\n# One\ntext\n### Detail\nmore\n```\n# not a heading\n```\n## Two\ntext\n"
+        sections = split_sections(body)
+        assert [section.splitlines()[0] for section in sections] == ["Intro", "# One", "## Two"]
+        assert "# not a heading" in sections[1]
+
+    def test_chunks_respect_size_and_keep_all_text(self):
+        body = make_note(sections=8, words=400)
+        chunks = split_into_chunks(body, max_chars=1500)
+        assert len(chunks) > 8
+        assert all(len(chunk) <= 1500 for chunk in chunks)
+        assert "".join(body.split()) == "".join("".join(chunks).split())
+
+    def test_small_sections_are_merged(self):
+        body = "## A\nshort\n## B\nalso short\n## C\n" + "word " * 300
+        chunks = split_into_chunks(body, max_chars=3000, min_chars=600)
+        assert len(chunks) == 1
+
+    def test_editing_one_section_only_changes_its_chunks(self):
+        body = make_note(sections=6, words=150)
+        edited = body.replace("## Section 3\n\n", "## Section 3\n\nAn added sentence about spaced repetition. ")
+        before, after = split_into_chunks(body), split_into_chunks(edited)
+        changed = set(after) - set(before)
+        assert len(before) == len(after) == 6
+        assert len(changed) == 1
+        assert "Section 3" in changed.pop()
+
+    def test_long_section_boundaries_resync_after_an_edit(self):
+        paragraphs = [" ".join(f"p{n}w{i}" for i in range(40)) for n in range(60)]
+        body = "\n\n".join(paragraphs)
+        edited = body.replace("p2w5", "p2w5 inserted text")
+        before, after = split_into_chunks(body), split_into_chunks(edited)
+        # Only the first chunk (or two, if the edit moved a boundary) differs
+        assert len(set(after) - set(before)) <= 2
+        assert len(before) > 5
+
+
+class TestSummaryCache:
+    """Tests for the summary cache."""
+
+    def test_persists_and_evicts_least_recently_used(self, tmp_path):
+        with SummaryCache(tmp_path, max_entries=2) as cache:
+            cache.put("a", "summary a")
+            cache.put("b", "summary b")
+            assert cache.get("a") == "summary a"
+            cache.put("c", "summary c")
+
+        reopened = SummaryCache(tmp_path)
+        assert reopened.get("b") is None
+        assert reopened.get("a") == "summary a"
+        assert reopened.get("c") == "summary c"
+
+    @pytest.mark.parametrize("content", ['[["a", "summary a"], ["b", "summ', '{"a": 1', "[1, 2]"])
+    def test_corrupt_file_starts_empty(self, tmp_path, content):
+        (tmp_path / "summaries.json").write_text(content, encoding="utf-8")
+
+        with SummaryCache(tmp_path) as cache:
+            assert len(cache) == 0
+            cache.put("a", "summary a")
+        assert SummaryCache(tmp_path).get("a") == "summary a"
+
+    def test_key_depends_on_model_and_prompt(self):
+        assert SummaryCache.key("m1", "p") == SummaryCache.key("m1", "p")
+        assert SummaryCache.key("m1", "p") != SummaryCache.key("m2", "p")
+        assert SummaryCache.key("m1", "p") != SummaryCache.key("m1", "q")
+
+
+class TestChunkedGeneration:
+    """Tests for map-reduce descriptions of long notes."""
+
+    def make_generator(self, tmp_path, prompts):
+        generator = AIDescriptionGenerator(
+            "http://ai.test", "key", chunk_threshold=2000, summary_cache=SummaryCache(tmp_path)
+        )
+        generator.rate_limit_delay = 0
+
+        def complete(prompt, max_length, outputs=1, max_tokens=None):
+            prompts.append(prompt)
+            return generator.model, f"Summary number {len(prompts)} of the note."
+
+        generator._cascade_complete = complete
+        return generator
+
+    def test_unchanged_sections_are_not_summarized_again(self, tmp_path):
+        prompts = []
+        generator = self.make_generator(tmp_path, prompts)
+        body = make_note(sections=5, words=150)
+
+        assert generator.generate_description("Long note", body)
+        first_run = len(prompts)
+        chunk_prompts = [p for p in prompts if p.startswith(CHUNK_SUMMARY_PROMPT[:30])]
+        assert len(chunk_prompts) == 5 and first_run == 6
+
+        # Same content: everything, including the reduce step, comes from the cache
+        generator.generate_description("Long note", body)
+        assert len(prompts) == first_run
+
+        # One edited section: one section summary plus the reduce step
+        edited = body.replace("## Section 2\n\n", "## Section 2\n\nA new opening line. ")
+        generator.generate_description("Long note", edited)
+        assert len(prompts) == first_run + 2
+        assert generator.chunk_stats["chunked_notes"] == 3
+        generator.close()
+
+    def test_short_notes_use_one_request(self, tmp_path):
+        prompts = []
+        generator = self.make_generator(tmp_path, prompts)
+        generator.generate_description("Short note", "A few words about habits.")
+        assert len(prompts) == 1
+        assert generator.chunk_stats["chunked_notes"] == 0
+        generator.close()
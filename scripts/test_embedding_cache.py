@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for embedding_cache.py
+
+Run with: python -m pytest test_embedding_cache.py -v
+"""
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+
+
+def _vector(seed, dimensions=16):
+    vector = np.random.default_rng(seed).normal(size=dimensions)
+    return vector / np.linalg.norm(vector)
+
+
+class TestEmbeddingCache:
+    """Tests for storage, persistence and eviction."""
+
+    @pytest.mark.parametrize("dtype,tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+    def test_round_trip_survives_reopen(self, tmp_path, dtype, tolerance):
+        vectors = {EmbeddingCache.key(f"note {i}"): _vector(i) for i in range(5)}
+        with EmbeddingCache(tmp_path, "model", 16, dtype=dtype) as cache:
+            for key, vector in vectors.items():
+                cache.put(key, vector)
+
+        with EmbeddingCache(tmp_path, "model", 16, dtype=dtype) as cache:
+            for key, vector in vectors.items():
+                assert np.abs(cache.get(key) - vector).max() < tolerance
+
+    def test_keys_are_scoped_by_model_and_dimensions(self, tmp_path):
+        key = EmbeddingCache.key("same text")
+        with EmbeddingCache(tmp_path, "model-a", 16) as cache:
+            cache.put(key, _vector(1))
+
+        with EmbeddingCache(tmp_path, "model-b", 16) as cache:
+            assert cache.get(key) is None
+        with EmbeddingCache(tmp_path, "model-a", 8) as cache:
+            assert cache.get(key) is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        with EmbeddingCache(tmp_path, "model", 16, max_entries=2) as cache:
+            cache.put("a", _vector(1))
+            cache.put("b", _vector(2))
+            cache.get("a")
+            cache.put("c", _vector(3))
+
+            assert "b" not in cache
+            assert "a" in cache and "c" in cache
+            assert cache.evictions == 1
+            assert np.abs(cache.get("c") - _vector(3)).max() < 1e-3
+
+    def test_crash_before_flush_keeps_saved_entries_intact(self, tmp_path):
+        cache = EmbeddingCache(tmp_path, "model", 16, max_entries=2)
+        cache.put("a", _vector(1))
+        cache.put("b", _vector(2))
+        cache.flush()
+        cache.put("c", _vector(3))
+        # No flush or close: the process dies here
+
+        reopened = EmbeddingCache(tmp_path, "model", 16, max_entries=2)
+        assert np.abs(reopened.get("a") - _vector(1)).max() < 1e-3
+        assert "c" not in reopened
+
+        # "b" is evicted for "c"; once the index without it is saved, its row is reused
+        reopened.put("c", _vector(3))
+        assert reopened._index["c"] == 2
+        reopened.flush()
+        reopened.put("d", _vector(4))
+        assert reopened._index["d"] == 1
+        reopened.close()
+
+    def test_compact_storage_size(self, tmp_path):
+        assert EmbeddingCache(tmp_path, "model", 1024).bytes_per_vector == 2048
+        assert EmbeddingCache(tmp_path, "model", 1024, dtype="int8").bytes_per_vector == 1028
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the --pipeline and --benchmark modes of test_openai_embeddings.py
+
+Run with: python -m pytest test_embedding_pipeline.py -v
+"""
+
+import argparse
+import threading
+import time
+
+import pytest
+
+from embedding_cache import EmbeddingCache
+from report_stats import parse_int_list, percentile
+from test_openai_embeddings import (
+    RateLimiter,
+    benchmark_texts,
+    compose_note_text,
+    pack_requests,
+    run_embedding_pipeline,
+    truncate_content,
+    vector_storage_bytes,
+)
+
+
+class TestPackRequests:
+    """Tests for packing notes into embedding requests."""
+
+    def _notes(self, *lengths):
+        return [{"id": str(i), "text": "x" * length} for i, length in enumerate(lengths)]
+
+    def test_respects_item_limit(self):
+        batches = list(pack_requests(self._notes(*[4] * 7), max_tokens=1000, max_items=3))
+
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+
+    def test_respects_token_budget(self):
+        # 40, 40, 40 and 8 estimated tokens
+        batches = list(pack_requests(self._notes(160, 160, 160, 32), max_tokens=100, max_items=100))
+
+        assert [[note["id"] for note in batch] for batch in batches] == [["0", "1"], ["2", "3"]]
+
+    def test_oversized_note_gets_its_own_request(self):
+        batches = list(pack_requests(self._notes(8, 4000, 8), max_tokens=100, max_items=100))
+
+        assert [len(batch) for batch in batches] == [1, 1, 1]
+
+
+class FakeEmbeddingClient:
+    """Embeds a text as [its note number, its length]; texts containing "fail" fail their request."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = self.max_active = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts, estimated_tokens):
+        with self._lock:
+            self.calls.append(texts)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            # Earlier requests answer later, so they finish out of order
+            time.sleep(self.delay / len(self.calls))
+            if any("fail" in text for text in texts):
+                raise RuntimeError("API returned status 500")
+            return [[float(text.split()[1]), float(len(text))] for text in texts], estimated_tokens
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+        self.flushes = 0
+
+    def add(self, note_id, vector):
+        self.rows.append((note_id, list(vector)))
+
+    def flush(self):
+        self.flushes += 1
+
+
+def _pipeline_notes(count, failing=()):
+    return [{"id": f"note-{i}", "text": f"note {i} {'fail' if i in failing else 'text'}"} for i in range(count)]
+
+
+class TestRunEmbeddingPipeline:
+    """Tests for embedding a stream of notes with bounded concurrency."""
+
+    def test_vectors_are_written_in_note_order(self):
+        client, writer = FakeEmbeddingClient(delay=0.05), ListWriter()
+
+        stats = run_embedding_pipeline(_pipeline_notes(12), client, writer, concurrency=3, max_batch_items=2)
+
+        assert [note_id for note_id, _ in writer.rows] == [f"note-{i}" for i in range(12)]
+        assert [vector[0] for _, vector in writer.rows] == list(range(12))
+        assert (stats["notes"], stats["requests"], stats["failed"]) == (12, 6, 0)
+        assert writer.flushes == 1
+
+    def test_failed_request_does_not_stop_the_run(self):
+        client, writer = FakeEmbeddingClient(), ListWriter()
+
+        stats = run_embedding_pipeline(_pipeline_notes(6, failing={2}), client, writer,
+                                       concurrency=2, max_batch_items=2)
+
+        assert [note_id for note_id, _ in writer.rows] == ["note-0", "note-1", "note-4", "note-5"]
+        assert (stats["notes"], stats["failed"], stats["requests"]) == (4, 2, 3)
+
+    def test_requests_in_flight_are_limited(self):
+        client = FakeEmbeddingClient(delay=0.1)
+
+        run_embedding_pipeline(_pipeline_notes(20), client, ListWriter(), concurrency=3, max_batch_items=1)
+
+        assert len(client.calls) == 20
+        assert client.max_active == 3
+
+
+    def test_unchanged_notes_are_not_embedded_again(self, tmp_path):
+        notes = _pipeline_notes(5)
+        with EmbeddingCache(tmp_path, "model", 2) as cache:
+            first = ListWriter()
+            run_embedding_pipeline(notes, FakeEmbeddingClient(), first, max_batch_items=2, cache=cache)
+
+        client, second = FakeEmbeddingClient(), ListWriter()
+        with EmbeddingCache(tmp_path, "model", 2) as cache:
+            stats = run_embedding_pipeline(_pipeline_notes(5), client, second, max_batch_items=2, cache=cache)
+
+        assert client.calls == []
+        assert (stats["cached"], stats["notes"], stats["requests"]) == (len(notes), 0, 0)
+        assert second.rows == first.rows
+
+
+class TestComposeNoteText:
+    """Tests for building the text that gets embedded."""
+
+    def test_prefers_ai_description_and_joins_tags(self):
+        text = compose_note_text("Title", "Manual", "Generated", ["a", "b"], "Body\n\ntext")
+
+        assert text == "Title\nGenerated\nTags: a, b\nBody text"
+
+    def test_truncates_long_content_at_word_boundary(self):
+        content = ("word " * 1000).strip()
+
+        truncated = truncate_content(content, 100)
+
+        assert truncated.endswith("word...")
+        assert len(truncated) <= 103
+
+
+class TestRateLimiter:
+    """Tests for the shared request/token budget."""
+
+    def test_waits_for_token_budget(self):
+        # 600 tokens per minute refills 10 tokens per second
+        limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=600)
+        limiter.acquire(595)
+
+        started = time.monotonic()
+        limiter.acquire(10)
+
+        assert time.monotonic() - started >= 0.4
+
+
+class TestBenchmarkHelpers:
+    """Tests for the benchmark sweep helpers."""
+
+    def test_parse_int_list(self):
+        assert parse_int_list("1, 16,64") == [1, 16, 64]
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_int_list("16,0")
+
+    def test_inputs_are_unique_and_sized(self):
+        texts = benchmark_texts(5, tokens_per_text=50, seed=3) + benchmark_texts(5, tokens_per_text=50, seed=4)
+
+        assert len(set(texts)) == 10
+        assert all(len(text) <= 200 for text in texts)
+
+    def test_percentile_and_storage(self):
+        assert percentile([10, 20, 30, 40], 50) == 20
+        assert percentile([10, 20, 30, 40], 99) == 40
+        assert vector_storage_bytes(1024) == 4104
+        assert vector_storage_bytes(1024, 2) == 2056
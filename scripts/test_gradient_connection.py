@@ -3,19 +3,45 @@
 Test script to verify Gradient AI / DigitalOcean AI connection.
 Run this to troubleshoot AI description generation issues.
 
+With --load-test it drives /chat/completions with real vault notes as
+prompts instead, ramping concurrency step by step. Each step records
+latency percentiles, tokens/sec and error/429 rates; the report shows
+where throughput stops improving (use that to size AIDescriptionGenerator
+concurrency) and can be compared with an earlier report to spot
+provider-side regressions.
+
 Usage:
     python test_gradient_connection.py
     python test_gradient_connection.py --file "path/to/note.md"
+
+    python test_gradient_connection.py --load-test /path/to/vault
+    python test_gradient_connection.py --load-test /path/to/vault --ramp 1,2,4,8 --step-seconds 60
+    python test_gradient_connection.py --load-test /path/to/vault --compare load-test-reports/previous.json
 """
 
 import argparse
+import itertools
 import json
 import os
 import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
 import requests
 
+from report_stats import parse_int_list, percentile
+from resilient_http import HTTPClient, retry_after_seconds
+
+DEFAULT_REPORT_DIR = Path(__file__).parent / "load-test-reports"
+
+# Longest a load-test worker honours Retry-After before trying again
+MAX_RETRY_AFTER = 5.0
+
 
 def test_gradient_connection(test_file: str = None):
     # Get settings from environment - check BOTH naming conventions
@@ -51,13 +77,14 @@ def test_gradient_connection(test_file: str = None):
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
+    # One retry for throttling and transient errors, so failures still show quickly
+    client = HTTPClient(headers=headers, max_retries=1, max_throttle_retries=1)
 
     # Try to list available models first
     print("   Checking available models...")
     try:
-        models_response = requests.get(
+        models_response = client.get(
             f"{base_url}/models",
-            headers=headers,
             timeout=10
         )
         if models_response.status_code == 200:
@@ -93,9 +120,8 @@ def test_gradient_connection(test_file: str = None):
 
     basic_test_passed = False
     try:
-        response = requests.post(
+        response = client.post(
             chat_url,
-            headers=headers,
             json=test_payload,
             timeout=30
         )
@@ -198,9 +224,8 @@ Content:
         print(f"   Prompt length: {len(prompt)} chars")
 
         try:
-            response = requests.post(
+            response = client.post(
                 chat_url,
-                headers=headers,
                 json=desc_payload,
                 timeout=30
             )
@@ -256,9 +281,8 @@ Content:
             continue  # Skip already tested model
 
         try:
-            response = requests.post(
+            response = client.post(
                 chat_url,
-                headers=headers,
                 json={
                     "model": alt_model,
                     "messages": [{"role": "user", "content": "Say hello"}],
@@ -279,11 +303,15 @@ Content:
         except Exception as e:
             print(f"   {alt_model}: [ERROR] {e}")
 
+    client.close()
+
     # Summary
     print()
     print("=" * 60)
     print("SUMMARY")
     print("=" * 60)
+    if client.stats["retries"]:
+        print(f"Requests retried: {client.stats['retries']}")
 
     if basic_test_passed:
         print("[OK] Basic API connection works")
@@ -304,9 +332,343 @@ Content:
     return basic_test_passed
 
 
+def load_vault_prompts(vault_path: Path, model: str, limit: Optional[int] = None) -> List[str]:
+    """
+    Build the prompts a normalize run would send for the vault's notes
+    (at most `limit` notes), as AIDescriptionGenerator does: notes
+    without a description, cut to the model's input token budget, and
+    long notes as one prompt per section. Unreadable notes are skipped.
+    """
+    from chunked_summary import CHUNK_THRESHOLD, build_chunk_prompt, split_into_chunks
+    from normalize_obsidian_vault import AI_DESCRIPTION_PROMPT, note_needing_description, should_ignore
+    from token_budget import DEFAULT_TOKEN_STATS_PATH, TokenBudget, TokenStats
+
+    budget = TokenBudget(TokenStats(DEFAULT_TOKEN_STATS_PATH), model)
+    prompts = []
+    notes = 0
+    for filepath in sorted(Path(vault_path).rglob("*.md")):
+        if limit and notes >= limit:
+            break
+        if should_ignore(filepath.relative_to(vault_path)):
+            continue
+        note = note_needing_description(filepath)
+        if note is None:
+            continue
+        title, body = note
+        notes += 1
+        if len(body) > CHUNK_THRESHOLD:
+            prompts.extend(build_chunk_prompt(title, chunk) for chunk in split_into_chunks(body))
+        else:
+            prompts.append(AI_DESCRIPTION_PROMPT.format(title=title, content=budget.fit(body)))
+    return prompts
+
+
+def send_chat_request(client: HTTPClient, chat_url: str, model: str, prompt: str,
+                      max_tokens: int, timeout: float) -> dict:
+    """
+    Send one description request.
+
+    Returns:
+        {"status", "latency_ms", "prompt_tokens", "completion_tokens",
+        "empty", "retry_after"}; status is the HTTP status code as a string,
+        or "timeout"/"error" when no response was received
+    """
+    outcome = {"status": "error", "latency_ms": None, "prompt_tokens": 0, "completion_tokens": 0,
+               "empty": False, "retry_after": None}
+    started = time.perf_counter()
+    try:
+        response = client.post(
+            chat_url,
+            json={
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": 0.3
+            },
+            timeout=timeout
+        )
+    except requests.exceptions.Timeout:
+        outcome["status"] = "timeout"
+        return outcome
+    except requests.exceptions.RequestException:
+        return outcome
+
+    outcome["latency_ms"] = (time.perf_counter() - started) * 1000
+    outcome["status"] = str(response.status_code)
+    if response.status_code == 429:
+        retry_after = retry_after_seconds(response.headers)
+        outcome["retry_after"] = 1.0 if retry_after is None else retry_after
+    elif response.status_code == 200:
+        try:
+            result = response.json()
+            message = result["choices"][0]["message"]
+            usage = result.get("usage") or {}
+        except (KeyError, IndexError, ValueError):
+            outcome["status"] = "bad_response"
+            return outcome
+        outcome["prompt_tokens"] = usage.get("prompt_tokens", 0)
+        outcome["completion_tokens"] = usage.get("completion_tokens", 0)
+        outcome["empty"] = not (message.get("content") or "").strip()
+    return outcome
+
+
+def summarize_step(concurrency: int, outcomes: List[dict], seconds: float) -> dict:
+    """Aggregate one ramp step into throughput, latency and error figures."""
+    succeeded = [o for o in outcomes if o["status"] == "200"]
+    latencies = sorted(round(o["latency_ms"], 1) for o in succeeded)
+    completion_tokens = sum(o["completion_tokens"] for o in succeeded)
+    prompt_tokens = sum(o["prompt_tokens"] for o in succeeded)
+    total = len(outcomes)
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        statuses[outcome["status"]] = statuses.get(outcome["status"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "seconds": round(seconds, 2),
+        "requests": total,
+        "succeeded": len(succeeded),
+        "empty_responses": sum(1 for o in succeeded if o["empty"]),
+        "statuses": statuses,
+        "error_rate": round((total - len(succeeded)) / total, 4) if total else 0.0,
+        "rate_429": round(statuses.get("429", 0) / total, 4) if total else 0.0,
+        "requests_per_sec": round(len(succeeded) / seconds, 3) if seconds else 0.0,
+        "completion_tokens_per_sec": round(completion_tokens / seconds, 1) if seconds else 0.0,
+        "total_tokens_per_sec": round((prompt_tokens + completion_tokens) / seconds, 1) if seconds else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+
+def run_load_step(client: HTTPClient, chat_url: str, model: str, prompts: Iterator[str],
+                  concurrency: int, step_seconds: float, max_tokens: int, timeout: float) -> dict:
+    """
+    Run `concurrency` closed-loop workers for `step_seconds`.
+
+    Each worker sends its next request as soon as the previous one
+    finishes; a 429 makes that worker wait for Retry-After first.
+    """
+    outcomes: List[dict] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + step_seconds
+
+    def worker() -> None:
+        while time.monotonic() < deadline:
+            with lock:
+                prompt = next(prompts)
+            outcome = send_chat_request(client, chat_url, model, prompt, max_tokens, timeout)
+            with lock:
+                outcomes.append(outcome)
+            if outcome["retry_after"] is not None:
+                time.sleep(min(outcome["retry_after"], MAX_RETRY_AFTER))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    # In-flight requests finish after the deadline, so measure to the last one
+    return summarize_step(concurrency, outcomes, time.perf_counter() - started)
+
+
+def find_saturation(steps: List[dict], threshold: float = 0.1) -> Optional[dict]:
+    """
+    Find where adding concurrency stops paying off.
+
+    Returns:
+        {"concurrency", "requests_per_sec", "peak_requests_per_sec",
+        "peak_concurrency"} for the lowest step within `threshold` of peak
+        throughput, or None if no step succeeded
+    """
+    if not steps:
+        return None
+    peak = max(steps, key=lambda step: step["requests_per_sec"])
+    if peak["requests_per_sec"] <= 0:
+        return None
+    knee = next(step for step in steps if step["requests_per_sec"] >= (1 - threshold) * peak["requests_per_sec"])
+    return {
+        "concurrency": knee["concurrency"],
+        "requests_per_sec": knee["requests_per_sec"],
+        "peak_concurrency": peak["concurrency"],
+        "peak_requests_per_sec": peak["requests_per_sec"],
+    }
+
+
+def compare_reports(previous: dict, current: dict) -> List[str]:
+    """Describe per-step throughput and p95 changes between two reports."""
+    lines = []
+    previous_steps = {step["concurrency"]: step for step in previous.get("steps", [])}
+    for step in current["steps"]:
+        old = previous_steps.get(step["concurrency"])
+        if old is None:
+            continue
+
+        def change(new_value, old_value) -> str:
+            if not old_value or new_value is None:
+                return "   n/a"
+            return f"{(new_value - old_value) / old_value:+6.0%}"
+
+        lines.append(
+            f"{step['concurrency']:>5} {old['requests_per_sec']:>8.2f} -> {step['requests_per_sec']:<8.2f} "
+            f"{change(step['requests_per_sec'], old['requests_per_sec'])}   "
+            f"p95 {old['latency_ms']['p95'] or 0:>8.0f} -> {step['latency_ms']['p95'] or 0:<8.0f} "
+            f"{change(step['latency_ms']['p95'], old['latency_ms']['p95'])}   "
+            f"errors {old['error_rate']:.1%} -> {step['error_rate']:.1%}"
+        )
+    return lines
+
+
+def run_load_test(vault: str, ramp: List[int], step_seconds: float = 30, max_tokens: int = 3000,
+                  timeout: float = 90, limit: Optional[int] = None, stop_error_rate: float = 0.5,
+                  saturation_threshold: float = 0.1, report_path: Optional[Path] = None,
+                  compare_path: Optional[Path] = None) -> bool:
+    """Ramp concurrency against /chat/completions and write a JSON report."""
+    api_key = os.environ.get("GRADIENT_API_KEY")
+    base_url = os.environ.get("GRADIENT_BASE_URL", "https://api.gradient.ai/v1")
+    model = os.environ.get("AI_MODEL") or os.environ.get("GRADIENT_GENERATION_MODEL") or "llama-3.1-8b-instruct"
+    chat_url = f"{base_url.rstrip('/')}/chat/completions"
+
+    print("=" * 60)
+    print("AI Endpoint Load Test")
+    print("=" * 60)
+    print(f"   URL:        {chat_url}")
+    print(f"   Model:      {model}")
+    print(f"   Ramp:       {', '.join(map(str, ramp))} concurrent requests, {step_seconds:g}s per step")
+    print(f"   max_tokens: {max_tokens}")
+    print()
+
+    if not api_key:
+        print("ERROR: GRADIENT_API_KEY is not set!")
+        print("Set it with: $env:GRADIENT_API_KEY = 'your_api_key'")
+        return False
+
+    vault_path = Path(vault)
+    if not vault_path.is_dir():
+        print(f"ERROR: Vault not found: {vault}")
+        return False
+    prompts = load_vault_prompts(vault_path, model, limit)
+    if not prompts:
+        print(f"ERROR: No notes needing a description in {vault}")
+        return False
+    print(f"   Prompts:    {len(prompts)} from {vault_path} "
+          f"(avg {sum(map(len, prompts)) // len(prompts)} chars)")
+    print()
+
+    # Retries, the breaker and the shared 429 pause would hide what the
+    # provider is doing, so every request is measured as sent
+    client = HTTPClient(
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+        pool_size=max(ramp),
+        max_retries=0,
+        max_throttle_retries=0,
+        failure_threshold=None,
+        shared_throttle=False
+    )
+
+    header = (f"{'Conc':>5} {'Reqs':>6} {'Req/s':>7} {'Tok/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'Errors':>7} {'429s':>6} {'Empty':>6}")
+    print(header)
+    print("-" * len(header))
+    started_at = datetime.now(timezone.utc)
+    prompt_cycle = itertools.cycle(prompts)
+    steps = []
+    try:
+        for concurrency in ramp:
+            step = run_load_step(client, chat_url, model, prompt_cycle, concurrency,
+                                 step_seconds, max_tokens, timeout)
+            steps.append(step)
+            latency = step["latency_ms"]
+            print(f"{concurrency:>5} {step['requests']:>6} {step['requests_per_sec']:>7.2f} "
+                  f"{step['completion_tokens_per_sec']:>8.1f} {latency['p50'] or 0:>8.0f} "
+                  f"{latency['p95'] or 0:>8.0f} {latency['p99'] or 0:>8.0f} {step['error_rate']:>7.1%} "
+                  f"{step['rate_429']:>6.1%} {step['empty_responses']:>6}")
+            if step["error_rate"] > stop_error_rate:
+                print(f"   Stopping the ramp: error rate above {stop_error_rate:.0%}")
+                break
+    finally:
+        client.close()
+
+    saturation = find_saturation(steps, saturation_threshold)
+    report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "endpoint": chat_url,
+        "model": model,
+        "config": {
+            "vault": str(vault_path),
+            "prompts": len(prompts),
+            "ramp": ramp,
+            "step_seconds": step_seconds,
+            "max_tokens": max_tokens,
+            "timeout": timeout,
+            "saturation_threshold": saturation_threshold,
+        },
+        "steps": steps,
+        "saturation": saturation,
+    }
+
+    print()
+    print("=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    if saturation:
+        print(f"Peak throughput: {saturation['peak_requests_per_sec']:.2f} req/s "
+              f"at concurrency {saturation['peak_concurrency']}")
+        print(f"Saturates at:    concurrency {saturation['concurrency']} "
+              f"({saturation['requests_per_sec']:.2f} req/s, within {saturation_threshold:.0%} of peak)")
+    else:
+        print("[FAIL] No successful requests")
+
+    if compare_path:
+        try:
+            previous = json.loads(Path(compare_path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Could not read {compare_path}: {e}")
+        else:
+            print()
+            print(f"Compared with {compare_path} ({previous.get('started_at', 'unknown date')}):")
+            for line in compare_reports(previous, report) or ["   No matching concurrency levels"]:
+                print(line)
+
+    if report_path is None:
+        report_path = DEFAULT_REPORT_DIR / f"load-test-{started_at:%Y%m%d-%H%M%S}.json"
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    # Sorted keys and one value per line keep reports diffable
+    report_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print()
+    print(f"Report written to {report_path}")
+
+    return saturation is not None
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Test AI API connection")
     parser.add_argument('--file', type=str, help='Path to an Obsidian markdown file to test with')
+
+    load_test = parser.add_argument_group('load-test mode')
+    load_test.add_argument('--load-test', type=str, metavar='VAULT',
+                           help='Load-test /chat/completions with notes from this vault')
+    load_test.add_argument('--ramp', type=parse_int_list, default=[1, 2, 4, 8, 16],
+                           help='Concurrency levels to step through (default: 1,2,4,8,16)')
+    load_test.add_argument('--step-seconds', type=float, default=30, help='Duration of each step (default: 30)')
+    load_test.add_argument('--max-tokens', type=int, default=3000,
+                           help='max_tokens per request (default: 3000, as AIDescriptionGenerator)')
+    load_test.add_argument('--timeout', type=float, default=90, help='Request timeout in seconds (default: 90)')
+    load_test.add_argument('--limit', type=int, help='Use at most this many notes')
+    load_test.add_argument('--stop-error-rate', type=float, default=0.5,
+                           help='Stop the ramp when a step fails more often than this (default: 0.5)')
+    load_test.add_argument('--saturation-threshold', type=float, default=0.1,
+                           help='Throughput within this fraction of peak counts as saturated (default: 0.1)')
+    load_test.add_argument('--report', type=Path, help='Report file (default: scripts/load-test-reports/<time>.json)')
+    load_test.add_argument('--compare', type=Path, help='Earlier report to compare against')
     args = parser.parse_args()
 
+    if args.load_test:
+        sys.exit(0 if run_load_test(
+            args.load_test, args.ramp, args.step_seconds, args.max_tokens, args.timeout, args.limit,
+            args.stop_error_rate, args.saturation_threshold, args.report, args.compare
+        ) else 1)
     test_gradient_connection(args.file)
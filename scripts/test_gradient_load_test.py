@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the --load-test mode of test_gradient_connection.py
+
+Run with: python -m pytest test_gradient_load_test.py -v
+"""
+
+import time
+from email.utils import formatdate
+
+from chunked_summary import CHUNK_SUMMARY_PROMPT, CHUNK_THRESHOLD
+from resilient_http import HTTPClient
+from test_gradient_connection import (
+    compare_reports,
+    find_saturation,
+    load_vault_prompts,
+    send_chat_request,
+    summarize_step,
+)
+
+
+def _outcome(status="200", latency_ms=100.0, completion_tokens=10):
+    return {"status": status, "latency_ms": latency_ms if status == "200" else None,
+            "prompt_tokens": 50, "completion_tokens": completion_tokens, "empty": False, "retry_after": None}
+
+
+def _step(concurrency, requests_per_sec, p95=100.0):
+    return {"concurrency": concurrency, "requests_per_sec": requests_per_sec,
+            "error_rate": 0.0, "latency_ms": {"p95": p95}}
+
+
+class TestSummarizeStep:
+    """Tests for aggregating one ramp step."""
+
+    def test_counts_errors_and_throttling(self):
+        outcomes = [_outcome(latency_ms=ms) for ms in (100, 200, 300)] + [_outcome("429"), _outcome("timeout")]
+
+        step = summarize_step(4, outcomes, seconds=2.0)
+
+        assert step["succeeded"] == 3
+        assert step["error_rate"] == 0.4
+        assert step["rate_429"] == 0.2
+        assert step["statuses"] == {"200": 3, "429": 1, "timeout": 1}
+        assert step["requests_per_sec"] == 1.5
+        assert step["completion_tokens_per_sec"] == 15.0
+        assert step["latency_ms"]["p50"] == 200
+        assert step["latency_ms"]["p99"] == 300
+
+
+class TestFindSaturation:
+    """Tests for locating the throughput knee."""
+
+    def test_lowest_concurrency_near_peak(self):
+        steps = [_step(1, 4.0), _step(2, 8.0), _step(4, 15.0), _step(8, 16.0), _step(16, 16.2)]
+
+        saturation = find_saturation(steps, threshold=0.1)
+
+        assert saturation["concurrency"] == 4
+        assert saturation["peak_concurrency"] == 16
+
+    def test_none_without_successes(self):
+        assert find_saturation([_step(1, 0.0)]) is None
+
+
+class TestCompareReports:
+    """Tests for comparing reports over time."""
+
+    def test_reports_changes_for_matching_levels(self):
+        previous = {"steps": [_step(1, 4.0, p95=100), _step(2, 8.0)]}
+        current = {"steps": [_step(1, 2.0, p95=150), _step(4, 15.0)]}
+
+        lines = compare_reports(previous, current)
+
+        assert len(lines) == 1
+        assert "-50%" in lines[0] and "+50%" in lines[0]
+
+
+class TestPrompts:
+    """Tests for building load-test prompts from a vault."""
+
+    def test_matches_what_a_normalize_run_sends(self, tmp_path):
+        (tmp_path / "Short.md").write_text("A note about habits. " * 100, encoding="utf-8")
+        (tmp_path / "Described.md").write_text("---\ndescription: Done.\n---\nBody.", encoding="utf-8")
+        (tmp_path / "Broken.md").write_bytes(b"\xff\xfe not utf-8 \xc3")
+        sections = "\n".join(f"## Part {n}\n\n" + "Words about the part. " * 120 for n in range(3))
+        assert len(sections) > CHUNK_THRESHOLD
+        (tmp_path / "long-note.md").write_text(sections, encoding="utf-8")
+
+        prompts = load_vault_prompts(tmp_path, "test-model")
+
+        chunk_prompts = [prompt for prompt in prompts if prompt.startswith(CHUNK_SUMMARY_PROMPT[:30])]
+        assert len(chunk_prompts) == 3 and "Note title: Long Note" in chunk_prompts[0]
+        (short,) = [prompt for prompt in prompts if prompt not in chunk_prompts]
+        assert "Title: Short" in short and "A note about habits." in short
+        assert load_vault_prompts(tmp_path, "test-model", limit=1) == [short]
+
+
+class TestSendChatRequest:
+    """Tests for one measured load-test request."""
+
+    def test_throttled_request_reports_retry_after(self, local_server):
+        headers = iter([{"Retry-After": formatdate(time.time() + 30, usegmt=True)}, {"Retry-After": "soon"}])
+        url = local_server(lambda body: (429, next(headers), b""))
+        client = HTTPClient(max_retries=0, max_throttle_retries=0, failure_threshold=None, shared_throttle=False)
+
+        first = send_chat_request(client, url, "model", "prompt", max_tokens=10, timeout=5)
+        second = send_chat_request(client, url, "model", "prompt", max_tokens=10, timeout=5)
+        client.close()
+
+        assert first["status"] == "429" and 25 < first["retry_after"] <= 30
+        assert second["retry_after"] == 1.0
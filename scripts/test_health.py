@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for api/routers/health.py and api/services/health_prober.py
+
+Run with: python -m pytest test_health.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.config import settings
+from api.routers import health
+from api.services import health_prober
+from api.services.health_prober import HealthProber
+
+
+@pytest.fixture
+def health_api(tmp_path, monkeypatch):
+    """
+    The health router over a prober with a database and AI endpoint
+    configured. `state["failures"]` maps a check to the error it raises;
+    `state["calls"]` counts the checks run.
+    """
+    state = {"failures": {}, "calls": []}
+
+    def fake_check(name):
+        def check(*args):
+            state["calls"].append(name)
+            if name in state["failures"]:
+                raise RuntimeError(state["failures"][name])
+        return check
+
+    monkeypatch.setattr(settings, "database_url", "postgresql://db.test/loopbreaker")
+    monkeypatch.setattr(settings, "gradient_api_key", "key")
+    monkeypatch.setattr(health_prober, "check_database", fake_check("database"))
+    monkeypatch.setattr(health_prober, "check_ai_endpoint", fake_check("ai_endpoint"))
+
+    app = FastAPI()
+    app.include_router(health.router, prefix="/health")
+    app.state.health_prober = HealthProber(tmp_path, interval=60, timeout=1)
+    return TestClient(app), app.state.health_prober, state
+
+
+class TestReadiness:
+    """Tests for the readiness probe served from cached check results."""
+
+    def test_not_ready_before_the_first_probe(self, health_api):
+        client, _, state = health_api
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "starting"
+        assert response.json()["age_seconds"] is None
+        assert state["calls"] == []
+
+    def test_requests_are_served_from_the_last_probe(self, health_api):
+        client, prober, state = health_api
+        asyncio.run(prober.probe())
+        assert sorted(state["calls"]) == ["ai_endpoint", "database"]
+
+        for _ in range(3):
+            response = client.get("/health/ready")
+            assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ready"
+        assert body["age_seconds"] >= 0
+        assert set(body["checks"]) == {"job_store", "database", "ai_endpoint"}
+        assert client.get("/health").json()["database_connected"] is True
+        # No request ran a check of its own
+        assert len(state["calls"]) == 2
+
+    def test_failing_required_dependency_is_reported(self, health_api):
+        client, prober, state = health_api
+        state["failures"]["database"] = "connection refused"
+        asyncio.run(prober.probe())
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        body = response.json()
+        assert body["status"] == "not_ready"
+        database = body["checks"]["database"]
+        assert (database["ok"], database["required"], database["error"]) == (False, True, "connection refused")
+        assert client.get("/health").json()["database_connected"] is False
+
+    def test_optional_dependency_does_not_gate_readiness(self, health_api):
+        client, prober, state = health_api
+        state["failures"]["ai_endpoint"] = "AI endpoint returned status 502"
+        asyncio.run(prober.probe())
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        ai_endpoint = response.json()["checks"]["ai_endpoint"]
+        assert (ai_endpoint["ok"], ai_endpoint["required"]) == (False, False)
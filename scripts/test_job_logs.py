@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for api/services/job_logs.py
+
+Run with: python -m pytest test_job_logs.py -v
+"""
+
+from api.services.job_logs import JobLogStore
+
+
+class TestJobLogStore:
+    """Tests for ranged reads from the on-disk job log."""
+
+    def _store_with_lines(self, tmp_path, count):
+        store = JobLogStore(tmp_path)
+        store.open("job-1", tmp_path / "2024-01-01_job-1")
+        for i in range(count):
+            store.append("job-1", f"line {i}")
+        return store
+
+    def test_reads_range_by_offset(self, tmp_path):
+        store = self._store_with_lines(tmp_path, 50)
+
+        lines, total = store.read("job-1", 10, 3)
+
+        assert lines == ["line 10", "line 11", "line 12"]
+        assert total == 50
+
+    def test_reads_up_to_end_of_log(self, tmp_path):
+        store = self._store_with_lines(tmp_path, 5)
+
+        lines, total = store.read("job-1", 3, 100)
+
+        assert lines == ["line 3", "line 4"]
+        assert total == 5
+
+    def test_multiline_messages_stay_one_entry(self, tmp_path):
+        store = JobLogStore(tmp_path)
+        store.open("job-1", tmp_path / "2024-01-01_job-1")
+        store.append("job-1", "first\nwrapped")
+        store.append("job-1", "second")
+
+        lines, total = store.read("job-1", 0, 10)
+
+        assert lines == ["first\nwrapped", "second"]
+        assert total == 2
+
+    def test_reopened_store_finds_existing_log(self, tmp_path):
+        store = self._store_with_lines(tmp_path, 3)
+        store.close_all()
+
+        reopened = JobLogStore(tmp_path)
+        assert reopened.count("job-1") == 3
+        assert reopened.read("job-1", 2, 1) == (["line 2"], 3)
+
+    def test_unknown_job_is_empty(self, tmp_path):
+        store = JobLogStore(tmp_path)
+        assert store.read("missing", 0, 10) == ([], 0)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for api/services/job_manager.py
+
+Run with: python -m pytest test_job_manager.py -v
+"""
+
+import asyncio
+import math
+
+import pytest
+
+from api.models import ScriptType
+from api.services import job_manager as job_manager_module
+from api.services.job_manager import RATE_TIME_CONSTANT, JobManager, _RateTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateTracker:
+    """Tests for the smoothed counter rate."""
+
+    def test_first_change_sets_the_rate(self):
+        tracker = _RateTracker()
+        assert tracker.update(0, 0.0) is None
+        assert tracker.update(0, 5.0) is None
+        assert tracker.update(10, 10.0) == pytest.approx(1.0)
+
+    def test_stalled_counter_decays_towards_zero(self):
+        tracker = _RateTracker()
+        tracker.update(0, 0.0)
+        tracker.update(20, 10.0)
+
+        assert tracker.update(20, 10.0 + RATE_TIME_CONSTANT) == pytest.approx(2.0 / math.e)
+        assert tracker.update(20, 10.0 + 5 * RATE_TIME_CONSTANT) < 0.02
+
+        # Resuming blends the whole stall into the average
+        resumed = tracker.update(21, 10.0 + 5 * RATE_TIME_CONSTANT)
+        assert resumed == pytest.approx(2.0 * math.exp(-5) + (1 - math.exp(-5)) * 1 / (5 * RATE_TIME_CONSTANT))
+
+
+class TestProgressRates:
+    """Tests for the rates and ETA reported on running jobs."""
+
+    def test_eta_grows_while_a_job_is_stalled(self, tmp_path, monkeypatch):
+        clock = FakeClock()
+        monkeypatch.setattr(job_manager_module.time, "monotonic", clock)
+
+        async def run():
+            manager = JobManager(logs_dir=tmp_path)
+            job_id = await manager.create_job(ScriptType.NORMALIZE_VAULT)
+            await manager.start_job(job_id)
+            await manager.update_progress(job_id, total=100, processed=0)
+
+            clock.now += 10
+            await manager.update_progress(job_id, processed=50)
+            progress = (await manager.get_job(job_id)).progress
+            moving = (progress.items_per_second, progress.eta_seconds)
+
+            clock.now += 2 * RATE_TIME_CONSTANT
+            await manager.update_progress(job_id, current_item="slow-note.md")
+            progress = (await manager.get_job(job_id)).progress
+            stalled = (progress.items_per_second, progress.eta_seconds)
+
+            clock.now += 1
+            await manager.update_progress(job_id, processed=100)
+            progress = (await manager.get_job(job_id)).progress
+            return moving, stalled, progress.eta_seconds
+
+        moving, stalled, finished = asyncio.run(run())
+        assert moving == (5.0, 10.0)
+        assert stalled[0] == pytest.approx(5.0 * math.exp(-2), abs=1e-3)
+        assert stalled[1] > moving[1] * 7
+        assert finished == 0.0
+
+
+class TestHistory:
+    """Tests for dropping old jobs."""
+
+    def test_dropped_jobs_lose_their_neighbor_csv(self, tmp_path):
+        async def run():
+            manager = JobManager(max_jobs_history=2, logs_dir=tmp_path)
+            manager.neighbors_dir.mkdir()
+            job_ids = []
+            for _ in range(3):
+                job_id = await manager.create_job(ScriptType.RELATED_NOTES)
+                await manager.start_job(job_id)
+                (manager.neighbors_dir / f"{job_id}.csv").write_text("note_id,neighbor_id,rank,score\n")
+                await manager.complete_job(job_id, result={})
+                job_ids.append(job_id)
+            return manager, job_ids
+
+        manager, job_ids = asyncio.run(run())
+        remaining = [job_id for job_id in job_ids if asyncio.run(manager.get_job(job_id))]
+        assert len(remaining) < len(job_ids)
+        assert sorted(path.stem for path in manager.neighbors_dir.glob("*.csv")) == sorted(remaining)
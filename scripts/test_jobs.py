@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for api/routers/jobs.py
+
+Run with: python -m pytest test_jobs.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.models import ScriptType
+from api.routers import jobs
+from api.services.job_manager import JobManager
+
+
+@pytest.fixture
+def jobs_api(tmp_path):
+    """The jobs router over a JobManager with one running job."""
+    manager = JobManager(logs_dir=tmp_path)
+
+    async def setup():
+        job_id = await manager.create_job(ScriptType.NORMALIZE_VAULT)
+        await manager.start_job(job_id)
+        return job_id
+
+    job_id = asyncio.run(setup())
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/jobs")
+    app.state.job_manager = manager
+    return TestClient(app), manager, job_id
+
+
+class TestETags:
+    """Tests for conditional job polling."""
+
+    def test_unchanged_job_is_not_modified(self, jobs_api):
+        client, _, job_id = jobs_api
+        first = client.get(f"/jobs/{job_id}")
+        etag = first.headers["ETag"]
+        assert first.status_code == 200 and etag.startswith('W/"')
+
+        again = client.get(f"/jobs/{job_id}", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["ETag"] == etag and again.content == b""
+
+        # Weak comparison, and any tag of a list may match
+        strong = etag[2:]
+        assert client.get(f"/jobs/{job_id}", headers={"If-None-Match": f'"other", {strong}'}).status_code == 304
+        assert client.get("/jobs", headers={"If-None-Match": client.get("/jobs").headers["ETag"]}).status_code == 304
+
+    def test_state_change_gives_a_new_etag(self, jobs_api):
+        client, manager, job_id = jobs_api
+        etag = client.get(f"/jobs/{job_id}").headers["ETag"]
+        list_etag = client.get("/jobs").headers["ETag"]
+
+        asyncio.run(manager.update_progress(job_id, total=10, processed=3))
+
+        changed = client.get(f"/jobs/{job_id}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["progress"]["processed"] == 3
+        assert client.get("/jobs", headers={"If-None-Match": list_etag}).status_code == 200
+
+    def test_projection_has_its_own_etag(self, jobs_api):
+        client, manager, job_id = jobs_api
+        full = client.get(f"/jobs/{job_id}")
+        projected = client.get(f"/jobs/{job_id}", params={"fields": "status,progress"})
+
+        assert projected.json().keys() == {"job_id", "status", "progress"}
+        assert projected.headers["ETag"] != full.headers["ETag"]
+        assert manager.get_etag([job_id], ("job_id", "status", "progress")) == projected.headers["ETag"]
+        summary = client.get(f"/jobs/{job_id}", params={"view": "summary"}).json()
+        assert "logs" not in summary and summary["status"] == "running"
+
+    def test_unknown_fields_are_rejected(self, jobs_api):
+        client, _, job_id = jobs_api
+        response = client.get(f"/jobs/{job_id}", params={"fields": "status,password"})
+        assert response.status_code == 400
+        assert "Unknown job field(s): password" in response.json()["detail"]
+        assert client.get("/jobs", params={"fields": "nope"}).status_code == 400
+
+
+class TestProjections:
+    """Tests for cached job projections."""
+
+    def test_projection_is_rebuilt_after_a_change(self, jobs_api):
+        _, manager, job_id = jobs_api
+        job = asyncio.run(manager.get_job(job_id))
+        fields = ("job_id", "progress")
+
+        first = manager.project_job(job, fields)
+        assert manager.project_job(job, fields) is first
+
+        asyncio.run(manager.update_progress(job_id, processed=5))
+        updated = manager.project_job(job, fields)
+        assert updated is not first
+        assert updated["progress"]["processed"] == 5
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for api/services/metrics.py
+
+Run with: python -m pytest test_metrics.py -v
+"""
+
+import threading
+
+from api.services.metrics import Counter, Histogram, MetricsRegistry
+
+
+class TestHistogram:
+    """Tests for histogram bucketing and exposition."""
+
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram("test_seconds", "Test.", ["kind"], buckets=(0.1, 1.0))
+        child = histogram.labels(kind="a")
+        child.observe(0.05)
+        child.observe(0.1)
+        child.observe(5.0)
+
+        text = histogram.expose()
+        assert 'test_seconds_bucket{kind="a",le="0.1"} 2' in text
+        assert 'test_seconds_bucket{kind="a",le="1"} 2' in text
+        assert 'test_seconds_bucket{kind="a",le="+Inf"} 3' in text
+        assert 'test_seconds_count{kind="a"} 3' in text
+
+    def test_labels_returns_same_child(self):
+        histogram = Histogram("test_seconds", "Test.", ["kind"])
+        assert histogram.labels(kind="a") is histogram.labels(kind="a")
+
+    def test_updates_wait_for_the_child_lock(self):
+        counter = Counter("test_total", "Test.", ["kind"])
+        histogram = Histogram("test_seconds", "Test.", ["kind"], buckets=(0.5,))
+        counter_child, histogram_child = counter.labels(kind="a"), histogram.labels(kind="a")
+
+        with counter_child._lock, histogram_child._lock:
+            threads = [
+                threading.Thread(target=counter_child.inc, args=(2,)),
+                threading.Thread(target=histogram_child.observe, args=(1.0,)),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(0.1)
+            # Both updates are held back while a reader holds the locks
+            assert all(thread.is_alive() for thread in threads)
+            assert (counter_child.value, histogram_child.count) == (0, 0)
+        for thread in threads:
+            thread.join()
+
+        assert counter_child.value == 2
+        assert histogram_child.snapshot() == ([0, 1], 1.0, 1)
+
+
+class TestRegistry:
+    """Tests for registry exposition."""
+
+    def test_exposes_counters_with_type_and_escaped_labels(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("test_total", "Test counter.", ["status"]))
+        counter.inc(status='say "hi"')
+        counter.inc(2, status='say "hi"')
+
+        text = registry.expose()
+        assert "# TYPE test_total counter" in text
+        assert 'test_total{status="say \\"hi\\""} 3' in text
+        assert text.endswith("\n")
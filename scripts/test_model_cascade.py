@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for model_cascade.py and the model cascade in AIDescriptionGenerator
+
+Run with: python -m pytest test_model_cascade.py -v
+"""
+
+import json
+import time
+
+import pytest
+
+from chunked_summary import SummaryCache
+from model_cascade import MIN_SAMPLES, PROBE_EVERY, ModelCascade, is_low_quality
+from normalize_obsidian_vault import AIDescriptionGenerator
+
+
+@pytest.fixture
+def chat_server(local_server):
+    """Chat completions endpoint answering `state["answers"][model]` after `state["delays"][model]` seconds."""
+    state = {"answers": {}, "delays": {}, "requests": []}
+
+    def reply(body):
+        model = json.loads(body)["model"]
+        state["requests"].append(model)
+        time.sleep(state["delays"].get(model, 0))
+        return 200, {}, json.dumps({
+            "choices": [{"message": {"content": state["answers"][model]}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 40, "completion_tokens": 20},
+        }).encode()
+
+    return local_server(reply), state
+
+
+class TestRouting:
+    """Tests for answer checks and routing decisions."""
+
+    def test_low_quality_answers(self):
+        assert is_low_quality(None)
+        assert is_low_quality("   ")
+        assert is_low_quality("I'm sorry, but I can't summarize this note.")
+        assert is_low_quality("<think>The note is about")
+        assert is_low_quality("Habits.")
+        assert not is_low_quality("A checklist for building a weekly review habit.")
+
+    def test_failing_fast_model_is_skipped_but_probed(self):
+        cascade = ModelCascade(["fast", "big"])
+        for _ in range(MIN_SAMPLES):
+            assert cascade.route() == ["fast", "big"]
+            cascade.observe("fast", 0.1, ok=False, escalated=True)
+            cascade.observe("big", 1.0, ok=True)
+
+        routes = [cascade.route() for _ in range(PROBE_EVERY)]
+        assert routes.count(["big"]) == PROBE_EVERY - 1
+        assert routes.count(["fast", "big"]) == 1
+        assert cascade.summary()["fast"]["success_rate"] == 0
+        assert cascade.escalations == MIN_SAMPLES
+
+    def test_fast_model_no_faster_than_fallback_is_skipped(self):
+        cascade = ModelCascade(["fast", "big"])
+        for _ in range(MIN_SAMPLES):
+            cascade.observe("fast", 2.0, ok=True)
+            cascade.observe("big", 1.0, ok=True)
+        assert cascade.route() == ["big"]
+
+
+class TestCascadingGenerator:
+    """Tests for escalating description requests to the larger model."""
+
+    def test_escalates_poor_and_slow_answers(self, chat_server):
+        url, state = chat_server
+        state["answers"] = {"fast": "I'm sorry, I cannot help with that.", "big": "Notes on keeping a weekly review."}
+        generator = AIDescriptionGenerator(url, "key", model="big", fast_model="fast", fast_timeout=0.3)
+        generator.rate_limit_delay = 0
+
+        assert generator.generate_description("Review", "Weekly review notes.") == "Notes on keeping a weekly review."
+        assert state["requests"] == ["fast", "big"]
+
+        # A usable fast answer is not escalated
+        state["answers"]["fast"] = "A short guide to weekly reviews."
+        assert generator.generate_description("Review", "Weekly review notes.") == "A short guide to weekly reviews."
+        assert state["requests"][2:] == ["fast"]
+
+        # A fast model past its timeout is not retried, and its circuit is its own
+        state["delays"]["fast"] = 1.0
+        started = time.monotonic()
+        assert generator.generate_description("Review", "Weekly review notes.") == "Notes on keeping a weekly review."
+        assert time.monotonic() - started < 1
+        assert state["requests"][3:] == ["fast", "big"]
+
+        fast = generator.cascade.summary()["fast"]
+        assert (fast["requests"], fast["successes"]) == (3, 1)
+        assert generator.cascade.escalations == 2
+        assert generator.token_summary()["completion_tokens"] == 20 * 4
+        generator.close()
+
+    def test_summaries_are_cached_under_the_answering_model(self, chat_server, tmp_path):
+        url, state = chat_server
+        state["answers"] = {"fast": "I'm sorry, I cannot help with that.", "big": "A summary of the weekly review."}
+        cache = SummaryCache(tmp_path)
+        generator = AIDescriptionGenerator(url, "key", model="big", fast_model="fast", summary_cache=cache)
+
+        assert generator._cached_complete("Review prompt", 500) == "A summary of the weekly review."
+        assert cache.get(cache.key("big", "Review prompt")) == "A summary of the weekly review."
+        assert cache.get(cache.key("fast", "Review prompt")) is None
+        assert generator._cached_complete("Review prompt", 500) == "A summary of the weekly review."
+        assert state["requests"] == ["fast", "big"]
+
+        # A poor answer from the last model is returned but not cached
+        state["answers"]["big"] = "Sorry."
+        assert generator._cached_complete("Habits prompt", 500) == "Sorry."
+        assert len(cache) == 1
+
+        state["answers"]["fast"] = "A short guide to building habits."
+        assert generator._cached_complete("Habits prompt", 500) == "A short guide to building habits."
+        assert generator._cached_complete("Habits prompt", 500) == "A short guide to building habits."
+        assert cache.get(cache.key("fast", "Habits prompt")) == "A short guide to building habits."
+        assert state["requests"][2:] == ["fast", "big", "fast"]
+        generator.close()
+        cache.close()
@@ -5,6 +5,7 @@ Tests for normalize_obsidian_vault.py
 Run with: python -m pytest test_normalize_obsidian_vault.py -v
 """
 
+import json
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -12,8 +13,10 @@ from unittest.mock import MagicMock
 import pytest
 
 from normalize_obsidian_vault import (
+    AIDescriptionGenerator,
     normalize_file,
     parse_frontmatter,
+    parse_packed_descriptions,
     generate_description,
     normalize_tags,
 )
@@ -246,3 +249,39 @@ class TestNormalizeTags:
         assert normalize_tags([], []) == []
         assert normalize_tags(None, []) == []
         assert normalize_tags([], ['tag']) == ['tag']
+
+
+class TestPromptPacking:
+    """Tests for describing several short notes in one request."""
+
+    def test_parses_json_answer_and_skips_bad_entries(self):
+        reply = 'Sure:\n```json\n{"1": "First note.", "2": "", "3": 7, "9": "Out of range.", "x": "No number."}\n```'
+        assert parse_packed_descriptions(reply, 3) == {1: "First note."}
+        assert parse_packed_descriptions("Not JSON at all", 3) == {}
+        assert parse_packed_descriptions('{"1": "cut off', 3) == {}
+
+    def test_packed_notes_fall_back_to_single_requests(self):
+        prompts = []
+
+        def complete(prompt, max_length, outputs=1, max_tokens=None):
+            prompts.append(prompt)
+            if "=== Note" not in prompt:
+                return "Described on its own."
+            count = prompt.count("=== Note")
+            # Leave out the last note of every pack
+            return json.dumps({str(n): f"Packed description {n}." for n in range(1, count)})
+
+        generator = AIDescriptionGenerator("http://ai.test", "key", pack_size=4)
+        generator.rate_limit_delay = 0
+        generator._complete = complete
+        notes = [(f"Note {n}", f"Short content number {n}.") for n in range(8)]
+
+        generator.prefetch(notes)
+        assert len(prompts) == 2
+        descriptions = [generator.generate_description(title, content) for title, content in notes]
+
+        assert len(prompts) == 4
+        assert descriptions.count("Described on its own.") == 2
+        assert descriptions[0] == "Packed description 1."
+        assert generator.pack_stats == {"packed_requests": 2, "packed_notes": 6, "pack_fallbacks": 2}
+        generator.close()
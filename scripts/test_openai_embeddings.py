@@ -3,19 +3,707 @@
 Test script to verify OpenAI embeddings functionality.
 Run this to troubleshoot embedding generation issues.
 
+With --pipeline it embeds a whole corpus instead: notes are streamed from
+the Notes table (or an Obsidian vault), packed into requests by estimated
+token count, embedded concurrently within rate limits and written back in
+bulk. Vectors are cached by content hash (see embedding_cache.py), so
+re-running over unchanged notes makes no API calls.
+
+With --benchmark it sweeps batch size x dimensions x concurrency against
+the endpoint (OPENAI_BASE_URL can point at a local stand-in) and reports
+throughput, latency percentiles, bytes per vector and the storage cost of
+a million notes at each dimension count.
+
 Usage:
     python test_openai_embeddings.py
     python test_openai_embeddings.py --model "text-embedding-3-small"
     python test_openai_embeddings.py --dimensions 512
     python test_openai_embeddings.py --text "Custom text to embed"
+
+    python test_openai_embeddings.py --pipeline --database-url "postgresql://..."
+    python test_openai_embeddings.py --pipeline --vault /path/to/vault --output vectors.jsonl
+
+    python test_openai_embeddings.py --benchmark
+    python test_openai_embeddings.py --benchmark --batch-sizes 16,64 --dims 512,1024 --concurrency-levels 1,4
 """
 
 import argparse
+import csv
 import json
 import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
 
+try:
+    import psycopg2
+    from psycopg2.extras import RealDictCursor, execute_values
+except ImportError:
+    psycopg2 = None  # Only needed for --pipeline with the database
+
+from report_stats import parse_int_list, percentile
+from resilient_http import CallRecord, HTTPClient
+
+try:
+    from embedding_cache import STORAGE_DTYPES, EmbeddingCache
+except ImportError:
+    EmbeddingCache = None  # Needs numpy; --pipeline then runs without a cache
+    STORAGE_DTYPES = ("float16", "int8")
+
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_CACHE_DIR = Path(__file__).parent / "embedding-cache"
+
+# Rough token estimate for English text; avoids a tokenizer dependency
+CHARS_PER_TOKEN = 4
+
+# Same cap the backend applies to note content before embedding
+MAX_CONTENT_CHARS = 4000
+
+# OpenAI limits: 2048 inputs and 300k tokens per request
+MAX_API_BATCH_ITEMS = 2048
+MAX_API_BATCH_TOKENS = 300_000
+
+MAX_RETRIES = 5
+
+# pgvector stores 4 bytes per dimension (2 for halfvec) plus an 8 byte header
+PGVECTOR_HEADER_BYTES = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def truncate_content(content: Optional[str], max_length: int = MAX_CONTENT_CHARS) -> str:
+    """Collapse whitespace and cut at a word boundary, like the backend's TruncateContent."""
+    if not content or not content.strip():
+        return ""
+    content = re.sub(r"\s+", " ", content).strip()
+    if len(content) <= max_length:
+        return content
+    truncated = content[:max_length]
+    last_space = truncated.rfind(" ")
+    if last_space > max_length * 0.8:
+        truncated = truncated[:last_space]
+    return truncated + "..."
+
+
+def compose_note_text(title: Optional[str], description: Optional[str], ai_description: Optional[str],
+                      tags: Optional[List[str]], content: Optional[str]) -> str:
+    """Build the text to embed for a note, matching the backend's ComposeNoteEmbeddingText."""
+    parts = []
+    if title and title.strip():
+        parts.append(title)
+    if ai_description and ai_description.strip():
+        parts.append(ai_description)
+    elif description and description.strip():
+        parts.append(description)
+    if tags:
+        parts.append(f"Tags: {', '.join(tags)}")
+    content = truncate_content(content)
+    if content:
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def iter_db_notes(database_url: str, reembed: bool = False, limit: Optional[int] = None) -> Iterator[dict]:
+    """
+    Stream notes from the Notes table with a server-side cursor.
+
+    Yields {"id", "text"} dicts. Only notes without an embedding are
+    included unless `reembed` is set.
+    """
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 is required. Install with: pip install psycopg2-binary")
+
+    query = '''
+        SELECT "Id", "Title", "Description", "AiDescription", "Tags", "Content"
+        FROM "Notes"
+    '''
+    if not reembed:
+        query += ' WHERE "Embedding" IS NULL'
+    query += ' ORDER BY "DateImported"'
+    if limit:
+        query += f" LIMIT {int(limit)}"
+
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor(name="embedding_notes", cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = 500
+            cursor.execute(query)
+            for row in cursor:
+                text = compose_note_text(row["Title"], row["Description"], row["AiDescription"],
+                                         row["Tags"], row["Content"])
+                if text.strip():
+                    yield {"id": str(row["Id"]), "text": text}
+    finally:
+        conn.close()
+
+
+def iter_vault_notes(vault_path: Path, limit: Optional[int] = None) -> Iterator[dict]:
+    """
+    Stream notes from an Obsidian vault.
+
+    Yields {"id", "text"} dicts where the id is the note's path relative
+    to the vault.
+    """
+    from normalize_obsidian_vault import parse_frontmatter, should_ignore, title_from_filename
+
+    vault_path = Path(vault_path)
+    count = 0
+    for filepath in sorted(vault_path.rglob("*.md")):
+        if should_ignore(filepath.relative_to(vault_path)):
+            continue
+        try:
+            frontmatter, body = parse_frontmatter(filepath.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError):
+            continue
+        tags = frontmatter.get("tags") or []
+        text = compose_note_text(
+            str(frontmatter.get("title") or title_from_filename(filepath)),
+            frontmatter.get("description"),
+            None,
+            [str(tag) for tag in tags] if isinstance(tags, list) else [str(tags)],
+            body
+        )
+        if not text.strip():
+            continue
+        yield {"id": filepath.relative_to(vault_path).as_posix(), "text": text}
+        count += 1
+        if limit and count >= limit:
+            return
+
+
+def pack_requests(notes: Iterable[dict], max_tokens: int, max_items: int) -> Iterator[List[dict]]:
+    """
+    Group notes into embedding requests.
+
+    A request holds at most `max_items` notes and, unless a single note is
+    larger on its own, at most `max_tokens` estimated tokens. Each note
+    gets a "tokens" estimate.
+    """
+    batch = []
+    batch_tokens = 0
+    for note in notes:
+        note["tokens"] = estimate_tokens(note["text"])
+        if batch and (len(batch) >= max_items or batch_tokens + note["tokens"] > max_tokens):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(note)
+        batch_tokens += note["tokens"]
+    if batch:
+        yield batch
+
+
+class RateLimiter:
+    """
+    Token-bucket limits on requests and tokens per minute.
+
+    Shared by all worker threads; acquire() blocks until the request fits
+    in both budgets.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self._rates = (requests_per_minute / 60.0, tokens_per_minute / 60.0)
+        self._capacity = (float(requests_per_minute), float(tokens_per_minute))
+        self._available = list(self._capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        # A request bigger than the whole token budget waits for a full bucket
+        needed = (1.0, min(float(tokens), self._capacity[1]))
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._updated = now
+                self._available = [
+                    min(capacity, available + rate * elapsed)
+                    for available, rate, capacity in zip(self._available, self._rates, self._capacity)
+                ]
+                shortfall = max(
+                    (need - available) / rate
+                    for need, available, rate in zip(needed, self._available, self._rates)
+                )
+                if shortfall <= 0:
+                    self._available = [available - need for available, need in zip(self._available, needed)]
+                    return
+            time.sleep(shortfall)
+
+
+class EmbeddingClient:
+    """Calls the embeddings endpoint over the shared HTTP client (retries, circuit breaker)."""
+
+    def __init__(self, api_key: str, model: str, dimensions: int, base_url: str = DEFAULT_BASE_URL,
+                 rate_limiter: Optional[RateLimiter] = None, pool_size: int = 4, timeout: float = 60):
+        self.model = model
+        self.dimensions = dimensions
+        self.url = f"{base_url.rstrip('/')}/embeddings"
+        self.rate_limiter = rate_limiter
+        # Uncompressed request/response payload bytes and retried attempts
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self.http = HTTPClient(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            timeout=timeout,
+            pool_size=pool_size,
+            max_retries=MAX_RETRIES,
+            max_throttle_retries=MAX_RETRIES,
+            on_call=self._on_call
+        )
+
+    def _on_call(self, record: CallRecord) -> None:
+        if record.attempt:
+            with self._lock:
+                self.retries += 1
+
+    def embed(self, texts: List[str], estimated_tokens: int) -> Tuple[List[List[float]], int]:
+        """
+        Embed a batch of texts.
+
+        Returns:
+            (vectors in input order, tokens billed)
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire(estimated_tokens)
+        response = self.http.post(self.url, json={"model": self.model, "input": texts, "dimensions": self.dimensions})
+        response.raise_for_status()
+        with self._lock:
+            self.bytes_sent += len(response.request.body or b"")
+            self.bytes_received += len(response.content)
+        result = response.json()
+        data = sorted(result.get("data", []), key=lambda item: item["index"])
+        if len(data) != len(texts):
+            raise RuntimeError(f"Expected {len(texts)} embeddings, got {len(data)}")
+        return [item["embedding"] for item in data], result.get("usage", {}).get("total_tokens", 0)
+
+    def close(self) -> None:
+        self.http.close()
+
+
+def vector_literal(vector: List[float]) -> str:
+    """Format a vector for a pgvector ::vector cast."""
+    return "[" + ",".join(repr(float(value)) for value in vector) + "]"
+
+
+class DatabaseVectorWriter:
+    """Buffers vectors and writes them to the Notes table in one UPDATE per flush."""
+
+    UPDATE_SQL = '''
+        UPDATE "Notes" AS n
+        SET "Embedding" = v.embedding::vector,
+            "EmbeddingGeneratedAt" = v.generated_at,
+            "EmbeddingModel" = v.model
+        FROM (VALUES %s) AS v(id, embedding, generated_at, model)
+        WHERE n."Id" = v.id::uuid
+    '''
+
+    def __init__(self, database_url: str, model: str, flush_size: int = 200):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 is required. Install with: pip install psycopg2-binary")
+        self.model = model
+        self.flush_size = flush_size
+        self.written = 0
+        self._conn = psycopg2.connect(database_url)
+        self._buffer: List[tuple] = []
+
+    def add(self, note_id: str, vector: List[float]) -> None:
+        self._buffer.append((note_id, vector_literal(vector), datetime.now(timezone.utc), self.model))
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        with self._conn.cursor() as cursor:
+            execute_values(cursor, self.UPDATE_SQL, self._buffer, page_size=len(self._buffer))
+        self._conn.commit()
+        self.written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+class JsonlVectorWriter:
+    """Writes {"id", "model", "embedding"} lines to a file."""
+
+    def __init__(self, path: Path, model: str):
+        self.model = model
+        self.written = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def add(self, note_id: str, vector: List[float]) -> None:
+        self._file.write(json.dumps({"id": note_id, "model": self.model, "embedding": vector}) + "\n")
+        self.written += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def run_embedding_pipeline(notes: Iterable[dict], client: EmbeddingClient, writer,
+                           concurrency: int = 4, max_batch_tokens: int = 50_000,
+                           max_batch_items: int = 256, cache=None) -> Dict[str, float]:
+    """
+    Embed a stream of notes and pass the vectors to `writer`.
+
+    Notes found in `cache` (an EmbeddingCache) are written without an API
+    call, and new vectors are added to it. At most `concurrency` requests
+    are in flight; writes and cache access happen on the calling thread.
+    Requested vectors are written in note order, cached ones as soon as
+    they are found. A failed request is counted and the run goes on.
+
+    Returns:
+        Stats dict: notes, cached, failed, requests, tokens, seconds
+    """
+    stats = {"notes": 0, "cached": 0, "failed": 0, "requests": 0, "tokens": 0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    def uncached(notes):
+        for note in notes:
+            if cache is not None:
+                note["key"] = cache.key(note["text"])
+                vector = cache.get(note["key"])
+                if vector is not None:
+                    writer.add(note["id"], vector.tolist())
+                    stats["cached"] += 1
+                    continue
+            yield note
+
+    def finish(future, batch):
+        stats["requests"] += 1
+        try:
+            vectors, tokens = future.result()
+        except Exception as e:
+            stats["failed"] += len(batch)
+            print(f"   [FAIL] Request for {len(batch)} notes failed: {e}")
+            return
+        stats["tokens"] += tokens
+        for note, vector in zip(batch, vectors):
+            writer.add(note["id"], vector)
+            if cache is not None and len(vector) == cache.dimensions:
+                cache.put(note["key"], vector)
+        stats["notes"] += len(batch)
+        if stats["requests"] % 10 == 0:
+            rate = stats["notes"] / (time.perf_counter() - started)
+            print(f"   {stats['notes']} notes embedded ({rate:.1f} notes/s)")
+            # Keep the saved index current, so an interrupted run loses at most 10 requests' vectors
+            if cache is not None:
+                cache.flush()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        for batch in pack_requests(uncached(notes), max_batch_tokens, max_batch_items):
+            if len(in_flight) >= concurrency:
+                # Finish the oldest request first so vectors are written in note order
+                oldest = next(iter(in_flight))
+                finish(oldest, in_flight.pop(oldest))
+            texts = [note["text"] for note in batch]
+            tokens = sum(note["tokens"] for note in batch)
+            in_flight[executor.submit(client.embed, texts, tokens)] = batch
+        for future in list(in_flight):
+            finish(future, in_flight.pop(future))
+
+    writer.flush()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def run_pipeline_command(args: argparse.Namespace) -> bool:
+    """Run --pipeline mode from parsed command line arguments."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    model = args.model or os.environ.get("OPENAI_EMBEDDING_MODEL") or "text-embedding-3-large"
+    dimensions = args.dimensions or int(os.environ.get("OPENAI_DIMENSIONS", "1024"))
+    base_url = os.environ.get("OPENAI_BASE_URL", DEFAULT_BASE_URL)
+    database_url = args.database_url or os.environ.get("DATABASE_URL")
+
+    print("=" * 60)
+    print("OpenAI Embedding Pipeline")
+    print("=" * 60)
+    print(f"Source:       {'vault ' + str(args.vault) if args.vault else 'Notes table'}")
+    print(f"Model:        {model} ({dimensions}D)")
+    print(f"Batching:     up to {args.max_batch_items} notes / {args.max_batch_tokens} tokens per request")
+    print(f"Concurrency:  {args.concurrency} (limits: {args.rpm} req/min, {args.tpm} tokens/min)")
+    print("=" * 60)
+    print()
+
+    if not api_key:
+        print("ERROR: OPENAI_API_KEY is not set!")
+        return False
+
+    if args.vault:
+        if not args.output:
+            print("ERROR: --output is required with --vault")
+            return False
+        notes = iter_vault_notes(args.vault, args.limit)
+        writer = JsonlVectorWriter(args.output, model)
+    else:
+        if not database_url:
+            print("ERROR: --database-url or DATABASE_URL is required without --vault")
+            return False
+        notes = iter_db_notes(database_url, args.reembed, args.limit)
+        writer = DatabaseVectorWriter(database_url, model, args.write_batch)
+
+    cache = None
+    if not args.no_cache:
+        if EmbeddingCache is None:
+            print("WARNING: numpy is not installed; running without the embedding cache")
+        else:
+            cache = EmbeddingCache(args.cache_dir, model, dimensions,
+                                   dtype=args.cache_dtype, max_entries=args.cache_max_entries)
+
+    client = EmbeddingClient(
+        api_key, model, dimensions, base_url,
+        rate_limiter=RateLimiter(args.rpm, args.tpm),
+        pool_size=args.concurrency
+    )
+    try:
+        stats = run_embedding_pipeline(
+            notes, client, writer,
+            concurrency=args.concurrency,
+            max_batch_tokens=min(args.max_batch_tokens, MAX_API_BATCH_TOKENS),
+            max_batch_items=min(args.max_batch_items, MAX_API_BATCH_ITEMS),
+            cache=cache
+        )
+    finally:
+        client.close()
+        writer.close()
+        if cache is not None:
+            cache.close()
+
+    print()
+    print("=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print(f"Notes embedded:  {stats['notes']}")
+    if cache is not None:
+        print(f"Cache hits:      {stats['cached']} ({len(cache)} vectors cached, "
+              f"{cache.bytes_per_vector} bytes each as {cache.dtype})")
+    print(f"Notes failed:    {stats['failed']}")
+    print(f"Requests:        {stats['requests']} "
+          f"({stats['notes'] / max(stats['requests'], 1):.1f} notes/request)")
+    print(f"Tokens used:     {stats['tokens']}")
+    print(f"Vectors written: {writer.written}")
+    print(f"Elapsed:         {stats['seconds']:.1f}s ({stats['notes'] / max(stats['seconds'], 1e-9):.1f} notes/s)")
+    return stats["failed"] == 0
+
+
+def vector_storage_bytes(dimensions: int, bytes_per_dimension: int = 4) -> int:
+    """Bytes pgvector uses to store one vector (4 per dimension for vector, 2 for halfvec)."""
+    return dimensions * bytes_per_dimension + PGVECTOR_HEADER_BYTES
+
+
+# Vocabulary for generated benchmark inputs
+BENCHMARK_WORDS = (
+    "note idea book film podcast article habit project reading summary theme memory argument chapter "
+    "question insight research quote character history science music design system practice review"
+).split()
+
+
+def benchmark_texts(count: int, tokens_per_text: int, seed: int, samples: Optional[List[str]] = None) -> List[str]:
+    """
+    Build `count` inputs of roughly `tokens_per_text` tokens.
+
+    Inputs are drawn from `samples` (e.g. vault notes) when given, otherwise
+    generated. Each starts with a unique prefix so no two requests repeat.
+    """
+    rng = random.Random(seed)
+    max_chars = tokens_per_text * CHARS_PER_TOKEN
+    texts = []
+    for i in range(count):
+        if samples:
+            body = rng.choice(samples)
+        else:
+            body = " ".join(rng.choice(BENCHMARK_WORDS) for _ in range(tokens_per_text))
+        texts.append(f"[{seed}-{i}] {body}"[:max_chars])
+    return texts
+
+
+def run_benchmark_case(client: EmbeddingClient, batch_size: int, concurrency: int, request_count: int,
+                       tokens_per_text: int, samples: Optional[List[str]] = None, seed: int = 0) -> dict:
+    """
+    Send `request_count` requests of `batch_size` inputs, `concurrency` at a time.
+
+    Returns:
+        Throughput, latency percentiles (ms) and payload bytes for the case
+    """
+    # Inputs are built up front so text generation is not timed
+    batches = [benchmark_texts(batch_size, tokens_per_text, seed + i, samples) for i in range(request_count)]
+    estimated = [sum(estimate_tokens(text) for text in batch) for batch in batches]
+
+    # One untimed request opens a connection and absorbs any cold start
+    client.embed(benchmark_texts(1, tokens_per_text, seed - 1, samples), tokens_per_text)
+    bytes_sent, bytes_received, retries = client.bytes_sent, client.bytes_received, client.retries
+
+    def timed(index: int) -> Tuple[float, int]:
+        started = time.perf_counter()
+        vectors, tokens = client.embed(batches[index], estimated[index])
+        return (time.perf_counter() - started) * 1000, tokens
+
+    latencies: List[float] = []
+    tokens = errors = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(timed, i) for i in range(request_count)]
+        for future in futures:
+            try:
+                latency_ms, used = future.result()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(latency_ms)
+            tokens += used
+    seconds = time.perf_counter() - started
+
+    latencies = sorted(round(latency, 1) for latency in latencies)
+    succeeded = len(latencies)
+    vectors = succeeded * batch_size
+    return {
+        "dimensions": client.dimensions,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": request_count,
+        "errors": errors,
+        "retries": client.retries - retries,
+        "seconds": round(seconds, 3),
+        "requests_per_sec": round(succeeded / seconds, 2) if seconds else None,
+        "vectors_per_sec": round(vectors / seconds, 1) if seconds else None,
+        "tokens": tokens,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "bytes_sent_per_vector": round((client.bytes_sent - bytes_sent) / vectors) if vectors else None,
+        "bytes_received_per_vector": round((client.bytes_received - bytes_received) / vectors) if vectors else None,
+    }
+
+
+def write_benchmark_results(path: Path, results: List[dict]) -> None:
+    """Write results as CSV (for a .csv path) or JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+def run_benchmark_command(args: argparse.Namespace) -> bool:
+    """Run --benchmark mode from parsed command line arguments."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    model = args.model or os.environ.get("OPENAI_EMBEDDING_MODEL") or "text-embedding-3-large"
+    base_url = os.environ.get("OPENAI_BASE_URL", DEFAULT_BASE_URL)
+    dimensions_list = [args.dimensions] if args.dimensions else args.dims
+    cases = len(dimensions_list) * len(args.batch_sizes) * len(args.concurrency_levels)
+    estimated_tokens = (len(dimensions_list) * len(args.concurrency_levels) * args.benchmark_requests
+                        * sum(args.batch_sizes) * args.tokens_per_text)
+
+    print("=" * 60)
+    print("OpenAI Embedding Benchmark")
+    print("=" * 60)
+    print(f"Endpoint:     {base_url}")
+    print(f"Model:        {model}")
+    print(f"Dimensions:   {', '.join(map(str, dimensions_list))}")
+    print(f"Batch sizes:  {', '.join(map(str, args.batch_sizes))}")
+    print(f"Concurrency:  {', '.join(map(str, args.concurrency_levels))}")
+    print(f"Cases:        {cases} x {args.benchmark_requests} requests, "
+          f"~{args.tokens_per_text} tokens per input (~{estimated_tokens:,} tokens total)")
+    print("=" * 60)
+    print()
+
+    if not api_key:
+        if base_url == DEFAULT_BASE_URL:
+            print("ERROR: OPENAI_API_KEY is not set!")
+            return False
+        api_key = "benchmark"  # Local stand-ins usually ignore the key
+
+    samples = None
+    if args.vault:
+        samples = [note["text"] for note in iter_vault_notes(args.vault, args.limit)]
+        print(f"Using {len(samples)} notes from {args.vault} as input text")
+        print()
+
+    results = []
+    header = (f"{'Dims':>5} {'Batch':>5} {'Conc':>4} {'Req/s':>7} {'Vec/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'B out/vec':>9} {'B in/vec':>9} {'Err':>4} {'Retry':>5}")
+    print(header)
+    print("-" * len(header))
+    seed = 0
+    for dimensions in dimensions_list:
+        for concurrency in args.concurrency_levels:
+            client = EmbeddingClient(api_key, model, dimensions, base_url, pool_size=concurrency)
+            try:
+                for batch_size in args.batch_sizes:
+                    seed += args.benchmark_requests + 1
+                    try:
+                        result = run_benchmark_case(client, batch_size, concurrency, args.benchmark_requests,
+                                                    args.tokens_per_text, samples, seed)
+                    except Exception as e:
+                        print(f"{dimensions:>5} {batch_size:>5} {concurrency:>4}  FAILED: {e}")
+                        continue
+                    results.append(result)
+
+                    def fmt(value, width, spec=".1f"):
+                        return f"{value:>{width}{spec}}" if value is not None else f"{'-':>{width}}"
+                    print(f"{dimensions:>5} {batch_size:>5} {concurrency:>4} {fmt(result['requests_per_sec'], 7)} "
+                          f"{fmt(result['vectors_per_sec'], 8)} {fmt(result['p50_ms'], 8)} "
+                          f"{fmt(result['p95_ms'], 8)} {fmt(result['p99_ms'], 8)} "
+                          f"{fmt(result['bytes_sent_per_vector'], 9, 'd')} "
+                          f"{fmt(result['bytes_received_per_vector'], 9, 'd')} "
+                          f"{result['errors']:>4} {result['retries']:>5}")
+            finally:
+                client.close()
+
+    print()
+    print("=" * 60)
+    print("STORAGE PER MILLION NOTES")
+    print("=" * 60)
+    print(f"(pgvector column only, at ${args.storage_price:.3f}/GB-month)")
+    print(f"{'Dims':>5} {'vector GB':>10} {'$/month':>8} {'halfvec GB':>11} {'$/month':>8}")
+    for dimensions in dimensions_list:
+        full_gb = vector_storage_bytes(dimensions) * 1_000_000 / 1e9
+        half_gb = vector_storage_bytes(dimensions, 2) * 1_000_000 / 1e9
+        print(f"{dimensions:>5} {full_gb:>10.2f} {full_gb * args.storage_price:>8.2f} "
+              f"{half_gb:>11.2f} {half_gb * args.storage_price:>8.2f}")
+
+    if results:
+        print()
+        print("=" * 60)
+        print("FASTEST SETTINGS PER DIMENSION COUNT")
+        print("=" * 60)
+        for dimensions in dimensions_list:
+            candidates = [r for r in results if r["dimensions"] == dimensions and not r["errors"]]
+            if candidates:
+                best = max(candidates, key=lambda r: r["vectors_per_sec"] or 0)
+                print(f"{dimensions:>5}D: batch {best['batch_size']}, concurrency {best['concurrency']} "
+                      f"-> {best['vectors_per_sec']} vectors/s, p95 {best['p95_ms']:.0f} ms")
+
+    if args.benchmark_output and results:
+        write_benchmark_results(args.benchmark_output, results)
+        print()
+        print(f"Results written to {args.benchmark_output}")
+
+    return bool(results) and all(r["errors"] == 0 for r in results)
+
 
 def test_openai_embeddings(model_override: str = None, dimensions_override: int = None, custom_text: str = None):
     # Get settings from environment
@@ -49,6 +737,8 @@ def test_openai_embeddings(model_override: str = None, dimensions_override: int
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
+    # One retry for throttling and transient errors, so failures still show quickly
+    client = HTTPClient(headers=headers, max_retries=1, max_throttle_retries=1)
 
     embeddings_url = "https://api.openai.com/v1/embeddings"
 
@@ -71,9 +761,8 @@ def test_openai_embeddings(model_override: str = None, dimensions_override: int
     actual_dimensions = None
 
     try:
-        response = requests.post(
+        response = client.post(
             embeddings_url,
-            headers=headers,
             json=test_payload,
             timeout=30
         )
@@ -140,9 +829,8 @@ def test_openai_embeddings(model_override: str = None, dimensions_override: int
     print(f"   Testing with {len(batch_texts)} texts...")
 
     try:
-        response = requests.post(
+        response = client.post(
             embeddings_url,
-            headers=headers,
             json=batch_payload,
             timeout=30
         )
@@ -194,9 +882,8 @@ def test_openai_embeddings(model_override: str = None, dimensions_override: int
 
     for sample in media_samples:
         try:
-            response = requests.post(
+            response = client.post(
                 embeddings_url,
-                headers=headers,
                 json={
                     "model": model,
                     "input": [sample["text"]],
@@ -227,9 +914,8 @@ def test_openai_embeddings(model_override: str = None, dimensions_override: int
 
     for test_dim in dimension_tests:
         try:
-            response = requests.post(
+            response = client.post(
                 embeddings_url,
-                headers=headers,
                 json={
                     "model": model,
                     "input": ["Test embedding dimensions"],
@@ -254,10 +940,14 @@ def test_openai_embeddings(model_override: str = None, dimensions_override: int
             print(f"   {test_dim}D: [ERROR] {e}")
     print()
 
+    client.close()
+
     # Summary
     print("=" * 60)
     print("SUMMARY")
     print("=" * 60)
+    if client.stats["retries"]:
+        print(f"Requests retried: {client.stats['retries']}")
 
     if basic_test_passed:
         print(f"[OK] OpenAI embedding generation works!")
@@ -285,6 +975,50 @@ if __name__ == "__main__":
     parser.add_argument('--model', type=str, help='Embedding model to test (e.g., text-embedding-3-large)')
     parser.add_argument('--dimensions', type=int, help='Embedding dimensions (e.g., 1024)')
     parser.add_argument('--text', type=str, help='Custom text to embed')
+
+    pipeline = parser.add_argument_group('pipeline mode')
+    pipeline.add_argument('--pipeline', action='store_true', help='Embed all notes instead of running the tests')
+    pipeline.add_argument('--database-url', type=str, help='PostgreSQL URL (default: DATABASE_URL)')
+    pipeline.add_argument('--vault', type=Path, help='Embed an Obsidian vault instead of the Notes table')
+    pipeline.add_argument('--output', type=Path, help='JSON lines file for vault vectors')
+    pipeline.add_argument('--reembed', action='store_true', help='Include notes that already have an embedding')
+    pipeline.add_argument('--limit', type=int, help='Embed at most this many notes')
+    pipeline.add_argument('--concurrency', type=int, default=4, help='Requests in flight (default: 4)')
+    pipeline.add_argument('--max-batch-tokens', type=int, default=50_000,
+                          help='Estimated tokens per request (default: 50000)')
+    pipeline.add_argument('--max-batch-items', type=int, default=256, help='Notes per request (default: 256)')
+    pipeline.add_argument('--rpm', type=int, default=500, help='Requests per minute limit (default: 500)')
+    pipeline.add_argument('--tpm', type=int, default=1_000_000, help='Tokens per minute limit (default: 1000000)')
+    pipeline.add_argument('--write-batch', type=int, default=200,
+                          help='Vectors per database UPDATE (default: 200)')
+    pipeline.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                          help='Embedding cache directory (default: scripts/embedding-cache)')
+    pipeline.add_argument('--cache-dtype', choices=STORAGE_DTYPES, default='float16',
+                          help='How cached vectors are stored (default: float16)')
+    pipeline.add_argument('--cache-max-entries', type=int, default=100_000,
+                          help='Vectors kept before least recently used ones are evicted (default: 100000)')
+    pipeline.add_argument('--no-cache', action='store_true', help='Always call the API')
+
+    benchmark = parser.add_argument_group('benchmark mode (--vault and --limit pick sample text)')
+    benchmark.add_argument('--benchmark', action='store_true',
+                           help='Sweep batch size x dimensions x concurrency instead of running the tests')
+    benchmark.add_argument('--batch-sizes', type=parse_int_list, default=[1, 16, 64, 256],
+                           help='Inputs per request to try (default: 1,16,64,256)')
+    benchmark.add_argument('--dims', type=parse_int_list, default=[256, 512, 1024, 1536],
+                           help='Dimensions to try (default: 256,512,1024,1536; --dimensions picks one)')
+    benchmark.add_argument('--concurrency-levels', type=parse_int_list, default=[1, 4, 8],
+                           help='Requests in flight to try (default: 1,4,8)')
+    benchmark.add_argument('--benchmark-requests', type=int, default=10,
+                           help='Timed requests per combination (default: 10)')
+    benchmark.add_argument('--tokens-per-text', type=int, default=200,
+                           help='Approximate tokens per input (default: 200)')
+    benchmark.add_argument('--storage-price', type=float, default=0.125,
+                           help='Database storage price in $/GB-month (default: 0.125)')
+    benchmark.add_argument('--benchmark-output', type=Path, help='Write results to a .json or .csv file')
     args = parser.parse_args()
 
+    if args.pipeline:
+        sys.exit(0 if run_pipeline_command(args) else 1)
+    if args.benchmark:
+        sys.exit(0 if run_benchmark_command(args) else 1)
     test_openai_embeddings(args.model, args.dimensions, args.text)
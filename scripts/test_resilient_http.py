@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Tests for resilient_http.py and the API's async client built on it
+
+Run with: python -m pytest test_resilient_http.py -v
+"""
+
+import asyncio
+import io
+import socket
+import threading
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+import requests
+
+from api.services.http_client import AsyncHTTPClient
+from resilient_http import CircuitBreaker, CircuitOpenError, HTTPClient, retry_after_seconds
+
+
+@pytest.fixture
+def scripted_server(local_server):
+    """
+    Local endpoint that answers with the next status in `state["statuses"]`
+    (200 once the script runs out) and records each request body.
+    """
+    state = {"statuses": [], "bodies": []}
+    lock = threading.Lock()
+
+    def reply(body):
+        with lock:
+            state["bodies"].append(body)
+            status = state["statuses"].pop(0) if state["statuses"] else 200
+        return status, {"Retry-After": "0", "Content-Type": "application/json"}, b'{"ok": true}'
+
+    return local_server(reply) + "/", state
+
+
+class TestHTTPClient:
+    """Tests for retries, throttling and the circuit breaker."""
+
+    def test_retries_server_errors_and_reports_attempts(self, scripted_server):
+        url, state = scripted_server
+        state["statuses"] = [503, 502]
+        calls = []
+
+        with HTTPClient(max_retries=2, on_call=calls.append) as client:
+            response = client.post(url, json={})
+
+        assert response.status_code == 200
+        assert [(call.status, call.attempt) for call in calls] == [("503", 0), ("502", 1), ("200", 2)]
+        assert client.stats["retries"] == 2
+
+    def test_gives_up_and_returns_last_response(self, scripted_server):
+        url, state = scripted_server
+        state["statuses"] = [429, 429, 429]
+
+        with HTTPClient(max_throttle_retries=1) as client:
+            response = client.post(url, json={})
+
+        assert response.status_code == 429
+        assert len(state["bodies"]) == 2
+
+    def test_rewinds_file_bodies_between_attempts(self, scripted_server):
+        url, state = scripted_server
+        state["statuses"] = [500]
+
+        with HTTPClient(max_retries=1, backoff_base=0.01) as client:
+            client.post(url, files={"file": ("batch.csv", io.BytesIO(b"a,b\n1,2\n"), "text/csv")})
+
+        # The multipart boundary differs per attempt; the file content must not
+        assert len(state["bodies"]) == 2
+        assert all(b"a,b\n1,2\n" in body for body in state["bodies"])
+
+    def test_circuit_opens_after_repeated_failures(self, scripted_server):
+        url, state = scripted_server
+        state["statuses"] = [500] * 10
+
+        with HTTPClient(max_retries=0, failure_threshold=2, reset_timeout=60) as client:
+            client.post(url, json={})
+            client.post(url, json={})
+            with pytest.raises(CircuitOpenError):
+                client.post(url, json={})
+
+        assert len(state["bodies"]) == 2
+        assert client.stats["circuit_rejections"] == 1
+
+    def test_unexpected_error_frees_half_open_trial(self, scripted_server, monkeypatch):
+        url, state = scripted_server
+        state["statuses"] = [500]
+
+        with HTTPClient(max_retries=0, failure_threshold=1, reset_timeout=0) as client:
+            client.post(url, json={})
+            send = client._send
+
+            def broken_send(*args):
+                monkeypatch.setattr(client, "_send", send)
+                raise requests.exceptions.ChunkedEncodingError("connection broken mid-body")
+
+            monkeypatch.setattr(client, "_send", broken_send)
+            with pytest.raises(requests.exceptions.ChunkedEncodingError):
+                client.post(url, json={})
+
+            # The trial slot was given back, so the next call is let through
+            assert client.post(url, json={}).status_code == 200
+
+    def test_read_timeouts_can_be_left_unretried(self):
+        # Accepts connections but never answers
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(8)
+        url = f"http://127.0.0.1:{listener.getsockname()[1]}/"
+        calls = []
+        try:
+            with HTTPClient(timeout=0.2, max_retries=3, backoff_base=0, on_call=calls.append) as client:
+                with pytest.raises(requests.exceptions.ReadTimeout):
+                    client.post(url, json={}, retry_read_timeouts=False)
+                assert len(calls) == 1
+                with pytest.raises(requests.exceptions.ReadTimeout):
+                    client.post(url, json={})
+                assert len(calls) == 5
+        finally:
+            listener.close()
+
+
+class TestCircuitBreaker:
+    """Tests for breaker state transitions."""
+
+    def test_half_open_allows_one_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        assert not breaker.allow_request()
+
+        now[0] = 10.0
+        assert breaker.state == "half_open"
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+        now[0] = 20.0
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+
+class TestRetryAfter:
+    """Tests for Retry-After parsing."""
+
+    def test_seconds_and_http_date(self):
+        assert retry_after_seconds({"Retry-After": "3"}) == 3.0
+        assert retry_after_seconds({}) is None
+        assert retry_after_seconds({"Retry-After": "soon"}) is None
+        in_a_minute = formatdate(timeval=time.time() + 60, usegmt=True)
+        assert 55 <= retry_after_seconds({"Retry-After": in_a_minute}) <= 60
+
+
+class TestAsyncHTTPClient:
+    """Tests for the API client's retry handling."""
+
+    def test_retries_then_streams(self):
+        statuses = [503, 200, 503, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), headers={"Retry-After": "0"}, text="data: ok\n")
+
+        async def run():
+            client = AsyncHTTPClient(max_retries=1, transport=httpx.MockTransport(handler))
+            try:
+                response = await client.post("http://ai.test/chat/completions", json={})
+                async with client.stream("POST", "http://ai.test/chat/completions", json={}) as streamed:
+                    lines = [line async for line in streamed.aiter_lines()]
+            finally:
+                await client.aclose()
+            return response.status_code, streamed.status_code, lines
+
+        assert asyncio.run(run()) == (200, 200, ["data: ok"])
+        assert statuses == []
+
+    def test_cancelled_half_open_trial_frees_the_slot(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(len(calls))
+            if len(calls) == 1:
+                return httpx.Response(500)
+            if len(calls) == 2:
+                await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        async def run():
+            client = AsyncHTTPClient(
+                max_retries=0, failure_threshold=1, reset_timeout=0, transport=httpx.MockTransport(handler)
+            )
+            try:
+                await client.post("http://ai.test/chat/completions", json={})
+                trial = asyncio.create_task(client.post("http://ai.test/chat/completions", json={}))
+                await asyncio.sleep(0.05)
+                trial.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await trial
+                response = await client.post("http://ai.test/chat/completions", json={})
+            finally:
+                await client.aclose()
+            return response.status_code
+
+        assert asyncio.run(run()) == 200
+        assert len(calls) == 3
+
+    def test_read_timeouts_can_be_left_unretried(self):
+        errors = [httpx.ConnectError("refused"), httpx.ReadTimeout("slow"), httpx.ReadTimeout("slow")]
+
+        def handler(request):
+            raise errors.pop(0)
+
+        async def run():
+            client = AsyncHTTPClient(max_retries=3, transport=httpx.MockTransport(handler))
+            try:
+                with pytest.raises(httpx.ReadTimeout):
+                    await client.post("http://ai.test/chat/completions", json={}, retry_read_timeouts=False)
+            finally:
+                await client.aclose()
+
+        asyncio.run(run())
+        # The connect error was retried; the first read timeout ended the call
+        assert len(errors) == 1
+
+    def test_requests_per_host_are_limited(self):
+        in_flight = {}
+        peaks = {}
+
+        async def handler(request):
+            host = request.url.host
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peaks[host] = max(peaks.get(host, 0), in_flight[host])
+            await asyncio.sleep(0.05 if host == "slow.test" else 0)
+            in_flight[host] -= 1
+            return httpx.Response(200)
+
+        async def run():
+            client = AsyncHTTPClient(max_per_host=2, transport=httpx.MockTransport(handler))
+            try:
+                slow = [
+                    asyncio.create_task(client.post("http://slow.test/chat/completions", json={}))
+                    for _ in range(6)
+                ]
+                await asyncio.sleep(0.005)
+                # The slow host's queue does not hold up the other host
+                other_response = await asyncio.wait_for(client.get("http://other.test/models"), timeout=0.03)
+                responses = await asyncio.gather(*slow)
+            finally:
+                await client.aclose()
+            return other_response, responses
+
+        other_response, responses = asyncio.run(run())
+        assert other_response.status_code == 200
+        assert [response.status_code for response in responses] == [200] * 6
+        assert peaks == {"slow.test": 2, "other.test": 1}
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for api/services/summaries.py
+
+Run with: python -m pytest test_summaries.py -v
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from api.config import settings
+from api.services.http_client import AsyncHTTPClient
+from api.services.metrics import AI_REQUESTS
+from api.services.summaries import _summarize_chunk, build_long_note_prompt
+from chunked_summary import REDUCE_PROMPT, SummaryCache
+
+
+def completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 40, "completion_tokens": 20},
+    })
+
+
+def summarize(handler, coroutine_factory):
+    async def run():
+        client = AsyncHTTPClient(max_retries=0, transport=httpx.MockTransport(handler))
+        try:
+            return await coroutine_factory(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+class TestSummarizeChunk:
+    """Tests for the map step's single chunk request."""
+
+    @pytest.mark.parametrize("response", [
+        httpx.Response(200, text="<html>Bad gateway</html>"),
+        httpx.Response(200, json={"choices": []}),
+        httpx.Response(200, json={"error": {"message": "overloaded"}}),
+        httpx.Response(200, json={"choices": [{"message": None}]}),
+    ])
+    def test_malformed_answer_is_a_failed_chunk(self, response):
+        invalid = AI_REQUESTS.labels(model=settings.ai_model, status="invalid_response")
+        before = invalid.value
+
+        summary = summarize(lambda request: response, lambda client: _summarize_chunk(client, "prompt", 100, 0.3))
+
+        assert summary is None
+        assert invalid.value == before + 1
+
+    def test_answer_is_stripped(self):
+        summary = summarize(
+            lambda request: completion(' "A section about habits." '),
+            lambda client: _summarize_chunk(client, "prompt", 100, 0.3)
+        )
+        assert summary == "A section about habits."
+
+
+class TestLongNotePrompt:
+    """Tests for summarizing every chunk of a long note."""
+
+    def test_failed_chunks_are_counted_and_left_out(self, tmp_path):
+        body = "\n".join(f"## Part {number}\n\n" + "Words about part %d. " % number * 80 for number in range(3))
+
+        def handler(request):
+            prompt = json.loads(request.content)["messages"][0]["content"]
+            if "## Part 1" in prompt:
+                return httpx.Response(200, text="not json")
+            return completion(f"Summary of part {0 if '## Part 0' in prompt else 2}.")
+
+        cache = SummaryCache(tmp_path)
+        prompt, sections = summarize(
+            handler, lambda client: build_long_note_prompt(client, "Parts", body, 100, 0.3, cache)
+        )
+
+        assert prompt.startswith(REDUCE_PROMPT[:40])
+        assert "1. Summary of part 0." in prompt and "2. Summary of part 2." in prompt
+        assert sections == {"sections": 3, "cached": 0, "failed": 1}
+        # Only usable summaries are cached
+        assert len(cache) == 2
+        cache.close()
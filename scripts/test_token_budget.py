@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for token_budget.py and token budgets in AIDescriptionGenerator
+
+Run with: python -m pytest test_token_budget.py -v
+"""
+
+import json
+from unittest.mock import MagicMock
+
+from normalize_obsidian_vault import AIDescriptionGenerator
+from token_budget import (
+    DEFAULT_MAX_TOKENS,
+    MIN_SAMPLES,
+    TokenBudget,
+    TokenStats,
+    estimate_tokens,
+    slice_to_tokens,
+)
+
+
+def make_response(content: str, completion_tokens: int, finish_reason: str = "stop") -> MagicMock:
+    response = MagicMock(status_code=200)
+    response.json.return_value = {
+        "choices": [{"message": {"content": content}, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 50, "completion_tokens": completion_tokens},
+    }
+    return response
+
+
+class TestEstimates:
+    """Tests for local token estimates."""
+
+    def test_counts_words_and_punctuation(self):
+        assert estimate_tokens("Hi, all!") == 4
+        assert estimate_tokens("internationalization") == 5
+
+    def test_slice_stays_within_budget(self):
+        text = "Spaced repetition, done daily, beats cramming. " * 50
+        sliced = slice_to_tokens(text, 100)
+        assert text.startswith(sliced)
+        assert 90 <= estimate_tokens(sliced) <= 100
+        assert slice_to_tokens("short text", 100) == "short text"
+
+
+class TestTokenBudget:
+    """Tests for choosing max_tokens from observed completions."""
+
+    def test_max_tokens_follows_observed_completions(self, tmp_path):
+        path = tmp_path / "token-stats.json"
+        with TokenStats(path) as stats:
+            budget = TokenBudget(stats, "small-model")
+            assert budget.max_tokens() == DEFAULT_MAX_TOKENS
+
+            for _ in range(MIN_SAMPLES):
+                budget.record(DEFAULT_MAX_TOKENS, {"prompt_tokens": 200, "completion_tokens": 100}, 100)
+            # 95th percentile * 1.5 headroom, rounded up to a multiple of 64
+            assert budget.max_tokens() == 192
+            assert budget.max_tokens(outputs=4) == 640
+            # Prompt estimates are calibrated towards the reported counts
+            assert budget.estimate("word " * 100) > 100
+
+        reloaded = TokenBudget(TokenStats(path), "small-model")
+        assert reloaded.max_tokens() == 192
+        assert TokenBudget(TokenStats(path), "other-model").max_tokens() == DEFAULT_MAX_TOKENS
+
+        summary = budget.summary()
+        assert summary["tokens_spent"] == MIN_SAMPLES * 300
+        assert summary["tokens_saved"] == 0
+
+    def test_corrupt_stats_file_starts_empty(self, tmp_path):
+        path = tmp_path / "token-stats.json"
+        path.write_text('{"small-model": {"completions": [100, 1', encoding="utf-8")
+
+        with TokenStats(path) as stats:
+            assert TokenBudget(stats, "small-model").max_tokens() == DEFAULT_MAX_TOKENS
+            stats.observe("small-model", 100)
+        # The next flush replaces the corrupt file
+        assert json.loads(path.read_text(encoding="utf-8"))["small-model"]["completions"] == [100]
+
+    def test_truncated_answer_is_retried_with_full_allowance(self):
+        stats = TokenStats()
+        for _ in range(MIN_SAMPLES):
+            stats.observe("model", 40)
+        generator = AIDescriptionGenerator("http://ai.test", "key", model="model", token_stats=stats)
+        generator.client.post = MagicMock(side_effect=[
+            make_response("", 128, finish_reason="length"),
+            make_response("A note about habits.", 400),
+        ])
+
+        assert generator.generate_description("Note", "Some content about habits.") == "A note about habits."
+        sent = [call.kwargs["json"]["max_tokens"] for call in generator.client.post.call_args_list]
+        assert sent == [128, DEFAULT_MAX_TOKENS]
+
+        summary = generator.token_budget.summary()
+        assert summary["completion_tokens"] == 528
+        assert summary["tokens_saved"] == DEFAULT_MAX_TOKENS - 128
+        # Only the complete answer is learned from
+        assert stats.completion_percentile("model", 1.0) == 400
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for api/services/tracing.py
+
+Run with: python -m pytest test_tracing.py -v
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from api.models import JobRequest, JobStatus, ScriptType
+from api.services.job_manager import JobManager
+from api.services.script_runner import run_script
+from api.services.tracing import Tracer, trace_span
+
+
+class TestTracer:
+    """Tests for span nesting, sampling and export."""
+
+    def test_nested_spans_record_parent(self):
+        tracer = Tracer()
+        with tracer.span("job") as job_span:
+            with tracer.span("file.read", path="a.md") as child:
+                pass
+
+        assert child.parent_id == job_span.span_id
+        assert job_span.parent_id is None
+        assert child.attributes == {"path": "a.md"}
+
+    def test_sampling_caps_traced_items(self):
+        tracer = Tracer(max_sampled_items=100)
+        tracer.set_item_count(20000)
+
+        sampled = [i for i in range(20000) if tracer.should_sample(i)]
+
+        assert len(sampled) == 100
+
+    def test_trace_span_without_tracer_is_noop(self):
+        with trace_span(None, "anything"):
+            pass
+
+    def test_export_writes_chrome_and_otlp(self, tmp_path):
+        tracer = Tracer()
+        with tracer.span("job"):
+            with tracer.span("discovery"):
+                pass
+
+        paths = tracer.export(tmp_path, "job-1")
+
+        chrome = json.loads(open(paths["chrome"], encoding="utf-8").read())
+        assert {e["name"] for e in chrome["traceEvents"] if e["ph"] == "X"} == {"job", "discovery"}
+        otlp = json.loads(open(paths["otlp"], encoding="utf-8").read())
+        spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert len(spans) == 2
+        assert all(span["traceId"] == tracer.trace_id for span in spans)
+
+
+class TestTracedJobs:
+    """Tests for trace export at the end of a job."""
+
+    @pytest.mark.parametrize("vault_exists", [True, False])
+    def test_failed_export_still_finishes_the_job(self, tmp_path, monkeypatch, vault_exists):
+        def broken_export(self, directory, job_id):
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(Tracer, "export", broken_export)
+        vault = tmp_path / "vault"
+        if vault_exists:
+            vault.mkdir()
+            (vault / "note.md").write_text("Some text.\n", encoding="utf-8")
+
+        async def run():
+            job_manager = JobManager(logs_dir=tmp_path / "logs")
+            request = JobRequest(
+                script_type=ScriptType.NORMALIZE_VAULT, vault_path=str(vault), dry_run=True, trace=True
+            )
+            job_id = await job_manager.create_job(request.script_type)
+            await run_script(job_manager, job_id, request)
+            job = await job_manager.get_job(job_id)
+            logs, _, _ = await job_manager.read_logs(job_id, 0, 100)
+            return job, logs
+
+        job, logs = asyncio.run(run())
+        assert job.status == (JobStatus.COMPLETED if vault_exists else JobStatus.FAILED)
+        assert any("Could not write trace files: No space left on device" in line for line in logs)
+        if vault_exists:
+            assert "trace_files" not in job.result
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for vector_index.py
+
+Run with: python -m pytest test_vector_index.py -v
+"""
+
+import asyncio
+import csv
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from api.models import JobRequest, ScriptType
+from api.services.job_manager import JobManager
+from api.services.script_runner import run_related_notes
+from vector_index import ExactIndex, IVFIndex, NeighborCsvWriter, load_jsonl_vectors, normalize_rows
+
+
+def _vectors(count, dimensions=32, seed=0):
+    matrix = np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32)
+    normalize_rows(matrix)
+    return matrix
+
+
+def _clustered_vectors(count, clusters=8, dimensions=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions))
+    matrix = (centers[rng.integers(clusters, size=count)] + rng.normal(scale=0.3, size=(count, dimensions)))
+    matrix = matrix.astype(np.float32)
+    normalize_rows(matrix)
+    return matrix
+
+
+def _brute_force_neighbors(matrix, k):
+    scores = matrix @ matrix.T
+    np.fill_diagonal(scores, -np.inf)
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _all_neighbors(index, k):
+    found = {}
+    for rows, indices, _ in index.iter_all_neighbors(k):
+        for row, neighbors in zip(rows, indices):
+            found[int(row)] = [int(n) for n in neighbors if n >= 0]
+    return found
+
+
+class TestExactIndex:
+    """Tests for brute-force search."""
+
+    def test_matches_brute_force_across_blocks(self):
+        matrix = _vectors(50)
+        found = _all_neighbors(ExactIndex(matrix, block_size=16), 5)
+        expected = _brute_force_neighbors(matrix, 5)
+        assert sorted(found) == list(range(50))
+        for row in range(50):
+            assert found[row] == list(expected[row])
+
+    def test_excludes_self(self):
+        matrix = _vectors(20)
+        for row, neighbors in _all_neighbors(ExactIndex(matrix), 3).items():
+            assert row not in neighbors
+
+
+class TestIVFIndex:
+    """Tests for the approximate partitioned index."""
+
+    def test_recall_on_clustered_vectors(self):
+        matrix = _clustered_vectors(400)
+        index = IVFIndex(matrix, nlist=8, nprobe=3)
+        found = _all_neighbors(index, 10)
+        expected = _brute_force_neighbors(matrix, 10)
+        hits = sum(len(set(found[row]) & set(expected[row])) for row in range(400))
+        assert hits / (400 * 10) > 0.9
+        assert all(row not in neighbors for row, neighbors in found.items())
+
+    def test_pads_when_probed_lists_are_small(self):
+        # With one probed list of a few vectors there are fewer than k candidates
+        index = IVFIndex(_vectors(40), nlist=10, nprobe=1)
+        for rows, indices, _ in index.iter_all_neighbors(10):
+            assert indices.shape == (len(rows), 10)
+
+
+class TestLoadAndWrite:
+    """Tests for loading pipeline output and writing neighbour rows."""
+
+    def test_jsonl_to_csv(self, tmp_path):
+        jsonl_path = tmp_path / "vectors.jsonl"
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for i, vector in enumerate([[1, 0], [0.9, 0.1], [0, 1]]):
+                f.write(json.dumps({"id": f"note-{i}", "embedding": vector}) + "\n")
+
+        ids, matrix = load_jsonl_vectors(jsonl_path, tmp_path / "vectors.f32")
+        assert ids == ["note-0", "note-1", "note-2"]
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+        writer = NeighborCsvWriter(tmp_path / "neighbors.csv")
+        for chunk in ExactIndex(matrix).iter_all_neighbors(1):
+            writer.write_chunk(ids, chunk)
+        writer.close()
+
+        with open(tmp_path / "neighbors.csv", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert writer.rows_written == 3
+        assert {(row["note_id"], row["neighbor_id"]) for row in rows} == {
+            ("note-0", "note-1"), ("note-1", "note-0"), ("note-2", "note-1"),
+        }
+        assert pytest.approx(float(rows[0]["score"]), abs=1e-5) == 0.9 / np.hypot(0.9, 0.1)
+
+
+class TestRelatedNotesJob:
+    """Tests for the related_notes job in the script runner."""
+
+    def test_cancelled_job_waits_for_the_chunk_being_written(self, tmp_path, monkeypatch):
+        jsonl_path = tmp_path / "vectors.jsonl"
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for i, vector in enumerate(_vectors(50, dimensions=8)):
+                f.write(json.dumps({"id": f"note-{i}", "embedding": vector.tolist()}) + "\n")
+
+        events = []
+        writing = threading.Event()
+        write_chunk, close = NeighborCsvWriter.write_chunk, NeighborCsvWriter.close
+
+        def slow_write_chunk(self, ids, chunk):
+            writing.set()
+            time.sleep(0.2)
+            write_chunk(self, ids, chunk)
+            events.append("written")
+
+        def recorded_close(self):
+            events.append("closed")
+            close(self)
+
+        monkeypatch.setattr(NeighborCsvWriter, "write_chunk", slow_write_chunk)
+        monkeypatch.setattr(NeighborCsvWriter, "close", recorded_close)
+
+        async def run():
+            job_manager = JobManager(logs_dir=tmp_path / "logs")
+            request = JobRequest(script_type=ScriptType.RELATED_NOTES, embeddings_path=str(jsonl_path), dry_run=True)
+            job_id = await job_manager.create_job(request.script_type)
+            await job_manager.start_job(job_id)
+            task = asyncio.create_task(run_related_notes(job_manager, job_id, request))
+            await asyncio.get_event_loop().run_in_executor(None, writing.wait, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return job_manager.neighbors_dir, job_id
+
+        neighbors_dir, job_id = asyncio.run(run())
+        assert events == ["written", "closed"]
+        assert not (neighbors_dir / f"{job_id}.f32").exists()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Token budgets for AI description requests.
+
+Instead of reserving a fixed max_tokens for every request and cutting
+note content by characters, a TokenBudget:
+
+- estimates prompt tokens locally (no tokenizer dependency), calibrated
+  per model against the prompt_tokens the provider reports
+- cuts note content to an input token budget
+- sets max_tokens from the observed completion lengths of the model
+  (95th percentile plus headroom), falling back to DEFAULT_MAX_TOKENS
+  until there are enough observations
+- adds up the usage of every request, so a run can report the tokens it
+  spent and the max_tokens it did not reserve
+
+Observations are kept per model in a small JSON file (TokenStats), so
+later runs start from what earlier runs learned.
+"""
+
+import json
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Rough token estimate for English text; avoids a tokenizer dependency
+CHARS_PER_TOKEN = 4
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+# max_tokens before a model has MIN_SAMPLES observations, and the most ever reserved
+DEFAULT_MAX_TOKENS = 3000
+MIN_MAX_TOKENS = 128
+# max_tokens = 95th percentile completion length * MAX_TOKENS_HEADROOM
+MAX_TOKENS_HEADROOM = 1.5
+MIN_SAMPLES = 20
+# Completion lengths kept per model
+MAX_SAMPLES = 200
+# Weight of the newest request in the prompt estimate calibration
+CALIBRATION_ALPHA = 0.1
+
+# Note content sent in one request
+DEFAULT_INPUT_TOKENS = 1500
+
+DEFAULT_TOKEN_STATS_PATH = Path(__file__).parent / "token-stats.json"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text: one per punctuation mark, one per CHARS_PER_TOKEN of a word."""
+    return sum(-(-len(piece) // CHARS_PER_TOKEN) for piece in TOKEN_PATTERN.findall(text))
+
+
+def slice_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` estimated at no more than `max_tokens` tokens."""
+    tokens = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        tokens += -(-len(match.group()) // CHARS_PER_TOKEN)
+        if tokens > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+class TokenStats:
+    """
+    Recent completion lengths and prompt estimate calibration per model.
+
+    Completion lengths are per description: a request asking for several
+    descriptions is recorded as its completion divided by their number.
+    Thread-safe; with no `path` the stats are kept in memory only.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_samples: int = MAX_SAMPLES):
+        self.path = Path(path) if path else None
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._models: Dict[str, dict] = {}
+        if self.path and self.path.exists():
+            try:
+                models = json.loads(self.path.read_text(encoding="utf-8"))
+                if not isinstance(models, dict):
+                    raise ValueError(f"expected an object, got {type(models).__name__}")
+                self._models = models
+            except (OSError, ValueError) as e:
+                # The stats are relearned from the next completions
+                print(f"WARNING: Could not read token stats {self.path} ({e}); starting empty")
+
+    def observe(
+        self,
+        model: str,
+        completion_tokens: int,
+        prompt_tokens: Optional[int] = None,
+        estimated_prompt_tokens: Optional[int] = None
+    ) -> None:
+        """Record one completion, and how far off the prompt estimate was."""
+        with self._lock:
+            entry = self._models.setdefault(model, {"completions": [], "prompt_ratio": 1.0})
+            completions: List[int] = entry["completions"]
+            completions.append(completion_tokens)
+            del completions[:-self.max_samples]
+            if prompt_tokens and estimated_prompt_tokens:
+                ratio = prompt_tokens / estimated_prompt_tokens
+                entry["prompt_ratio"] = round(
+                    (1 - CALIBRATION_ALPHA) * entry["prompt_ratio"] + CALIBRATION_ALPHA * ratio, 4
+                )
+            self._dirty = True
+
+    def completion_percentile(self, model: str, percentile: float = 0.95) -> Optional[int]:
+        """Completion length at `percentile`, or None with fewer than MIN_SAMPLES observations."""
+        with self._lock:
+            completions = sorted(self._models.get(model, {}).get("completions", []))
+        if len(completions) < MIN_SAMPLES:
+            return None
+        return completions[min(len(completions) - 1, int(percentile * len(completions)))]
+
+    def prompt_ratio(self, model: str) -> float:
+        """Actual prompt tokens per estimated token for `model`."""
+        with self._lock:
+            return self._models.get(model, {}).get("prompt_ratio", 1.0)
+
+    def flush(self) -> None:
+        """Write the stats to disk if they changed."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._models), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "TokenStats":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TokenBudget:
+    """
+    Chooses the content slice and max_tokens of requests to one model,
+    and adds up what they used. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        stats: TokenStats,
+        model: str,
+        input_tokens: int = DEFAULT_INPUT_TOKENS,
+        ceiling: int = DEFAULT_MAX_TOKENS
+    ):
+        self.stats = stats
+        self.model = model
+        self.input_tokens = input_tokens
+        self.ceiling = ceiling
+        self.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "reserved_tokens": 0}
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        """Estimated prompt tokens of `text` for this model."""
+        return math.ceil(estimate_tokens(text) * self.stats.prompt_ratio(self.model))
+
+    def fit(self, content: str) -> str:
+        """Cut `content` to the input token budget."""
+        return slice_to_tokens(content, int(self.input_tokens / self.stats.prompt_ratio(self.model)))
+
+    def max_tokens(self, outputs: int = 1) -> int:
+        """max_tokens for a request asking for `outputs` descriptions."""
+        typical = self.stats.completion_percentile(self.model)
+        if typical is None:
+            return self.ceiling
+        budget = math.ceil(typical * MAX_TOKENS_HEADROOM * outputs / 64) * 64
+        return max(MIN_MAX_TOKENS, min(self.ceiling, budget))
+
+    def record(
+        self,
+        max_tokens: int,
+        usage: Optional[dict],
+        estimated_prompt_tokens: int,
+        outputs: int = 1,
+        truncated: bool = False
+    ) -> None:
+        """
+        Add a request's usage to the totals.
+
+        The completion length is only learned from if the answer was not
+        cut off by max_tokens.
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        with self._lock:
+            self.usage["requests"] += 1
+            self.usage["prompt_tokens"] += prompt_tokens
+            self.usage["completion_tokens"] += completion_tokens
+            self.usage["reserved_tokens"] += max_tokens
+        if completion_tokens and not truncated:
+            self.stats.observe(
+                self.model, math.ceil(completion_tokens / outputs), prompt_tokens, estimated_prompt_tokens
+            )
+
+    def summary(self) -> dict:
+        """Tokens spent, and max_tokens not reserved compared to always asking for the ceiling."""
+        with self._lock:
+            usage = dict(self.usage)
+        return {
+            "tokens_spent": usage["prompt_tokens"] + usage["completion_tokens"],
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "tokens_saved": usage["requests"] * self.ceiling - usage["reserved_tokens"],
+        }
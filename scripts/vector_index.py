@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Local vector similarity search for precomputing related notes.
+
+Vectors are L2-normalized into a memory-mapped float32 matrix, so cosine
+similarity is a dot product and whole blocks of queries are scored with
+one matrix multiply. Two indexes share the same interface:
+
+    ExactIndex  brute-force top-k over every vector
+    IVFIndex    k-means partitions; each query only scores the vectors in
+                its `nprobe` nearest partitions (approximate, much faster
+                for large corpora)
+
+iter_all_neighbors() yields the k nearest neighbours of every vector in
+chunks, which is what the related_notes job in the script runner uses.
+
+Usage:
+    python vector_index.py vectors.jsonl --k 10 --output neighbors.csv
+    python vector_index.py vectors.jsonl --k 10 --ivf --output neighbors.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from cancellation import CancellationToken, bind_connection
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None  # Only needed to read embeddings from / write results to the database
+
+# Queries scored per matrix multiply by the exact index
+DEFAULT_BLOCK_SIZE = 1024
+
+# (row indices, neighbour indices [rows x k], scores [rows x k])
+NeighborChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def normalize_rows(matrix: np.ndarray, block_size: int = 65536) -> None:
+    """L2-normalize rows in place, block by block so memmaps stay paged out."""
+    for start in range(0, len(matrix), block_size):
+        block = matrix[start:start + block_size]
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        block /= norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and values of the k largest scores per row, best first."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class ExactIndex:
+    """Brute-force cosine search over normalized row vectors."""
+
+    def __init__(self, vectors: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.vectors = vectors
+        self.block_size = block_size
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (indices, scores) for normalized query rows."""
+        return _top_k(np.asarray(queries, dtype=np.float32) @ self.vectors.T, k)
+
+    def iter_all_neighbors(self, k: int) -> Iterator[NeighborChunk]:
+        """Yield the k nearest other vectors for every vector, one block at a time."""
+        n = len(self.vectors)
+        k = min(k, n - 1)
+        for start in range(0, n, self.block_size):
+            rows = np.arange(start, min(start + self.block_size, n))
+            scores = np.asarray(self.vectors[rows]) @ self.vectors.T
+            # Never return a note as its own neighbour
+            scores[np.arange(len(rows)), rows] = -np.inf
+            indices, top_scores = _top_k(scores, k)
+            yield rows, indices, top_scores
+
+    def chunk_count(self) -> int:
+        return -(-len(self.vectors) // self.block_size)
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors are grouped by their nearest k-means
+    centroid and a query only scores the partitions of its `nprobe`
+    nearest centroids.
+    """
+
+    def __init__(self, vectors: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8,
+                 iterations: int = 10, sample_size: int = 50_000, seed: int = 0):
+        self.vectors = vectors
+        n = len(vectors)
+        self.nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        self.nprobe = max(1, min(nprobe, self.nlist))
+
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, size=min(n, sample_size), replace=False))])
+        self.centroids = self._train(sample, iterations, rng)
+
+        # Assign every vector to its nearest centroid, block by block
+        assignments = np.empty(n, dtype=np.int32)
+        for start in range(0, n, DEFAULT_BLOCK_SIZE * 8):
+            block = np.asarray(vectors[start:start + DEFAULT_BLOCK_SIZE * 8])
+            assignments[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(self.nlist + 1))
+        self.lists: List[np.ndarray] = [order[bounds[i]:bounds[i + 1]] for i in range(self.nlist)]
+
+    def _train(self, sample: np.ndarray, iterations: int, rng) -> np.ndarray:
+        """Spherical k-means on a sample of the vectors."""
+        centroids = sample[rng.choice(len(sample), size=self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=self.nlist) == 0
+            # Restart empty clusters from random sample points
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            normalize_rows(sums)
+            centroids = sums
+        return centroids.astype(np.float32)
+
+    def _probe_lists(self, centroid_scores: np.ndarray) -> np.ndarray:
+        return _top_k(centroid_scores, self.nprobe)[0]
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k (indices, scores) for normalized query rows."""
+        queries = np.asarray(queries, dtype=np.float32)
+        probes = self._probe_lists(queries @ self.centroids.T)
+        all_indices = np.full((len(queries), k), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[p] for p in probes[i]])
+            if len(candidates) == 0:
+                continue
+            indices, scores = _top_k((np.asarray(self.vectors[candidates]) @ query)[None, :], k)
+            all_indices[i, :indices.shape[1]] = candidates[indices[0]]
+            all_scores[i, :scores.shape[1]] = scores[0]
+        return all_indices, all_scores
+
+    def iter_all_neighbors(self, k: int) -> Iterator[NeighborChunk]:
+        """
+        Yield approximate k nearest neighbours for every vector, one
+        partition at a time.
+
+        All vectors in a partition are scored against the partitions of
+        that partition's `nprobe` nearest centroids with one multiply.
+        """
+        k = min(k, len(self.vectors) - 1)
+        probes = self._probe_lists(self.centroids @ self.centroids.T)
+        for list_id, rows in enumerate(self.lists):
+            if len(rows) == 0:
+                continue
+            # The partition itself goes first, so row i is candidate i
+            probe_ids = [list_id] + [p for p in probes[list_id] if p != list_id][:self.nprobe - 1]
+            candidates = np.concatenate([self.lists[p] for p in probe_ids])
+            scores = np.asarray(self.vectors[rows]) @ np.asarray(self.vectors[candidates]).T
+            scores[np.arange(len(rows)), np.arange(len(rows))] = -np.inf
+
+            indices, top_scores = _top_k(scores, min(k, len(candidates)))
+            neighbor_indices = np.where(np.isfinite(top_scores), candidates[indices], -1)
+            if indices.shape[1] < k:
+                # Small probe sets: pad so every chunk has k columns
+                pad = k - indices.shape[1]
+                neighbor_indices = np.pad(neighbor_indices, ((0, 0), (0, pad)), constant_values=-1)
+                top_scores = np.pad(top_scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+            yield rows, neighbor_indices, top_scores
+
+    def chunk_count(self) -> int:
+        return sum(1 for rows in self.lists if len(rows))
+
+
+def create_vector_file(path: Path, count: int, dimensions: int) -> np.memmap:
+    """Create a float32 memmap of shape (count, dimensions)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return np.memmap(path, dtype=np.float32, mode="w+", shape=(count, dimensions))
+
+
+def load_jsonl_vectors(jsonl_path: Path, matrix_path: Path) -> Tuple[List[str], np.memmap]:
+    """
+    Load {"id", "embedding"} lines (as written by test_openai_embeddings.py
+    --pipeline --vault) into a normalized memmap.
+    """
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        count = sum(1 for line in f if line.strip())
+    ids: List[str] = []
+    matrix = None
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if matrix is None:
+                matrix = create_vector_file(matrix_path, count, len(entry["embedding"]))
+            matrix[len(ids)] = entry["embedding"]
+            ids.append(entry["id"])
+    if matrix is None:
+        return [], np.zeros((0, 0), dtype=np.float32)
+    normalize_rows(matrix)
+    return ids, matrix
+
+
+def load_db_vectors(database_url: str, matrix_path: Path,
+                    cancel_token: Optional[CancellationToken] = None) -> Tuple[List[str], np.memmap]:
+    """
+    Stream note embeddings from the Notes table into a normalized memmap.
+
+    A cancelled `cancel_token` stops the running query.
+    """
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 is required. Install with: pip install psycopg2-binary")
+    conn = psycopg2.connect(database_url)
+    try:
+        unbind = bind_connection(cancel_token, conn)
+    except Exception:
+        conn.close()
+        raise
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*), MAX(vector_dims("Embedding")) FROM "Notes" WHERE "Embedding" IS NOT NULL')
+            count, dimensions = cursor.fetchone()
+        if not count:
+            return [], np.zeros((0, 0), dtype=np.float32)
+
+        matrix = create_vector_file(matrix_path, count, dimensions)
+        ids: List[str] = []
+        with conn.cursor(name="note_vectors") as cursor:
+            cursor.itersize = 2000
+            cursor.execute('SELECT "Id", "Embedding"::text FROM "Notes" WHERE "Embedding" IS NOT NULL ORDER BY "Id"')
+            for note_id, embedding in cursor:
+                if len(ids) == count:
+                    break  # Rows added since the count
+                matrix[len(ids)] = np.array(embedding.strip("[]").split(","), dtype=np.float32)
+                ids.append(str(note_id))
+    except psycopg2.extensions.QueryCanceledError:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        raise
+    finally:
+        unbind()
+        conn.close()
+    normalize_rows(matrix)
+    return ids, matrix[:len(ids)]
+
+
+class NeighborCsvWriter:
+    """Writes note_id,neighbor_id,rank,score rows (rank starts at 1)."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.rows_written = 0
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["note_id", "neighbor_id", "rank", "score"])
+
+    def write_chunk(self, ids: List[str], chunk: NeighborChunk) -> None:
+        rows, indices, scores = chunk
+        for row, neighbor_row, score_row in zip(rows, indices, scores):
+            rank = 0
+            for neighbor, score in zip(neighbor_row, score_row):
+                if neighbor < 0:
+                    continue
+                rank += 1
+                self._writer.writerow([ids[row], ids[neighbor], rank, f"{score:.6f}"])
+            self.rows_written += rank
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def copy_neighbors_to_db(database_url: str, csv_path: Path,
+                         cancel_token: Optional[CancellationToken] = None) -> None:
+    """
+    Replace the NoteNeighbors table contents with a neighbour CSV in one transaction.
+
+    The table is created by the AddNoteNeighborsTable EF Core migration
+    (run-migrations.ps1). A cancelled `cancel_token` stops the running
+    statement and the transaction is rolled back.
+    """
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 is required. Install with: pip install psycopg2-binary")
+    computed_at = datetime.now(timezone.utc)
+    conn = psycopg2.connect(database_url)
+    try:
+        unbind = bind_connection(cancel_token, conn)
+    except Exception:
+        conn.close()
+        raise
+    try:
+        with conn.cursor() as cursor, open(csv_path, "r", encoding="utf-8") as f:
+            cursor.execute("""SELECT to_regclass('"NoteNeighbors"')""")
+            if cursor.fetchone()[0] is None:
+                raise RuntimeError(
+                    "NoteNeighbors table not found. Apply the database migrations (run-migrations.ps1)."
+                )
+            cursor.execute('CREATE TEMP TABLE neighbors_import (note_id uuid, neighbor_id uuid, "rank" smallint, score real) ON COMMIT DROP')
+            cursor.copy_expert("COPY neighbors_import FROM STDIN WITH (FORMAT csv, HEADER true)", f)
+            cursor.execute('DELETE FROM "NoteNeighbors"')
+            cursor.execute(
+                'INSERT INTO "NoteNeighbors" ("NoteId", "NeighborId", "Rank", "Score", "ComputedAt") '
+                'SELECT note_id, neighbor_id, "rank", score, %s FROM neighbors_import',
+                (computed_at,)
+            )
+        conn.commit()
+    except psycopg2.extensions.QueryCanceledError:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        raise
+    finally:
+        unbind()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute related notes from embeddings")
+    parser.add_argument("vectors", type=Path, help="JSON lines file of {id, embedding}")
+    parser.add_argument("--output", type=Path, required=True, help="Neighbour CSV to write")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per note (default: 10)")
+    parser.add_argument("--ivf", action="store_true", help="Use the approximate IVF index")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF partitions searched per query (default: 8)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ids, matrix = load_jsonl_vectors(args.vectors, args.output.with_suffix(".f32"))
+    if len(ids) < 2:
+        print("Need at least two vectors.")
+        sys.exit(1)
+    print(f"Loaded {len(ids)} vectors ({matrix.shape[1]}D) in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    index = IVFIndex(matrix, nprobe=args.nprobe) if args.ivf else ExactIndex(matrix)
+    writer = NeighborCsvWriter(args.output)
+    try:
+        for chunk in index.iter_all_neighbors(args.k):
+            writer.write_chunk(ids, chunk)
+    finally:
+        writer.close()
+    print(f"Wrote {writer.rows_written} neighbour rows to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+﻿using Microsoft.EntityFrameworkCore.Migrations;
+
+#nullable disable
+
+namespace ProjectLoopbreaker.Infrastructure.Migrations
+{
+    /// <inheritdoc />
+    /// <summary>
+    /// Creates the NoteNeighbors table that the script runner's related_notes job fills
+    /// with the precomputed nearest neighbours of every note. The table is not part of the
+    /// EF Core model: the job replaces its contents in bulk via raw SQL (see scripts/vector_index.py).
+    /// IF NOT EXISTS keeps databases where an earlier job already created the table working.
+    /// </summary>
+    public partial class AddNoteNeighborsTable : Migration
+    {
+        /// <inheritdoc />
+        protected override void Up(MigrationBuilder migrationBuilder)
+        {
+            migrationBuilder.Sql(@"
+                CREATE TABLE IF NOT EXISTS ""NoteNeighbors"" (
+                    ""NoteId"" uuid NOT NULL,
+                    ""NeighborId"" uuid NOT NULL,
+                    ""Rank"" smallint NOT NULL,
+                    ""Score"" real NOT NULL,
+                    ""ComputedAt"" timestamp with time zone NOT NULL,
+                    CONSTRAINT ""PK_NoteNeighbors"" PRIMARY KEY (""NoteId"", ""Rank"")
+                );
+            ");
+        }
+
+        /// <inheritdoc />
+        protected override void Down(MigrationBuilder migrationBuilder)
+        {
+            migrationBuilder.Sql(@"DROP TABLE IF EXISTS ""NoteNeighbors"";");
+        }
+    }
+}